@@ -9,25 +9,616 @@ for more detailed information, please read through docstrings, and comments belo
 import networkx as nx
 import math as m
 import functools as ft
+import numpy as np
+from projectFiles.DKS_tools import Cache
+
+# backends that DKS_Digraph may use to find kings and k values; 'networkx' is the reference implementation, 'bitset'
+# stores each row of the adjacency matrix as a python int, and runs BFS by bit-parallel frontier expansion
+ANALYSIS_BACKENDS = ("networkx", "bitset")
+
+_default_backend = "networkx"  # backend used by DKS_Digraph objects that aren't given one explicitly
+
+# products DKS_Product_Digraph can build, each with the networkx function that builds it
+PRODUCT_TYPES = {"direct": nx.tensor_product, "cartesian": nx.cartesian_product, "strong": nx.strong_product,
+                 "lexicographic": nx.lexicographic_product}
+
+# largest order for which cycle-length spectra are found by dynamic programming over vertex subsets (2^n subsets), above
+# it the simple cycles of the digraph are enumerated instead
+BITMASK_CYCLE_SPECTRUM_MAX_ORDER = 20
+
+
+def set_default_backend(backend: str):
+    """
+    sets the analysis backend used by every DKS_Digraph that is created without an explicit backend
+    :param backend: one of the names in ANALYSIS_BACKENDS
+    """
+    global _default_backend
+
+    if backend not in ANALYSIS_BACKENDS:
+        raise ValueError(f"set_default_backend(): unknown backend '{backend}', expected one of {ANALYSIS_BACKENDS}.")
+
+    _default_backend = backend
+
+
+def get_default_backend() -> str:
+    """
+    :returns: the name of the analysis backend currently used by default
+    """
+    return _default_backend
+
+
+_default_cache = None  # analysis cache used by DKS_Digraph objects that aren't given one explicitly
+
+
+def set_default_cache(cache: Cache.DKS_Analysis_Cache | None):
+    """
+    sets the analysis cache consulted by every DKS_Digraph that is created without an explicit cache
+    :param cache: the cache to be used, or None to not use a cache by default
+    """
+    global _default_cache
+    _default_cache = cache
+
+
+def get_default_cache() -> Cache.DKS_Analysis_Cache | None:
+    """
+    :returns: the analysis cache currently used by default, None if there isn't one
+    """
+    return _default_cache
+
+
+_default_lazy = False  # whether DKS_Digraph objects that aren't told otherwise defer their analysis until it's accessed
+
+
+def set_default_lazy(lazy: bool):
+    """
+    sets whether every DKS_Digraph that is created without an explicit lazy argument is lazy (see DKS_Digraph)
+    :param lazy: True for lazy objects by default, False for objects analysed on creation
+    """
+    global _default_lazy
+    _default_lazy = lazy
+
+
+def get_default_lazy() -> bool:
+    """
+    :returns: whether DKS_Digraph objects are currently lazy by default
+    """
+    return _default_lazy
+
+
+_default_product_store = None  # product store used by DKS_Product_Digraph objects that aren't given one explicitly
+
+
+def set_default_product_store(store: Cache.DKS_Product_Store | None):
+    """
+    sets the product store consulted by every DKS_Product_Digraph that is created without an explicit store
+    :param store: the store to be used, or None to not use a store by default
+    """
+    global _default_product_store
+    _default_product_store = store
+
+
+def get_default_product_store() -> Cache.DKS_Product_Store | None:
+    """
+    :returns: the product store currently used by default, None if there isn't one
+    """
+    return _default_product_store
+
+
+def _boolean_matrix_product(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    product of two boolean matrices, i.e. entry (i, j) is True if some k has left[i, k] and right[k, j]; the counting is
+    done by a float matmul (exact for any order below 2^24), which is far faster than numpy's own boolean matmul
+    """
+    return (left.astype(np.float32) @ right.astype(np.float32)) > 0
+
+
+def _pack_walk_rows(walks: np.ndarray) -> np.ndarray:
+    """
+    packs the rows of a block of (boolean) walk matrices of order m <= 64 into 64-bit integers, bit y of row v is True
+    if there is a walk from v to y
+    :param walks: boolean array of shape (batch, m, m)
+    :returns: uint64 array of shape (batch, m, 1)
+    """
+    packed_rows = np.packbits(walks, axis=2, bitorder='little')
+    packed_rows = np.pad(packed_rows, ((0, 0), (0, 0), (0, 8 - packed_rows.shape[2])))
+
+    return packed_rows.view('<u8')
+
+
+def adjacency_to_digraph(adjacency: np.ndarray, first_vertex: int = 1) -> nx.DiGraph:
+    """
+    builds a digraph from a single adjacency matrix, as yielded in batches by Util.mckay_txt_batches() (kept here,
+    rather than in Util, as both modules need it, and Util imports this module; Util re-exports it)
+    :param adjacency: array of shape (n, n), nonzero entry [u, v] means u is adjacent to v
+    :param first_vertex: name of the vertex of row 0, the rest are numbered on from it (1 matches
+    Util.mckay_txt_parser())
+    :return: a digraph of type networkX.DiGraph
+    """
+    digraph_result = nx.DiGraph()
+    digraph_result.add_nodes_from(range(first_vertex, first_vertex + len(adjacency)))
+
+    us, vs = np.nonzero(adjacency)
+    digraph_result.add_edges_from(zip((us + first_vertex).tolist(), (vs + first_vertex).tolist()))
+
+    return digraph_result
+
+
+def _distance(digraph: nx.DiGraph, source, target) -> int | None:
+    """
+    :returns: the distance from source to target in the digraph, None if target can't be reached from source
+    """
+    try:
+        return nx.shortest_path_length(digraph, source, target)
+    except nx.NetworkXNoPath:
+        return None
+
+
+def _bitset_rows(digraph: nx.DiGraph) -> tuple[list, list[int]]:
+    """
+    builds the compact form of the adjacency matrix used by the 'bitset' backend, row i is a python int where bit j is
+    set when vertex i is adjacent to vertex j (vertices are indexed in the order networkx holds them)
+    :param digraph: DiGraph object, from networkx.DiGraph
+    :returns: tuple of the vertex list (index -> vertex), and the list of row bitsets
+    """
+    vertex_list = list(digraph.nodes)
+    vertex_index = {vertex: index for index, vertex in enumerate(vertex_list)}
+    rows = [0] * len(vertex_list)
+
+    for u, v in digraph.edges:
+        rows[vertex_index[u]] |= 1 << vertex_index[v]
+
+    return vertex_list, rows
+
+
+def _bitset_eccentricity(rows: list[int], source: int, full_mask: int) -> int | None:
+    """
+    BFS from a single source by bit-parallel frontier expansion: every level ORs together the rows of all vertices in
+    the frontier, so a whole level is reached in one pass instead of one arc at a time
+    :param rows: row bitsets as given by _bitset_rows()
+    :param source: index of the vertex BFS starts from
+    :param full_mask: bitset with a bit set for every vertex of the digraph
+    :returns: eccentricity of the source, or None if it can't reach every vertex (i.e. it isn't a king)
+    """
+    reached = 1 << source
+    frontier = reached
+    distance = 0
+
+    while reached != full_mask:
+        next_frontier = 0
+
+        while frontier:  # peel off the lowest set bit of the frontier until none remain
+            low_bit = frontier & -frontier
+            next_frontier |= rows[low_bit.bit_length() - 1]
+            frontier ^= low_bit
+
+        frontier = next_frontier & ~reached
+
+        if frontier == 0:  # nothing new was reached, some vertices are unreachable from the source
+            return None
+
+        reached |= frontier
+        distance += 1
+
+    return distance
+
+
+def _refine_vertex_classes(digraph: nx.DiGraph) -> dict:
+    """
+    splits the vertices of a digraph into classes by colour refinement: vertices start out classed by their in/out-degree,
+    and every round, two vertices stay in the same class only if they have as many out-neighbours, and in-neighbours,
+    in each class as each other, until no class splits. Automorphisms map every vertex to a vertex of its own class, so
+    two vertices of different classes are never in the same orbit (the converse doesn't always hold)
+    :param digraph: DiGraph object, from networkx.DiGraph
+    :returns: dict of vertex -> class, classes are numbered from 0
+    """
+    vertex_classes = {vertex: (digraph.in_degree(vertex), digraph.out_degree(vertex)) for vertex in digraph.nodes}
+    class_count = len(set(vertex_classes.values()))
+
+    while True:
+        signatures = {vertex: (vertex_classes[vertex],
+                               tuple(sorted(vertex_classes[successor] for successor in digraph.successors(vertex))),
+                               tuple(sorted(vertex_classes[predecessor] for predecessor in digraph.predecessors(vertex))))
+                      for vertex in digraph.nodes}
+
+        # signatures are renumbered, so they don't grow with every round
+        numbering = {signature: number for number, signature in enumerate(sorted(set(signatures.values())))}
+        vertex_classes = {vertex: numbering[signature] for vertex, signature in signatures.items()}
+
+        if len(numbering) == class_count:  # no class split, so none ever will
+            return vertex_classes
+
+        class_count = len(numbering)
+
+
+def _bitset_cycle_lengths(rows: list[int]) -> list[int]:
+    """
+    finds, in one pass, the lengths of all simple cycles through every vertex, by dynamic programming over vertex subsets:
+    each cycle is counted from its lowest-indexed vertex s, and for every subset of vertices (all above s, plus s) the
+    DP keeps the set of end vertices of paths that start at s and visit exactly that subset; a subset whose paths can be
+    closed back to s is the vertex set of a cycle, whose length is the size of the subset
+    :param rows: row bitsets as given by _bitset_rows()
+    :returns: list where bit L of entry i is set if vertex i is on a simple cycle of length L
+    """
+    order = len(rows)
+    full_mask = (1 << order) - 1
+    in_rows = [0] * order  # in_rows[i] has bit j set when vertex j is adjacent to vertex i
+
+    for u, row in enumerate(rows):
+        while row:
+            low_bit = row & -row
+            in_rows[low_bit.bit_length() - 1] |= 1 << u
+            row ^= low_bit
+
+    cycle_lengths = [0] * order
+
+    for start in range(order):
+        higher_vertices = full_mask & ~((1 << (start + 1)) - 1)  # cycles counted from start only use vertices above it
+        layer = {1 << start: 1 << start}  # subset of vertices visited -> bitset of end vertices of such paths
+        length = 1
+
+        while layer:
+            next_layer = dict()
+
+            for visited, ends in layer.items():
+                if ends & in_rows[start]:  # a path over these vertices closes back to start, record the cycle
+                    members = visited
+
+                    while members:
+                        low_bit = members & -members
+                        cycle_lengths[low_bit.bit_length() - 1] |= 1 << length
+                        members ^= low_bit
+
+                while ends:  # extend every path by one arc, to a vertex that hasn't been visited yet
+                    low_bit = ends & -ends
+                    extensions = rows[low_bit.bit_length() - 1] & higher_vertices & ~visited
+                    ends ^= low_bit
+
+                    while extensions:
+                        next_vertex = extensions & -extensions
+                        next_layer[visited | next_vertex] = next_layer.get(visited | next_vertex, 0) | next_vertex
+                        extensions ^= next_vertex
+
+            layer = next_layer
+            length += 1
+
+    return cycle_lengths
+
+
+class DKS_Walk_Engine:
+    """
+    Holds the boolean walk matrices A^0, A^1, A^2, ... of a digraph, where entry (i, j) of A^L is True if there is a
+    diwalk of length exactly L from vertex i to vertex j; only whether a walk exists matters, so counts are never kept
+    """
+    def __init__(self, adjacency: np.ndarray):
+        """
+        :param adjacency: boolean adjacency matrix of the digraph, as given by DKS_Digraph.get_adjacency_matrix()
+        """
+        self.adjacency: np.ndarray = adjacency
+        self.walk_matrices: list = [np.identity(len(adjacency), dtype=bool)]  # walk_matrices[L] is A^L
+
+        '''
+        there are finitely many boolean matrices, so the sequence A^0, A^1, ... always becomes periodic: at some point
+        A^(index + period) = A^index, and from then on every later matrix is one we already have, once that's found no
+        more matrices are computed; self.index and self.period stay None until then
+        '''
+        self.index: int | None = None
+        self.period: int | None = None
+        self._seen_matrices: dict = {self.walk_matrices[0].tobytes(): 0}  # matrix contents -> walk length
+
+    @classmethod
+    def from_walk_matrices(cls, adjacency: np.ndarray, walk_matrices: list, index: int, period: int):
+        """
+        :param adjacency: boolean adjacency matrix of the digraph
+        :param walk_matrices: the distinct walk matrices A^0, ..., A^(index + period - 1) of the digraph, already found
+        (e.g. for a whole block of digraphs, see DKS_Block_Walks.get_walk_engine())
+        :param index: walk length from which the walk matrices repeat
+        :param period: period the walk matrices repeat with
+        :returns: an engine already run to period, that computes nothing more
+        """
+        walk_engine = cls(adjacency)
+        walk_engine.walk_matrices = list(walk_matrices)
+        walk_engine.index = index
+        walk_engine.period = period
+        walk_engine._seen_matrices = {}
+
+        return walk_engine
+
+    def advance(self):
+        """
+        advances the engine one step, A^(L+1) = A^L * A, and checks whether the new matrix has been seen before
+        """
+        if self.period is not None:
+            return
+
+        next_matrix = _boolean_matrix_product(self.walk_matrices[-1], self.adjacency)
+        next_length = len(self.walk_matrices)
+        seen_length = self._seen_matrices.get(next_matrix.tobytes())
+
+        if seen_length is not None:
+            self.index = seen_length
+            self.period = next_length - seen_length
+            self._seen_matrices = {}  # no longer needed
+        else:
+            self._seen_matrices[next_matrix.tobytes()] = next_length
+            self.walk_matrices.append(next_matrix)
+
+    def run_to_period(self):
+        """
+        advances the engine until the walk matrices become periodic, from then on every A^L is one of the matrices held,
+        so the engine can be handed to other processes without any of them having to compute more
+        """
+        while self.period is None:
+            self.advance()
+
+    def get_matrix_position(self, walk_length: int) -> int:
+        """
+        :param walk_length: length of walks sought
+        :returns: position in self.walk_matrices of the matrix A^walk_length, advancing the engine if needed
+        """
+        while self.period is None and len(self.walk_matrices) <= walk_length:
+            self.advance()
+
+        if walk_length < len(self.walk_matrices):
+            return walk_length
+
+        return self.index + (walk_length - self.index) % self.period  # A^L repeats with the period after the index
+
+    def get_walk_matrix(self, walk_length: int) -> np.ndarray:
+        """
+        :param walk_length: length of walks sought
+        :returns: boolean matrix A^walk_length
+        """
+        return self.walk_matrices[self.get_matrix_position(walk_length)]
+
+    def get_walk_reachability(self, max_length: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        walk-length reachability for every length up to max_length, without repeating any matrix in memory
+        :param max_length: longest walk length needed
+        :returns: tuple of the boolean array of distinct walk matrices (shape (count, order, order)), and the integer
+        array of shape (max_length + 1,) that gives the position in the former of A^L for each length L
+        """
+        positions = np.array([self.get_matrix_position(walk_length) for walk_length in range(max_length + 1)])
+
+        return np.array(self.walk_matrices, dtype=bool), positions
 
 
 class DKS_Digraph:
-    def __init__(self, digraph: nx.DiGraph, name: str):
+    """
+    Instantiated with a networkx.DiGraph, holds its analysis (kings, k_vals, whether it's a tournament, etc.); the class
+    uses __slots__, so objects carry no instance __dict__, and no attributes other than those below can be set on them
+    """
+    __slots__ = ("digraph", "name", "is_valid_digraph", "backend", "cache", "_fingerprint", "_walk_engine",
+                 "_digraph_kings", "_max_k_val", "_min_k_val", "_is_T", "_has_emperor", "_strong_components",
+                 "_automorphism_orbits")
+
+    def __init__(self, digraph: nx.DiGraph, name: str, backend: str | None = None,
+                 cache: Cache.DKS_Analysis_Cache | None = None, lazy: bool | None = None,
+                 automorphism_orbits: list | None = None):
         """
         :param digraph: DiGraph object, from networkx.DiGraph
         :param name: user-given name of digraph (for best results, use fstrings)
+        :param backend: analysis backend used to find kings (one of ANALYSIS_BACKENDS), default is the global backend as
+        set by set_default_backend()
+        :param cache: analysis cache consulted before kings, k_vals, Dv and Cv are computed, default is the global cache
+        as set by set_default_cache() (if any)
+        :param lazy: if set to True, nothing is computed on creation: kings and k_vals (digraph_kings, max/min_k_val,
+        has_emperor), is_T, and the strong components are each computed the first time they're accessed, and then kept;
+        default is the global setting as set by set_default_lazy() (False unless changed)
+        :param automorphism_orbits: partition of the vertices into orbits of a group of automorphisms of the digraph, if
+        one is already known (e.g. for a product, from the orbits of its factors, see DKS_Product_Digraph), as a list
+        of sets of vertices; vertices of an orbit have the same k_val, so BFS is only run from one vertex of each orbit.
+        If not given, the orbits are only found if self.automorphism_orbits is accessed
         """
         self.digraph: nx.DiGraph = digraph
         self.name: str = name
         self.is_valid_digraph: bool = self.digraph.order() != 0   # order 0 digraphs are considered valid in networkX
 
-        self.digraph_kings: list = []  # list of 'kings' (if they exist) in the digraph
-        self.max_k_val = 0  # maximum distance a king needs to travel in a digraph to reach all other nodes
-        self.min_k_val = 0  # minimum distance a king needs to travel in a digraph to reach all other nodes
-        self.set_k_vals()  # populates the attributes 'digraph_kings', 'max_k_val', and 'min_k_val'
+        self.backend: str = _default_backend if backend is None else backend
+
+        if self.backend not in ANALYSIS_BACKENDS:
+            raise ValueError(f"DKS_Digraph(): unknown backend '{self.backend}', expected one of {ANALYSIS_BACKENDS}.")
+
+        self.cache: Cache.DKS_Analysis_Cache | None = _default_cache if cache is None else cache
+        self._fingerprint: str | None = None  # fingerprint of the digraph in the cache, only found when needed
+
+        self._walk_engine = None  # cache for get_walk_engine(), only built when asked for
+
+        '''
+        the results of the analysis are held in private slots behind properties of the same name (without the 
+        underscore), None in a slot means it hasn't been computed yet, and the property computes it on first access
+        '''
+        self._digraph_kings: list | None = None  # list of 'kings' (if they exist) in the digraph
+        self._max_k_val: int | None = None  # maximum distance a king needs to travel in a digraph to reach all other nodes
+        self._min_k_val: int | None = None  # minimum distance a king needs to travel in a digraph to reach all other nodes
+        self._is_T: bool | None = None  # whether digraph is tournament
+        self._has_emperor: bool | None = None  # if the tournament has an emperor
+        self._strong_components: list | None = None  # strong components of the digraph, as sets of vertices
+        self._automorphism_orbits: list | None = automorphism_orbits  # orbits of vertices under automorphisms
+
+        if not (_default_lazy if lazy is None else lazy):
+            self.set_k_vals()  # populates the attributes 'digraph_kings', 'max_k_val', and 'min_k_val'
+            self._is_T = nx.is_tournament(self.digraph) and self.is_valid_digraph
+
+    @classmethod
+    def from_block(cls, block: 'DKS_Block_Invariants', index: int, name: str,
+                   block_walks: 'DKS_Block_Walks | None' = None, first_vertex: int = 1) -> 'DKS_Digraph':
+        """
+        builds the DKS_Digraph of a digraph of a block, with the analysis already found for the whole block, rather than
+        finding it again: its kings, and k_vals (see DKS_Block_Invariants.get_k_vals()), its strong component if it's
+        strong, and its walk engine (see DKS_Block_Walks.get_walk_engine()); the rest is found as usual, when needed
+        :param block: invariants of the block of digraphs
+        :param index: index of the digraph in the block
+        :param name: user-given name of digraph
+        :param block_walks: walk matrices of the same block, if they're already found, default is leaving the walk
+        engine to be built when it's asked for
+        :param first_vertex: label of the first vertex of the digraph (as in adjacency_to_digraph())
+        :returns: a DKS_Digraph, as though it had been built from the digraph alone
+        """
+        digraph = cls(adjacency_to_digraph(block.adjacencies[index], first_vertex), name, lazy=True)
+
+        digraph.assign_k_vals({vertex + first_vertex: k_val for vertex, k_val
+                               in enumerate(block.get_k_vals()[index].tolist()) if k_val != -1})
+
+        if block.get_is_strong()[index]:
+            digraph._strong_components = [set(digraph.digraph.nodes)]
+
+        if block_walks is not None:
+            digraph._walk_engine = block_walks.get_walk_engine(index)
+
+        return digraph
+
+    @property
+    def digraph_kings(self) -> list:
+        if self._digraph_kings is None:
+            self.set_k_vals()
+
+        return self._digraph_kings
+
+    @digraph_kings.setter
+    def digraph_kings(self, kings: list):
+        self._digraph_kings = kings
+
+    @property
+    def max_k_val(self) -> int:
+        if self._max_k_val is None:
+            self.set_k_vals()
+
+        return self._max_k_val
+
+    @max_k_val.setter
+    def max_k_val(self, k_val: int):
+        self._max_k_val = k_val
+
+    @property
+    def min_k_val(self) -> int:
+        if self._min_k_val is None:
+            self.set_k_vals()
+
+        return self._min_k_val
+
+    @min_k_val.setter
+    def min_k_val(self, k_val: int):
+        self._min_k_val = k_val
+
+    @property
+    def is_T(self) -> bool:
+        if self._is_T is None:
+            self._is_T = nx.is_tournament(self.digraph) and self.is_valid_digraph
+
+        return self._is_T
+
+    @is_T.setter
+    def is_T(self, is_tournament: bool):
+        self._is_T = is_tournament
+
+    @property
+    def has_emperor(self) -> bool:
+        if self._has_emperor is None:
+            return len(self.digraph_kings) == 1
 
-        self.is_T: bool = nx.is_tournament(self.digraph) and self.is_valid_digraph  # whether digraph is tournament
-        self.has_emperor = len(self.digraph_kings) == 1  # if the tournament has an emperor
+        return self._has_emperor
+
+    @has_emperor.setter
+    def has_emperor(self, has_emperor: bool):
+        self._has_emperor = has_emperor
+
+    @property
+    def strong_components(self) -> list:
+        """
+        strong components of the digraph (as sets of vertices, in the order networkx finds them), found once, and then
+        shared by everything that needs them; like the rest of the analysis, they aren't updated if self.digraph is
+        changed afterwards
+        """
+        if self._strong_components is None:
+            self._strong_components = list(nx.strongly_connected_components(self.digraph))
+
+        return self._strong_components
+
+    @property
+    def automorphism_orbits(self) -> list:
+        """
+        orbits of the vertices of the digraph under its automorphism group (as sets of vertices, ordered by the first
+        vertex of each, in the order networkx holds them), found the first time they're accessed (see
+        find_automorphism_orbits()), unless given on creation
+        """
+        if self._automorphism_orbits is None:
+            self._automorphism_orbits = self.find_automorphism_orbits()
+
+        return self._automorphism_orbits
+
+    def find_automorphism_orbits(self) -> list:
+        """
+        finds the orbits of the vertices under the automorphism group of the digraph, without listing the group itself
+        (an empty digraph of order 10 has 10! automorphisms): w is in the orbit of u if there is an automorphism mapping
+        u to w, i.e. if the digraph with u marked is isomorphic to the digraph with w marked. Each vertex is only
+        checked against the first vertex of every orbit it could be in, and only if both have the same class (see
+        _refine_vertex_classes()), so isomorphism checks are rarely needed at all (most tournaments have no
+        automorphisms other than the identity, and their vertices all end up in classes of their own). Every
+        automorphism found merges the orbits of all the vertices it moves, not just those of u and w, so a digraph with
+        many automorphisms needs few checks too
+        :returns: list of the orbits, as sets of vertices
+        """
+        vertex_list = list(self.digraph.nodes)
+        vertex_classes = _refine_vertex_classes(self.digraph)
+
+        def get_marked_digraph(marked_vertex) -> nx.DiGraph:
+            # the classes are kept on the vertices, so the isomorphism check only ever tries to match vertices that
+            # could be matched by an automorphism
+            marked_digraph = nx.DiGraph()
+            marked_digraph.add_nodes_from((vertex, {'class': vertex_classes[vertex], 'marked': False})
+                                          for vertex in vertex_list)
+            marked_digraph.add_edges_from(self.digraph.edges)
+            marked_digraph.nodes[marked_vertex]['marked'] = True
+
+            return marked_digraph
+
+        orbits = list()
+        orbit_of = {vertex: {vertex} for vertex in vertex_list}  # vertices known to share an orbit share a set
+        in_orbit = set()  # vertices of the orbits that are complete
+
+        def merge_orbits(a, b):
+            if orbit_of[a] is not orbit_of[b]:
+                merged_orbit = orbit_of[a] | orbit_of[b]
+
+                for vertex in merged_orbit:
+                    orbit_of[vertex] = merged_orbit
+
+        for u in vertex_list:
+            if u in in_orbit:
+                continue
+
+            # u is the first vertex of its orbit, every vertex that may still join the orbit is checked against it
+            u_marked_digraph = get_marked_digraph(u)
+
+            for w in vertex_list:
+                if w in in_orbit or w in orbit_of[u] or vertex_classes[w] != vertex_classes[u]:
+                    continue
+
+                matcher = nx.isomorphism.DiGraphMatcher(u_marked_digraph, get_marked_digraph(w),
+                                                        node_match=lambda a, b: a == b)
+
+                if matcher.is_isomorphic():  # matcher.mapping is an automorphism of the digraph mapping u to w
+                    for vertex, image in matcher.mapping.items():
+                        merge_orbits(vertex, image)
+
+            in_orbit |= orbit_of[u]
+            orbits.append(orbit_of[u])
+
+        return orbits
+
+    def get_orbit_representatives(self) -> dict:
+        """
+        :returns: dict of vertex -> representative of its automorphism orbit (the first vertex of the orbit, in the
+        order networkx holds them)
+        """
+        orbit_index = {vertex: index for index, orbit in enumerate(self.automorphism_orbits) for vertex in orbit}
+        orbit_representatives = dict()  # orbit index -> representative of the orbit
+        representatives = dict()
+
+        for vertex in self.digraph.nodes:
+            representatives[vertex] = orbit_representatives.setdefault(orbit_index[vertex], vertex)
+
+        return representatives
 
     def set_k_vals(self):
         """
@@ -37,17 +628,32 @@ class DKS_Digraph:
             - identify min/max k value (will assign value to self.min_k_val/self.max_k_val)
         """
 
+        cached_record = self.get_cached_record()
+
+        if cached_record is not None and 'k_vals' in cached_record:
+            king_k_vals = cached_record['k_vals']
+        else:
+            king_k_vals = self.find_king_k_vals()
+            self.put_cached_record({'k_vals': king_k_vals})
+
+        self.assign_k_vals(king_k_vals)
+
+    def assign_k_vals(self, king_k_vals: dict):
+        """
+        assigns the k values of the kings, as found by set_k_vals() (or already known), to self.digraph_kings, the kings
+        themselves, and self.min_k_val/self.max_k_val
+        :param king_k_vals: dict of king -> k_val, for every king of the digraph
+        """
         king_list = list()
         k_val_list = list()
 
-        for vertex in self.digraph.nodes:
-            try:
-                k_val = nx.eccentricity(self.digraph, vertex)  # eccentricity is min distance to reach all nodes
-                self.digraph.nodes[vertex]['k_val'] = k_val  # stored directly in a dict key associated with vertex
-                k_val_list.append(k_val)
-                king_list.append(vertex)
-            except:
-                pass  # silent errors, don't need to know about vertices that aren't kings
+        for king, k_val in king_k_vals.items():
+            self.digraph.nodes[king]['k_val'] = k_val  # stored directly in a dict key associated with vertex
+            k_val_list.append(k_val)
+            king_list.append(king)
+
+        self.max_k_val = 0
+        self.min_k_val = 0
 
         if len(k_val_list) != 0:  # as long as there's at LEAST one king, we can find the min/max k-val
             self.max_k_val = max(k_val_list)
@@ -55,15 +661,65 @@ class DKS_Digraph:
 
         self.digraph_kings = sorted(king_list)  # sort it so that they are in nice order
 
-    def calc_dvs_cvs(self, find_dv: bool = True, find_cv: bool = True):
+    def find_king_k_vals(self) -> dict:
+        """
+        does the computation for set_k_vals() with the backend of the object, without consulting the cache
+        :returns: dict of king -> k_val, for every king of the digraph
+        """
+        king_k_vals = dict()
+
+        # a vertex can only be a king if it lies in the unique source component of the condensation; every vertex of
+        # that component reaches every other vertex, so BFS is only needed to find their k values
+        candidate_kings = self.get_source_component()
+
+        if len(candidate_kings) == 0:
+            return king_k_vals
+
+        if self.backend == "bitset":
+            vertex_list, rows = _bitset_rows(self.digraph)
+            vertex_index = {vertex: index for index, vertex in enumerate(vertex_list)}
+            full_mask = (1 << len(vertex_list)) - 1
+
+            def find_k_val(vertex) -> int | None:
+                return _bitset_eccentricity(rows, vertex_index[vertex], full_mask)
+        else:
+            def find_k_val(vertex) -> int | None:
+                return nx.eccentricity(self.digraph, vertex)  # eccentricity is min distance to reach all nodes
+
+        '''
+        automorphisms preserve distances, so every vertex of an orbit has the same k_val (and the source component is a
+        union of orbits), BFS is only run from the first candidate of each orbit, if the orbits are known already
+        '''
+        representatives = self.get_orbit_representatives() if self._automorphism_orbits is not None else None
+        representative_k_vals = dict()
+
+        for vertex in self.digraph.nodes:
+            if vertex in candidate_kings:
+                if representatives is None:
+                    king_k_vals[vertex] = find_k_val(vertex)
+                    continue
+
+                representative = representatives[vertex]
+
+                if representative not in representative_k_vals:
+                    representative_k_vals[representative] = find_k_val(vertex)
+
+                king_k_vals[vertex] = representative_k_vals[representative]
+
+        return king_k_vals
+
+    def calc_dvs_cvs(self, find_dv: bool = True, find_cv: bool = True, enumerate_dv: bool = False):
         """
         for each king, will find dv and cv depending on what user wants, where:
             - dv is the set of lengths of closed diwalks that contain the king
             - cv is the set of lengths of cycles that contain the king
         the function will then calculate the GCD(dv) or GCD(cv), depending on user's
         prior choices, will assign values directly to self.digraph.nodes[king]['GCD(Dv)' and/or 'GCD(Cv)']
-        :param find_dv: if user wants Dv, and GCD(Dv), default is True
+        :param find_dv: if user wants GCD(Dv), default is True
         :param find_cv: if user wants Cv, and GCD(Cv), default is True
+        :param enumerate_dv: if set to True, the set Dv itself is enumerated as well (see find_dvs()), and assigned to
+        self.digraph.nodes[king]['Dv'], otherwise only GCD(Dv) is found, straight from the period of the strong component
+        of the kings (see find_gcd_dvs()), which is far cheaper; default is False
         """
 
         """
@@ -77,89 +733,194 @@ class DKS_Digraph:
         else:
             # if cv is sought, we find it first
             if find_cv:
-                # initialize kings with Cv attributes in digraph
-                for king in self.digraph_kings:
-                    self.digraph.nodes[king]['Cv'] = set()  # Cv values do not need to be repeated
-                    self.digraph.nodes[king]['GCD(Cv)'] = 0
+                if not self.apply_cached_king_results(('Cv', 'GCD(Cv)')):
+                    self.find_cvs()
+                    self.put_cached_king_results(('Cv', 'GCD(Cv)'))
+
+            # if dv is sought as well, find them next... otherwise-- the function will exit
+            if find_dv and enumerate_dv:
+                if not self.apply_cached_king_results(('Dv', 'GCD(Dv)')):
+                    self.find_dvs()
+                    self.put_cached_king_results(('Dv', 'GCD(Dv)'))
+            elif find_dv:
+                if not self.apply_cached_king_results(('GCD(Dv)',)):
+                    self.find_gcd_dvs()
+                    self.put_cached_king_results(('GCD(Dv)',))
+
+    def find_cvs(self):
+        """
+        does the computation of Cv, and GCD(Cv) for calc_dvs_cvs(), without consulting the cache
+        """
+        # lengths of the cycles through every vertex are found at once, rather than once per king
+        cycle_length_spectrum = self.get_cycle_length_spectrum()
 
-                    # simple cycles are equivalent to sought cycles, below will return cycles of all lengths
-                    all_simple_cycles = nx.simple_cycles(self.digraph)
+        # initialize kings with Cv attributes in digraph
+        for king in self.digraph_kings:
+            self.digraph.nodes[king]['Cv'] = cycle_length_spectrum[king]  # Cv values do not need to be repeated
+            self.digraph.nodes[king]['GCD(Cv)'] = 0
 
-                    for cycle in all_simple_cycles:
-                        if king in cycle:
-                            self.digraph.nodes[king]['Cv'].add(len(cycle))
+            # if the king isn't on any cycle, GCD(Cv) will be equal to 0
+            if len(self.digraph.nodes[king]['Cv']) >= 2:
+                self.digraph.nodes[king]['GCD(Cv)'] = ft.reduce(m.gcd, self.digraph.nodes[king]['Cv'])
+            elif len(self.digraph.nodes[king]['Cv']) == 1:
+                self.digraph.nodes[king]['GCD(Cv)'] = list(self.digraph.nodes[king]['Cv'])[0]
+
+    def find_gcd_dvs(self):
+        """
+        does the computation of GCD(Dv) for calc_dvs_cvs(), without enumerating Dv, nor consulting the cache: a closed
+        diwalk through a king never leaves the strong component of the king, and the gcd of the lengths of the closed
+        diwalks through any vertex of a strong component is the period of the component (the gcd of the lengths of all
+        of its cycles), which is found in O(n + m) from BFS levels (see get_component_period())
+        """
+        if len(self.digraph_kings) == 0:
+            return
 
-                    # if the king isn't on any cycle, GCD(Cv) will be equal to 0
-                    if len(self.digraph.nodes[king]['Cv']) >= 2:
-                        self.digraph.nodes[king]['GCD(Cv)'] = ft.reduce(m.gcd, self.digraph.nodes[king]['Cv'])
-                    elif len(self.digraph.nodes[king]['Cv']) == 1:
-                        self.digraph.nodes[king]['GCD(Cv)'] = list(self.digraph.nodes[king]['Cv'])[0]
+        # every king lies in the unique source component of the digraph, so they all share the same GCD(Dv)
+        king_component = next(component for component in self.strong_components
+                              if self.digraph_kings[0] in component)
+        king_component_period = self.get_component_period(king_component)
 
-            # if dv is sought as well, find them next... otherwise-- the function will exit
-            if find_dv:
-                # initialize kings with Dv attributes in the digraph
-                for king in self.digraph_kings:
-                    self.digraph.nodes[king]['Dv'] = set()
-                    self.digraph.nodes[king]['GCD(Dv)'] = 0
-
-                # below is a list of kings remaining to be checked for their Dv & GCD(Dv), we create a copy of the original
-                # list because it allows us to remove multiple kings at a time, w/o affecting original list
-                kings_to_check = self.digraph_kings.copy()
-
-                '''
-                check all walk lengths up to the size of the digraph, the reason we choose the size of the digraph as an
-                upper-bound is that a closed diwalk of maximal length that is unique (no repetitions of cycles contained
-                within the closed diwalk) is the size of the digraph itself. In other words-- if we create a closed diwalk
-                of maximum size, it will be composed of the concatenation every edge present in the digraph, every edge 
-                summed together is equal to the size of the digraph.
-                '''
-                for proposed_walk_length in range(1, self.digraph.size() + 1):
-
-                    # if all kings have been found to have GCD(Dv) = 1, loop ends prematurely (saves time, and processing)
-                    if len(kings_to_check) == 0:
-                        break
-
-                    # collect all walks in the digraph, including closed walks of the proposed length
-                    all_walks_of_len = nx.number_of_walks(self.digraph, proposed_walk_length)
-
-                    # for each king remaining, find count of closed diwalks containing king of that length, if they exist
-                    for king in kings_to_check:
-                        num_king_closed_diwalks = all_walks_of_len[king][king]  # count of walks from king to itself
-
-                        if num_king_closed_diwalks > 0:  # if any such closed diwalks are found...
-                            if len(self.digraph.nodes[king]['Dv']) == 0:  # if king doesn't have element in Dv yet--
-                                self.digraph.nodes[king]['Dv'].add(proposed_walk_length)
-                            else:  # otherwise, king has at least one length in its set
-                                # need to check if proposed length is multiple of an existing length, (possible repetition)
-                                plength_is_mult_of_elength = False
-                                for existing_length in self.digraph.nodes[king]['Dv']:
-                                    if proposed_walk_length % existing_length == 0:
-                                        plength_is_mult_of_elength = True
-
-                                if not plength_is_mult_of_elength:
-                                    self.digraph.nodes[king]['Dv'].add(proposed_walk_length)
-
-                    kings_to_be_removed = list()  # reset list each time, and populate based on kings that have GCD(Dv) = 1
-
-                    for king in kings_to_check:
-                        if len(self.digraph.nodes[king]['Dv']) >= 2:  # need at least two values in Dv to check for GCD
-                            current_gcd_of_dv = ft.reduce(m.gcd, self.digraph.nodes[king]['Dv'])
-
-                            if current_gcd_of_dv == 1:
-                                kings_to_be_removed.append(king)
-                                self.digraph.nodes[king]['GCD(Dv)'] = current_gcd_of_dv
-
-                    # need to do it this way, otherwise index on removals change, making multiple removals impossible
-                    if len(kings_to_be_removed) != 0:
-                        for king in kings_to_be_removed:
-                            kings_to_check.remove(king)
-
-                # deal with cases of Dv not dealt with above, either GCD(Dv) not calc'ed yet, or only has a single Dv value
-                for king in self.digraph_kings:
-                    if len(self.digraph.nodes[king]['Dv']) >= 2 and self.digraph.nodes[king]['GCD(Dv)'] == 0:
-                        self.digraph.nodes[king]['GCD(Dv)'] = ft.reduce(m.gcd, self.digraph.nodes[king]['Dv'])
-                    elif len(self.digraph.nodes[king]['Dv']) == 1 and self.digraph.nodes[king]['GCD(Dv)'] == 0:
-                        self.digraph.nodes[king]['GCD(Dv)'] = list(self.digraph.nodes[king]['Dv'])[0]
+        for king in self.digraph_kings:
+            self.digraph.nodes[king]['GCD(Dv)'] = king_component_period
+
+    def find_dvs(self):
+        """
+        does the computation of Dv, and GCD(Dv) for calc_dvs_cvs(), without consulting the cache
+        """
+        # initialize kings with Dv attributes in the digraph
+        for king in self.digraph_kings:
+            self.digraph.nodes[king]['Dv'] = set()
+            self.digraph.nodes[king]['GCD(Dv)'] = 0
+
+        # below is a list of kings remaining to be checked for their Dv & GCD(Dv), we create a copy of the original
+        # list because it allows us to remove multiple kings at a time, w/o affecting original list
+        kings_to_check = self.digraph_kings.copy()
+
+        # walk matrices are advanced one step at a time, and stop being computed once they become periodic, so
+        # every king is checked in this single pass over walk lengths
+        walk_engine = self.get_walk_engine()
+        vertex_index = {vertex: index for index, vertex in enumerate(self.digraph.nodes)}
+
+        '''
+        check all walk lengths up to 3c - 2, where c is the order of the strong component of the kings (rather than up 
+        to the size of the digraph): for every cycle C of the component, take a vertex x on C, and shortest diwalks from
+        the king to x, and back (each of length at most c - 1), the closed diwalk made of the two, and the one that goes 
+        around C in between, are both at most 3c - 2 long, and the difference of their lengths is the length of C; so 
+        the gcd of the lengths found up to 3c - 2 divides the length of every cycle of the component, i.e. it is the
+        period of the component, which is GCD(Dv) (see find_gcd_dvs())
+        '''
+        king_component_order = len(next((component for component in self.strong_components
+                                         if self.digraph_kings[0] in component), ())) if len(kings_to_check) != 0 else 0
+        max_walk_length = 3 * king_component_order - 2
+
+        for proposed_walk_length in range(1, max_walk_length + 1):
+
+            # if all kings have been found to have GCD(Dv) = 1, loop ends prematurely (saves time, and processing)
+            if len(kings_to_check) == 0:
+                break
+
+            # closed walks of the proposed length, diagonal entry i is True if vertex i is on one
+            closed_walks_of_len = walk_engine.get_walk_matrix(proposed_walk_length).diagonal()
+
+            # for each king remaining, check if there's a closed diwalk containing king of that length
+            for king in kings_to_check:
+                if closed_walks_of_len[vertex_index[king]]:  # if any such closed diwalks are found...
+                    if len(self.digraph.nodes[king]['Dv']) == 0:  # if king doesn't have element in Dv yet--
+                        self.digraph.nodes[king]['Dv'].add(proposed_walk_length)
+                    else:  # otherwise, king has at least one length in its set
+                        # need to check if proposed length is multiple of an existing length, (possible repetition)
+                        plength_is_mult_of_elength = False
+                        for existing_length in self.digraph.nodes[king]['Dv']:
+                            if proposed_walk_length % existing_length == 0:
+                                plength_is_mult_of_elength = True
+
+                        if not plength_is_mult_of_elength:
+                            self.digraph.nodes[king]['Dv'].add(proposed_walk_length)
+
+            kings_to_be_removed = list()  # reset list each time, and populate based on kings that have GCD(Dv) = 1
+
+            for king in kings_to_check:
+                if len(self.digraph.nodes[king]['Dv']) >= 2:  # need at least two values in Dv to check for GCD
+                    current_gcd_of_dv = ft.reduce(m.gcd, self.digraph.nodes[king]['Dv'])
+
+                    if current_gcd_of_dv == 1:
+                        kings_to_be_removed.append(king)
+                        self.digraph.nodes[king]['GCD(Dv)'] = current_gcd_of_dv
+
+            # need to do it this way, otherwise index on removals change, making multiple removals impossible
+            if len(kings_to_be_removed) != 0:
+                for king in kings_to_be_removed:
+                    kings_to_check.remove(king)
+
+        # deal with cases of Dv not dealt with above, either GCD(Dv) not calc'ed yet, or only has a single Dv value
+        for king in self.digraph_kings:
+            if len(self.digraph.nodes[king]['Dv']) >= 2 and self.digraph.nodes[king]['GCD(Dv)'] == 0:
+                self.digraph.nodes[king]['GCD(Dv)'] = ft.reduce(m.gcd, self.digraph.nodes[king]['Dv'])
+            elif len(self.digraph.nodes[king]['Dv']) == 1 and self.digraph.nodes[king]['GCD(Dv)'] == 0:
+                self.digraph.nodes[king]['GCD(Dv)'] = list(self.digraph.nodes[king]['Dv'])[0]
+
+    def get_fingerprint(self) -> str:
+        """
+        :returns: fingerprint of the digraph, as used to key it in the analysis cache (see Cache.digraph_fingerprint())
+        """
+        if self._fingerprint is None:
+            self._fingerprint = Cache.digraph_fingerprint(self.digraph)
+
+        return self._fingerprint
+
+    def get_cached_record(self) -> dict | None:
+        """
+        :returns: the record of the digraph in the analysis cache, None if there is no cache, or no record
+        """
+        if self.cache is None:
+            return None
+
+        return self.cache.get(self.get_fingerprint())
+
+    def put_cached_record(self, results: dict):
+        """
+        adds results to the record of the digraph in the analysis cache, does nothing if there is no cache
+        :param results: dict of results to be added to the record
+        """
+        if self.cache is not None:
+            self.cache.put(self.get_fingerprint(), results)
+
+    def apply_cached_king_results(self, keys: tuple) -> bool:
+        """
+        assigns per-king results held in the analysis cache directly to the kings in self.digraph
+        :param keys: names of the node attributes sought, e.g. ('Dv', 'GCD(Dv)')
+        :returns: True if every result was found in the cache (and assigned), otherwise False, and nothing is assigned
+        """
+        cached_record = self.get_cached_record()
+
+        if cached_record is None or any(key not in cached_record for key in keys):
+            return False
+
+        for king in self.digraph_kings:
+            for key in keys:
+                value = cached_record[key][king]
+                self.digraph.nodes[king][key] = set(value) if isinstance(value, set) else value  # sets are copied
+
+        return True
+
+    def put_cached_king_results(self, keys: tuple):
+        """
+        stores per-king results, as assigned to the kings in self.digraph, in the analysis cache
+        :param keys: names of the node attributes to be stored, e.g. ('Dv', 'GCD(Dv)')
+        """
+        if self.cache is None:
+            return
+
+        results = dict()
+
+        for key in keys:
+            results[key] = dict()
+
+            for king in self.digraph_kings:
+                value = self.digraph.nodes[king][key]
+                results[key][king] = set(value) if isinstance(value, set) else value
+
+        self.put_cached_record(results)
 
     def get_king_list(self, force_tournament_rules: bool = False) -> list:
         """
@@ -230,8 +991,9 @@ class DKS_Digraph:
             else:
                 append_item = [f"vertex: {node}", f"k_val: {self.digraph.nodes[node]['k_val']}"]
 
-                if 'GCD(Dv)' in self.digraph.nodes[node]:
+                if 'Dv' in self.digraph.nodes[node]:  # only if Dv was enumerated (see calc_dvs_cvs())
                     append_item.append(f"Dv: {self.digraph.nodes[node]['Dv']}")
+                if 'GCD(Dv)' in self.digraph.nodes[node]:
                     append_item.append(f"GCD(Dv): {self.digraph.nodes[node]['GCD(Dv)']}")
                 if 'GCD(Cv)' in self.digraph.nodes[node]:
                     append_item.append(f"Cv: {self.digraph.nodes[node]['Cv']}")
@@ -241,14 +1003,103 @@ class DKS_Digraph:
 
         return king_char_list
 
-    def get_digraph_strong_components(self, exclude_isolated_vertices: bool = False) -> list:
+    def get_source_component(self) -> set:
         """
-        gathers strong components of digraph and returns as a list
+        computes the condensation of the digraph (each strong component contracted to a single vertex) once, and finds
+        its source components, i.e. strong components with no arcs coming into them from the rest of the digraph
+        :returns: vertices of the unique source component, or an empty set if the condensation has more than one source
+        (in which case no vertex can reach all others, and the digraph has no kings)
+        """
+        if not self.is_valid_digraph:
+            return set()
+
+        condensation = nx.condensation(self.digraph, scc=self.strong_components)
+        source_components = [c for c in condensation.nodes if condensation.in_degree(c) == 0]
+
+        if len(source_components) != 1:
+            return set()
+
+        return condensation.nodes[source_components[0]]['members']
+
+    def get_adjacency_matrix(self) -> np.ndarray:
+        """
+        :returns: boolean adjacency matrix of the digraph, rows/columns are in the order networkx holds the vertices
+        (i.e. the order of list(self.digraph.nodes))
+        """
+        vertex_index = {vertex: index for index, vertex in enumerate(self.digraph.nodes)}
+        adjacency = np.zeros((len(vertex_index), len(vertex_index)), dtype=bool)
+
+        for u, v in self.digraph.edges:
+            adjacency[vertex_index[u], vertex_index[v]] = True
+
+        return adjacency
+
+    def get_walk_engine(self) -> DKS_Walk_Engine:
+        """
+        :returns: the DKS_Walk_Engine of the digraph (vertex order as in get_adjacency_matrix()), it's cached on the
+        object, so walk matrices are shared by everything that needs them, e.g. a factor that takes part in many products
+        """
+        if self._walk_engine is None:
+            self._walk_engine = DKS_Walk_Engine(self.get_adjacency_matrix())
+
+        return self._walk_engine
+
+    def get_cycle_length_spectrum(self) -> dict:
+        """
+        finds the set of lengths of simple cycles through every vertex, in a single pass; digraphs of order up to
+        BITMASK_CYCLE_SPECTRUM_MAX_ORDER use dynamic programming over vertex subsets, larger ones go through the simple
+        cycles of the digraph once
+        :returns: dict of vertex -> set of lengths of the cycles that contain it (empty if it isn't on a cycle)
+        """
+        if self.digraph.order() <= BITMASK_CYCLE_SPECTRUM_MAX_ORDER:
+            vertex_list, rows = _bitset_rows(self.digraph)
+            cycle_lengths = _bitset_cycle_lengths(rows)
+
+            return {vertex: {length for length in range(1, len(vertex_list) + 1) if cycle_lengths[index] >> length & 1}
+                    for index, vertex in enumerate(vertex_list)}
+
+        cycle_length_spectrum = {vertex: set() for vertex in self.digraph.nodes}
+
+        # simple cycles are equivalent to sought cycles, below will return cycles of all lengths
+        for cycle in nx.simple_cycles(self.digraph):
+            for vertex in cycle:
+                cycle_length_spectrum[vertex].add(len(cycle))
+
+        return cycle_length_spectrum
+
+    def get_period(self) -> int | None:
+        """
+        finds the period of the digraph, i.e. the gcd of the lengths of all of its cycles; with BFS levels taken from any
+        vertex of a strong digraph, this is the gcd of level(u) + 1 - level(v) over every arc (u, v)
+        :returns: the period if the digraph is strongly connected (0 if it has no cycles, i.e. a single vertex without a
+        loop), otherwise None
+        """
+        if self.digraph.order() == 0 or len(self.strong_components) != 1:
+            return None
+
+        return self.get_component_period(self.strong_components[0])
+
+    def get_component_period(self, component: set) -> int:
+        """
+        finds the period of a strong component of the digraph in O(n + m), as the gcd of level(u) + 1 - level(v) over
+        every arc (u, v) of the component, with BFS levels taken from any of its vertices
+        :param component: vertices of a strong component of the digraph (e.g. one of self.strong_components)
+        :returns: the period of the component, 0 if it has no cycles (i.e. a single vertex without a loop)
+        """
+        # a shortest diwalk between two vertices of a strong component never leaves it (it couldn't come back), so the
+        # BFS is run on the digraph itself, rather than on a (much slower) subgraph view of the component
+        levels = nx.single_source_shortest_path_length(self.digraph, next(iter(component)))
+
+        return ft.reduce(m.gcd, (levels[u] + 1 - levels[v] for u in component for v in self.digraph.successors(u)
+                                 if v in component), 0)
+
+    def get_digraph_strong_components(self, exclude_isolated_vertices: bool = False) -> list:
+        """
+        gathers strong components of digraph and returns as a list
         :param exclude_isolated_vertices: if set to True will exclude isolated vertices from list
         :returns: strong components of digraph in a list
         """
-        strong_components = nx.strongly_connected_components(self.digraph)
-        sorted_strong_components = sorted(strong_components, key=len, reverse=True)
+        sorted_strong_components = sorted(self.strong_components, key=len, reverse=True)
         strong_component_return = list()
 
         if len(sorted_strong_components) == 1:
@@ -266,19 +1117,348 @@ class DKS_Digraph:
 
 class DKS_Product_Digraph:
     """
-    Instantiated with two DKS_Digraph objects, will yield a direct product digraph
+    Instantiated with two DKS_Digraph objects, will yield a product digraph, of any of the PRODUCT_TYPES (direct, by
+    default)
     """
-    def __init__(self, digraph1: DKS_Digraph, digraph2: DKS_Digraph):
+    def __init__(self, digraph1: DKS_Digraph, digraph2: DKS_Digraph, backend: str | None = None,
+                 from_factors: bool = False, store: Cache.DKS_Product_Store | None = None,
+                 product_type: str = "direct", use_automorphisms: bool = True):
         """
         :param digraph1: DiGraph as given by networkx.DiGraph, is first factor digraph
         :param digraph2: DiGraph as given by networkx.DiGraph, is second factor digraph
+        :param backend: analysis backend used on the product digraph, default is the global backend
+        :param from_factors: if set to True, kings and k_vals of the product are derived from the distances of the
+        factors (see set_k_vals_from_factors()), and the product digraph itself is only built if self.D1xD2 is accessed
+        :param store: product store the summary of the product is looked up in, and saved to, default is the store set
+        by set_default_product_store() (if any). On a hit nothing is computed, self.digraph_kings, and self.k_vals are
+        None, and only the summary attributes (king_count, max/min_k_val, max/min_k_val_kings) are set
+        :param product_type: type of the product, one of PRODUCT_TYPES; in the lexicographic product D1[D2], digraph1
+        is the outer factor
+        :param use_automorphisms: if set to True, the automorphism orbits of the factors are found (once per factor, see
+        DKS_Digraph.automorphism_orbits), and k_vals are only computed for one product vertex of each orbit of
+        Aut(D1)xAut(D2), then copied to the rest of the orbit (see get_automorphism_orbits()); the results are the same
+        either way
         """
+        if product_type not in PRODUCT_TYPES:
+            raise ValueError(f"DKS_Product_Digraph(): unknown product type '{product_type}', expected one of "
+                             f"{tuple(PRODUCT_TYPES)}.")
+
         self.D1: DKS_Digraph = digraph1                                    # factor digraph 1
         self.D2: DKS_Digraph = digraph2                                    # factor digraph 2
+        self.product_type: str = product_type
+        self.name: str = f"{self.D1.name}x{self.D2.name}" if product_type == "direct" else \
+            f"{self.D1.name}x{self.D2.name} ({product_type})"
+        self.from_factors: bool = from_factors
+        self.backend: str | None = backend
+        self.use_automorphisms: bool = use_automorphisms
 
         # ^ may at some point have it that if the digraphs are given as a nx.DiGraph object that it will create them to fit
 
-        self.D1xD2: DKS_Digraph = DKS_Digraph(nx.tensor_product(self.D1.digraph, self.D2.digraph), f"{self.D1.name}x{self.D2.name}")
+        '''
+        the king analysis of the product is held in the attributes below, the same way as in DKS_Digraph, so callers
+        don't need to know whether or not the product digraph was actually built; the product digraph itself is only 
+        built when it's needed, see self.D1xD2
+        '''
+        self._D1xD2: DKS_Digraph | None = None
+        self.digraph_kings: list = []  # list of kings (if they exist) in the product, vertices are (u, v) tuples
+        self.k_vals: dict = {}  # k_val of each king in the product
+        self.max_k_val = 0
+        self.min_k_val = 0
+
+        # summary of the analysis, all that is kept of the product in the product store
+        self.king_count: int = 0
+        self.max_k_val_kings: list = []  # sorted list of kings with k_val equal to self.max_k_val
+        self.min_k_val_kings: list = []  # sorted list of kings with k_val equal to self.min_k_val
+
+        self.store: Cache.DKS_Product_Store | None = _default_product_store if store is None else store
+
+        '''
+        D1xD2 and D2xD1 share a single entry of the store, it remaps the kings to the order of the factors given here
+        '''
+        summary = None
+        if self.store is not None:
+            summary = self.store.get_product(self.D1.get_fingerprint(), self.D2.get_fingerprint(), self.product_type)
+
+        if summary is not None:
+            self.digraph_kings = None
+            self.k_vals = None
+            self.set_summary(summary)
+            return
+
+        if self.from_factors:
+            self.set_k_vals_from_factors()
+        else:
+            self.digraph_kings = self.D1xD2.digraph_kings
+            self.k_vals = {king: self.D1xD2.digraph.nodes[king]['k_val'] for king in self.D1xD2.digraph_kings}
+            self.max_k_val = self.D1xD2.max_k_val
+            self.min_k_val = self.D1xD2.min_k_val
+
+        self.king_count = len(self.digraph_kings)
+        self.max_k_val_kings = [king for king in self.digraph_kings if self.k_vals[king] == self.max_k_val]
+        self.min_k_val_kings = [king for king in self.digraph_kings if self.k_vals[king] == self.min_k_val]
+
+        if self.store is not None:
+            self.store.put_product(self.D1.get_fingerprint(), self.D2.get_fingerprint(), self.get_summary(),
+                                   self.product_type)
+
+    @property
+    def D1xD2(self) -> DKS_Digraph:
+        """
+        the product digraph, as a DKS_Digraph, built (and analysed) the first time it's accessed
+        """
+        if self._D1xD2 is None:
+            product_digraph = PRODUCT_TYPES[self.product_type](self.D1.digraph, self.D2.digraph)
+            automorphism_orbits = self.get_automorphism_orbits() if self.use_automorphisms else None
+
+            if automorphism_orbits is not None and len(automorphism_orbits) == product_digraph.order():
+                automorphism_orbits = None  # every orbit is a single vertex, so nothing would be saved
+
+            self._D1xD2 = DKS_Digraph(product_digraph, self.name, self.backend, automorphism_orbits=automorphism_orbits)
+
+        return self._D1xD2
+
+    def get_automorphism_orbits(self) -> list:
+        """
+        every pair of automorphisms of the factors (g1, g2) is an automorphism (u,v) -> (g1(u), g2(v)) of the product,
+        whatever its type, so the orbit of (u,v) under Aut(D1)xAut(D2) is just (orbit of u) x (orbit of v); the product
+        may have more automorphisms still, but any group of automorphisms will do for copying k_vals across orbits
+        :returns: list of the orbits of the product vertices under Aut(D1)xAut(D2), as sets of (u, v) tuples
+        """
+        return [{(u, v) for u in d1_orbit for v in d2_orbit} for d1_orbit in self.D1.automorphism_orbits
+                for d2_orbit in self.D2.automorphism_orbits]
+
+    def get_summary(self) -> dict:
+        """
+        :returns: dict of the summary of the king analysis of the product, as it is kept in the product store
+        """
+        return {'min_k_val': self.min_k_val, 'max_k_val': self.max_k_val, 'king_count': self.king_count,
+                'min_k_val_kings': list(self.min_k_val_kings), 'max_k_val_kings': list(self.max_k_val_kings)}
+
+    def set_summary(self, summary: dict):
+        """
+        sets the summary attributes of the product from a summary as given by get_summary()
+        :param summary: dict of the summary of the king analysis of the product
+        """
+        self.min_k_val = summary['min_k_val']
+        self.max_k_val = summary['max_k_val']
+        self.king_count = summary['king_count']
+        self.min_k_val_kings = list(summary['min_k_val_kings'])
+        self.max_k_val_kings = list(summary['max_k_val_kings'])
+
+    def get_max_distance(self) -> int:
+        """
+        :returns: the largest distance possible between two vertices of the product, (order of the product - 1)
+        """
+        return max(self.D1.digraph.order() * self.D2.digraph.order() - 1, 0)
+
+    def set_k_vals_from_factors(self):
+        """
+        populates 'digraph_kings', 'k_vals', 'min_k_val', and 'max_k_val' without building the product digraph, from
+        the distances of the factors, with the formula of the type of the product (d1, and d2 are distances in D1, and 
+        D2, and every king (u,v) of the product needs u to be a king of D1):
+            - direct: the smallest k with walks of length k in both factors (see find_direct_k_vals())
+            - cartesian: d((u,v), (u',v')) = d1(u,u') + d2(v,v'), kings are pairs of kings, with k_val the sum
+            - strong: d((u,v), (u',v')) = max(d1(u,u'), d2(v,v')), kings are pairs of kings, with k_val the max
+            - lexicographic: see find_lexicographic_k_vals()
+        """
+        if self.product_type == "direct":
+            king_k_vals = self.find_direct_k_vals()
+        elif self.product_type == "lexicographic":
+            king_k_vals = self.find_lexicographic_k_vals()
+        else:
+            combine = sum if self.product_type == "cartesian" else max
+            d1_k_vals = {king: self.D1.digraph.nodes[king]['k_val'] for king in self.D1.digraph_kings}
+            d2_k_vals = {king: self.D2.digraph.nodes[king]['k_val'] for king in self.D2.digraph_kings}
+
+            king_k_vals = {(u, v): combine((d1_k_val, d2_k_val)) for u, d1_k_val in d1_k_vals.items()
+                           for v, d2_k_val in d2_k_vals.items()}
+
+        self.digraph_kings = sorted(king_k_vals)
+        self.k_vals = {king: king_k_vals[king] for king in self.digraph_kings}
+
+        if len(self.digraph_kings) != 0:
+            self.max_k_val = max(self.k_vals.values())
+            self.min_k_val = min(self.k_vals.values())
+
+    def find_direct_k_vals(self) -> dict:
+        """
+        in a direct product, the distance from (u,v) to (u',v') is the smallest k such that there is a u->u' walk of
+        length k in D1, and a v->v' walk of length k in D2, so BFS levels of the product can be read straight off of
+        the walk matrices of the factors (see DKS_Walk_Engine)
+
+        only pairs of factor kings are checked, a product king (u,v) needs u to reach all of D1, and v to reach all of D2
+        :returns: dict of king -> k_val, for every king of the product
+        """
+        king_k_vals = dict()
+
+        d1_kings = self.D1.digraph_kings
+        d2_kings = self.D2.digraph_kings
+
+        if len(d1_kings) == 0 or len(d2_kings) == 0:
+            return king_k_vals
+
+        d1_index = {vertex: index for index, vertex in enumerate(self.D1.digraph.nodes)}
+        d2_index = {vertex: index for index, vertex in enumerate(self.D2.digraph.nodes)}
+
+        max_distance = self.get_max_distance()
+        d1_engine = self.D1.get_walk_engine()
+        d2_engine = self.D2.get_walk_engine()
+
+        # kings of a factor are closed under its automorphisms, so only the kings (u,v) representing their orbits in
+        # Aut(D1)xAut(D2) need to be checked (see get_automorphism_orbits()), the rest get the k_val of their orbit
+        if self.use_automorphisms:
+            d1_representatives = self.D1.get_orbit_representatives()
+            d2_representatives = self.D2.get_orbit_representatives()
+        else:
+            d1_representatives = {u: u for u in d1_kings}
+            d2_representatives = {v: v for v in d2_kings}
+
+        # every candidate source is checked at once, reached[s] is the set of product vertices within distance k of s
+        sources = [(u, v) for u in d1_kings if d1_representatives[u] == u
+                   for v in d2_kings if d2_representatives[v] == v]
+        u_indices = np.array([d1_index[u] for u, _ in sources])
+        v_indices = np.array([d2_index[v] for _, v in sources])
+
+        reached = (d1_engine.get_walk_matrix(0)[u_indices][:, :, np.newaxis]
+                   & d2_engine.get_walk_matrix(0)[v_indices][:, np.newaxis, :])
+        k_vals = np.full(len(sources), -1)
+        k_vals[reached.reshape(len(sources), -1).all(axis=1)] = 0  # only happens in a product of order 1
+
+        for k in range(1, max_distance + 1):
+            if (k_vals != -1).all():
+                break
+
+            # product vertices reached by walks of length exactly k, as the outer product of the factor rows
+            reached_at_k = (d1_engine.get_walk_matrix(k)[u_indices][:, :, np.newaxis]
+                            & d2_engine.get_walk_matrix(k)[v_indices][:, np.newaxis, :])
+            newly_reached = reached_at_k & ~reached
+
+            if not newly_reached.any():  # no BFS level grew, so none of them will ever grow again
+                break
+
+            reached |= newly_reached
+            k_vals[(k_vals == -1) & reached.reshape(len(sources), -1).all(axis=1)] = k
+
+        source_k_vals = {source: int(k_val) for source, k_val in zip(sources, k_vals) if k_val != -1}
+
+        for u in d1_kings:
+            for v in d2_kings:
+                representative = (d1_representatives[u], d2_representatives[v])
+
+                if representative in source_k_vals:
+                    king_k_vals[(u, v)] = source_k_vals[representative]
+
+        return king_k_vals
+
+    def find_lexicographic_k_vals(self) -> dict:
+        """
+        in the lexicographic product D1[D2], (u,v) -> (u',v') is an arc if u -> u' in D1, or if u = u', and v -> v' in
+        D2, so for u != u' the distance from (u,v) to (u',v') is d1(u,u') (whatever v, and v' are), and within the
+        copy of D2 at u it is min(d2(v,v'), c(u)), where c(u) is the length of the shortest closed walk through u in D1
+        (the product can leave the copy, and come back to any of its vertices)
+
+        a product king (u,v) needs u to be a king of D1, and v to reach all of D2, unless u is on a closed walk, in
+        which case every v will do
+        :returns: dict of king -> k_val, for every king of the product
+        """
+        king_k_vals = dict()
+
+        d1_kings = self.D1.digraph_kings
+
+        if len(d1_kings) == 0:
+            return king_k_vals
+
+        d2_vertices = list(self.D2.digraph.nodes)
+        d2_engine = self.D2.get_walk_engine()
+
+        # distances in D2 from the walk matrices, d2_distances[v, v'] is the first length with a v->v' walk (-1 if none)
+        d2_distances = np.full((len(d2_vertices), len(d2_vertices)), -1)
+
+        for walk_length in range(len(d2_vertices)):
+            d2_distances[(d2_distances == -1) & d2_engine.get_walk_matrix(walk_length)] = walk_length
+
+        other_vertices = ~np.identity(len(d2_vertices), dtype=bool)  # targets v' != v, in the copy of D2 at u
+
+        for u in d1_kings:
+            closed_walk = self.get_shortest_closed_walk(u)
+
+            for v_index, v in enumerate(d2_vertices):
+                copy_distances = d2_distances[v_index][other_vertices[v_index]]
+
+                if closed_walk is not None:
+                    copy_distances = np.where(copy_distances == -1, closed_walk, np.minimum(copy_distances, closed_walk))
+                elif (copy_distances == -1).any():  # v doesn't reach all of its copy of D2, and can't leave it
+                    continue
+
+                king_k_vals[(u, v)] = max(self.D1.digraph.nodes[u]['k_val'], int(copy_distances.max(initial=0)))
+
+        return king_k_vals
+
+    def get_shortest_closed_walk(self, vertex) -> int | None:
+        """
+        :param vertex: vertex of D1
+        :returns: length of the shortest closed walk through the vertex in D1 (a shortest closed walk is a cycle, so it
+        is at most the order of D1), or None if the vertex isn't on one
+        """
+        vertex_index = list(self.D1.digraph.nodes).index(vertex)
+        d1_engine = self.D1.get_walk_engine()
+
+        for walk_length in range(1, self.D1.digraph.order() + 1):
+            if d1_engine.get_walk_matrix(walk_length)[vertex_index, vertex_index]:
+                return walk_length
+
+        return None
+
+    def get_distance(self, source: tuple, target: tuple) -> int | None:
+        """
+        on-demand distance oracle for a single pair of product vertices, computed from the factors (the product digraph
+        is not needed), with the formula of the type of the product (see set_k_vals_from_factors())
+        :param source: product vertex (u, v) the distance is measured from
+        :param target: product vertex (u', v') the distance is measured to
+        :returns: the distance from source to target in the product, or None if target can't be reached from source
+        """
+        if source == target:
+            return 0
+
+        if self.product_type != "direct":
+            d1_distance = _distance(self.D1.digraph, source[0], target[0])
+            d2_distance = _distance(self.D2.digraph, source[1], target[1])
+
+            if self.product_type == "lexicographic":
+                if source[0] != target[0]:
+                    return d1_distance
+
+                # within the copy of D2 at u, the product may also leave the copy, and come back along a closed walk
+                copy_distances = [distance for distance in (d2_distance, self.get_shortest_closed_walk(source[0]))
+                                  if distance is not None]
+
+                return min(copy_distances) if len(copy_distances) != 0 else None
+
+            if d1_distance is None or d2_distance is None:
+                return None
+
+            return d1_distance + d2_distance if self.product_type == "cartesian" else max(d1_distance, d2_distance)
+
+        d1_index = {vertex: index for index, vertex in enumerate(self.D1.digraph.nodes)}
+        d2_index = {vertex: index for index, vertex in enumerate(self.D2.digraph.nodes)}
+
+        max_distance = self.get_max_distance()
+        d1_matrices, d1_positions = self.D1.get_walk_engine().get_walk_reachability(max_distance)
+        d2_matrices, d2_positions = self.D2.get_walk_engine().get_walk_reachability(max_distance)
+
+        d1_walks = d1_matrices[d1_positions[1:], d1_index[source[0]], d1_index[target[0]]]
+        d2_walks = d2_matrices[d2_positions[1:], d2_index[source[1]], d2_index[target[1]]]
+
+        common_lengths = np.flatnonzero(d1_walks & d2_walks)  # lengths k with walks of length k in both factors
+
+        return int(common_lengths[0]) + 1 if len(common_lengths) != 0 else None
+
+    def get_extremum_k_val_kings(self, extremum_is_max: bool = True) -> list:
+        """
+        :param extremum_is_max: if True, extremum is maximal, otherwise minimum.
+        :returns: sorted list of kings of the product whose k_val is equal to the max (or min) k_val of the product
+        """
+        return list(self.max_k_val_kings if extremum_is_max else self.min_k_val_kings)
 
     def get_product_extremum_k_val_kings(self, extremum_is_max: bool = True):
         """
@@ -286,29 +1466,32 @@ class DKS_Product_Digraph:
         :param extremum_is_max: if True, extremum is maximal, otherwise minimum.
         """
 
-        print(f"~~~~~~{"MAX" if extremum_is_max else "MIN"} EXTRENUM K_VAL KINGS IN {self.D1xD2.name}~~~~~~")
-        if len(self.D1xD2.digraph_kings) == 0:
-            print(f"get_product_extrenum_k_val_kings(): {self.D1xD2.name} has no kings, unable to retrieve extrenum k_val kings.")
+        print(f"~~~~~~{"MAX" if extremum_is_max else "MIN"} EXTRENUM K_VAL KINGS IN {self.name}~~~~~~")
+        if self.king_count == 0:
+            print(f"get_product_extrenum_k_val_kings(): {self.name} has no kings, unable to retrieve extrenum k_val kings.")
             print(f"~~~~~~~~~~~~~~~~~~~~~~~~\n")
             return
 
-        extremum_k_val = self.D1xD2.max_k_val if extremum_is_max else self.D1xD2.min_k_val
+        extremum_k_val = self.max_k_val if extremum_is_max else self.min_k_val
 
-        print(f"\nget_product_extrenum_k_val_kings(): the following are the {"maximal" if extremum_is_max else "minimal"} k_vals of king vertices in {self.D1xD2.name}...\n")
+        print(f"\nget_product_extrenum_k_val_kings(): the following are the {"maximal" if extremum_is_max else "minimal"} k_vals of king vertices in {self.name}...\n")
 
-        for node in self.D1xD2.digraph.nodes:
-            if node in self.D1xD2.digraph_kings and self.D1xD2.digraph.nodes[node]['k_val'] == extremum_k_val:
-                comp1 = node[0]
-                comp2 = node[1]
+        for node in self.get_extremum_k_val_kings(extremum_is_max):
+            comp1 = node[0]
+            comp2 = node[1]
 
-                print(f"vertex {node} in {self.D1xD2.name} has {"maximal" if extremum_is_max else "minimal"} k_val {extremum_k_val} in "
-                      f"{self.D1xD2.name}, and is composed of vertex {comp1} of {self.D1.name}, and vertex {comp2} of {self.D2.name}:")
+            print(f"vertex {node} in {self.name} has {"maximal" if extremum_is_max else "minimal"} k_val {extremum_k_val} in "
+                  f"{self.name}, and is composed of vertex {comp1} of {self.D1.name}, and vertex {comp2} of {self.D2.name}:")
 
-                print(f"\t>> vertex {comp1} from {self.D1.name} has k_val {self.D1.digraph.nodes[comp1]['k_val']}, and is on closed diwalks of lengt"
-                      f"hs (Dv = {self.D1.digraph.nodes[comp1]['Dv']}), with GCD(Dv) = {self.D1.digraph.nodes[comp1]['GCD(Dv)']}.")
+            # Dv is only there if it was enumerated (see DKS_Digraph.calc_dvs_cvs()), GCD(Dv) always is
+            dv1 = f" (Dv = {self.D1.digraph.nodes[comp1]['Dv']})" if 'Dv' in self.D1.digraph.nodes[comp1] else ""
+            dv2 = f" (Dv = {self.D2.digraph.nodes[comp2]['Dv']})" if 'Dv' in self.D2.digraph.nodes[comp2] else ""
 
-                print(f"\t>> vertex {comp2} from {self.D2.name} has k_val {self.D2.digraph.nodes[comp2]['k_val']}, and is on closed diwalks of lengt"
-                      f"hs (Dv = {self.D2.digraph.nodes[comp2]['Dv']}), with GCD(Dv) = {self.D2.digraph.nodes[comp2]['GCD(Dv)']}.\n")
+            print(f"\t>> vertex {comp1} from {self.D1.name} has k_val {self.D1.digraph.nodes[comp1]['k_val']}, and is on closed diwalks of lengt"
+                  f"hs{dv1}, with GCD(Dv) = {self.D1.digraph.nodes[comp1]['GCD(Dv)']}.")
+
+            print(f"\t>> vertex {comp2} from {self.D2.name} has k_val {self.D2.digraph.nodes[comp2]['k_val']}, and is on closed diwalks of lengt"
+                  f"hs{dv2}, with GCD(Dv) = {self.D2.digraph.nodes[comp2]['GCD(Dv)']}.\n")
 
         print(f"~~~~~~~~~~~~~~~~~~~~~~~~\n")
 
@@ -319,18 +1502,587 @@ class DKS_Product_Digraph:
         if a given product is 'interesting enough' to run tests on. Later on, I would imagine this may not be necessary
         """
 
-        print(f"~~~~~~CHECKING IF {self.D1xD2.name} IS BELOW THEORIZED UPPER-BOUND~~~~~~")
+        print(f"~~~~~~CHECKING IF {self.name} IS BELOW THEORIZED UPPER-BOUND~~~~~~")
         upper_bound_val = (self.D1.digraph.order() * self.D2.digraph.order()) - 1
-        max_k_val = self.D1xD2.max_k_val
+        max_k_val = self.max_k_val
         if 0 < max_k_val < upper_bound_val:
-            print(f"Maximal k_val of {self.D1xD2.name} is below theorized upper-bound, max_k_val is: {self.D1xD2.max_k_val}; upper_bound_val is: {upper_bound_val}.")
+            print(f"Maximal k_val of {self.name} is below theorized upper-bound, max_k_val is: {self.max_k_val}; upper_bound_val is: {upper_bound_val}.")
             print(f"~~~~~~~~~~~~~~~~~~~~~~~~\n")
             return True
         elif max_k_val == upper_bound_val:
-            print(f"Maximal k_val of {self.D1xD2.name} is equal to theorized upper-bound, max_k_val is: {self.D1xD2.max_k_val} = {upper_bound_val}.")
+            print(f"Maximal k_val of {self.name} is equal to theorized upper-bound, max_k_val is: {self.max_k_val} = {upper_bound_val}.")
         else:
-            print(f"{self.D1xD2.name} has no kings, is invalid/unqualified for checking against upper-bound.")
+            print(f"{self.name} has no kings, is invalid/unqualified for checking against upper-bound.")
 
         print(f"~~~~~~~~~~~~~~~~~~~~~~~~\n")
 
         return False
+
+
+class DKS_Batch_Product_Evaluator:
+    """
+    Instantiated with a DKS_Digraph, will give the king analysis of its direct product with every digraph of a block of
+    (same order) digraphs at once, with vectorized boolean matrix operations; neither the product digraphs, nor any
+    DKS_Digraph of the block, are ever built
+    """
+    def __init__(self, digraph: DKS_Digraph, store: Cache.DKS_Product_Store | None = None):
+        """
+        :param digraph: DKS_Digraph, is the fixed first factor of every product
+        :param store: product store the summaries of products are looked up in, and saved to, default is the store set
+        by set_default_product_store() (if any)
+        """
+        self.D1: DKS_Digraph = digraph
+        self.D1.get_walk_engine().run_to_period()  # every walk matrix of the fixed factor is then at hand
+        self.store: Cache.DKS_Product_Store | None = _default_product_store if store is None else store
+
+        d1_index = {vertex: index for index, vertex in enumerate(self.D1.digraph.nodes)}
+        self._d1_kings: np.ndarray = np.array([d1_index[king] for king in self.D1.digraph_kings], dtype=int)
+
+    def evaluate(self, adjacencies: np.ndarray, first_vertex: int = 1, block_walks: 'DKS_Block_Walks | None' = None,
+                 block_indices: np.ndarray | None = None) -> list[dict | None]:
+        """
+        :param adjacencies: array of shape (batch, m, m) of the adjacency matrices of the second factors, as given by
+        Util.tournament_batches()
+        :param first_vertex: label of the first vertex of the second factors (vertex i of a second factor is labeled
+        first_vertex + i, as in adjacency_to_digraph())
+        :param block_walks: walk matrices of a block of digraphs the second factors are taken from, if they're shared
+        with other evaluators (see DKS_Block_Walks), default is finding the walk matrices here
+        :param block_indices: index in block_walks of every second factor, default is all of the block, in order
+        :returns: list with, for every digraph of the block, the summary of its product (the same dict as given by
+        DKS_Product_Digraph.get_summary()), or None if the product has no kings; products found in the product store
+        aren't evaluated again, and the others are saved to it
+        """
+        if self.store is None:
+            return self.evaluate_block(adjacencies, first_vertex, block_walks, block_indices)
+
+        d1_fingerprint = self.D1.get_fingerprint()
+        d2_fingerprints = [Cache.digraph_fingerprint(adjacency_to_digraph(adjacency, first_vertex))
+                           for adjacency in adjacencies]
+        summaries = [self.store.get_product(d1_fingerprint, d2_fingerprint) for d2_fingerprint in d2_fingerprints]
+
+        missing_indices = [index for index, summary in enumerate(summaries) if summary is None]
+        if block_walks is not None:
+            block_indices = np.arange(len(adjacencies)) if block_indices is None else np.asarray(block_indices)
+            block_indices = block_indices[missing_indices]
+
+        missing_summaries = self.evaluate_block(adjacencies[missing_indices], first_vertex, block_walks, block_indices)
+
+        for index, summary in zip(missing_indices, missing_summaries):
+            # products without kings are saved too, with the same summary as DKS_Product_Digraph gives them
+            if summary is None:
+                summary = {'min_k_val': 0, 'max_k_val': 0, 'king_count': 0, 'min_k_val_kings': [], 'max_k_val_kings': []}
+
+            self.store.put_product(d1_fingerprint, d2_fingerprints[index], summary)
+            summaries[index] = summary
+
+        return [summary if summary['king_count'] != 0 else None for summary in summaries]
+
+    def evaluate_block(self, adjacencies: np.ndarray, first_vertex: int = 1, block_walks: 'DKS_Block_Walks | None' = None,
+                       block_indices: np.ndarray | None = None) -> list[dict | None]:
+        """
+        same walk-length BFS as DKS_Product_Digraph.set_k_vals_from_factors(), run for every source (u, v) of every
+        product in the block at once, where u is a king of the fixed factor, and v is any vertex of the other factor;
+        second factors of order above 64 aren't supported
+        :param adjacencies: array of shape (batch, m, m) of the adjacency matrices of the second factors
+        :param first_vertex: label of the first vertex of the second factors
+        :param block_walks: walk matrices of a block of digraphs the second factors are taken from (see
+        DKS_Block_Walks), default is finding the walk matrices of the second factors here
+        :param block_indices: index in block_walks of every second factor, default is all of the block, in order
+        :returns: list with, for every digraph of the block, the summary of its product, or None if it has no kings
+        """
+        batch_size, m, _ = adjacencies.shape
+        summaries = [None] * batch_size
+
+        if batch_size == 0 or len(self._d1_kings) == 0:
+            return summaries
+
+        d1_engine = self.D1.get_walk_engine()
+        u_count = len(self._d1_kings)
+        max_distance = self.D1.digraph.order() * m - 1
+
+        '''
+        reached[b, u, v] is the set of product vertices within distance k of the source (u, v), in the product with
+        digraph b of the block; as in the product of a single pair, product vertices reached by walks of length exactly
+        k are the outer product of row u of A1^k, and row v of A2^k, the latter taken for the whole block at once.
+
+        Sets of product vertices are bitsets split over 64-bit words, each word holding the blocks of m bits of
+        products_per_word vertices x of the fixed factor (bit x * m + y is product vertex (x, y)). The outer product
+        is then two integer operations: row v of A2^k (m bits) times the word with bit x * m set for every x of the
+        word copies the row into every block, and ANDing with the blocks of the vertices x in row u of A1^k keeps
+        only those blocks.
+        '''
+        if m > 64:
+            raise ValueError(f"evaluate(): second factors of order {m} don't fit in the 64-bit words of the evaluator.")
+
+        n = self.D1.digraph.order()
+        products_per_word = 64 // m
+        word_count = -(-n // products_per_word)
+        word_of_x = np.arange(n) // products_per_word
+        block_shifts = ((np.arange(n) % products_per_word) * m).astype(np.uint64)
+        block_mask = np.uint64((1 << m) - 1)
+
+        copying_words = np.zeros(word_count, dtype=np.uint64)  # bit x * m set for every x of each word
+        full_words = np.zeros(word_count, dtype=np.uint64)  # every product vertex of each word
+        for x in range(n):
+            copying_words[word_of_x[x]] |= np.uint64(1) << block_shifts[x]
+            full_words[word_of_x[x]] |= block_mask << block_shifts[x]
+
+        def get_reached_at(walk_length: int, d2_rows: np.ndarray) -> np.ndarray:
+            d1_rows = d1_engine.get_walk_matrix(walk_length)[self._d1_kings]  # (kings, n) boolean rows of A1^k
+            d1_blocks = np.zeros((u_count, word_count), dtype=np.uint64)
+            for x in range(n):
+                d1_blocks[:, word_of_x[x]] |= np.where(d1_rows[:, x], block_mask << block_shifts[x], np.uint64(0))
+
+            # d2_rows are the rows of A2^k as m-bit integers (bit y is vertex y), of shape (batch, m, 1)
+            return (d2_rows * copying_words)[:, np.newaxis, :, :] & d1_blocks[np.newaxis, :, np.newaxis, :]
+
+        '''
+        the rows of A2^k are either found here, by a boolean matrix product per walk length, for the products whose BFS
+        isn't over, or taken from block_walks, where they're only found once for every first factor that shares them
+        '''
+        d2_adjacencies = adjacencies.astype(bool)
+        d2_walks = np.broadcast_to(np.identity(m, dtype=bool), (batch_size, m, m)).copy()
+
+        if block_walks is not None:
+            walk_indices = np.arange(batch_size) if block_indices is None else np.asarray(block_indices)
+            reached = get_reached_at(0, block_walks.get_packed_rows(0)[walk_indices])
+        else:
+            walk_indices = None
+            reached = get_reached_at(0, _pack_walk_rows(d2_walks))
+        k_vals = np.full((batch_size, u_count, m), -1)
+        k_vals[(reached == full_words).all(axis=3)] = 0  # only happens in a product of order 1
+
+        active = np.arange(batch_size)  # products of the block whose BFS isn't over
+
+        for k in range(1, max_distance + 1):
+            # a product is done once every source has a k_val, or once none of its BFS levels grew
+            is_active = (k_vals[active] == -1).any(axis=(1, 2))
+
+            if not is_active.all():
+                active, d2_adjacencies, d2_walks, reached = (active[is_active], d2_adjacencies[is_active],
+                                                             d2_walks[is_active], reached[is_active])
+
+            if len(active) == 0:
+                break
+
+            if walk_indices is not None:
+                d2_rows = block_walks.get_packed_rows(k)[walk_indices[active]]
+            else:
+                d2_walks = _boolean_matrix_product(d2_walks, d2_adjacencies)
+                d2_rows = _pack_walk_rows(d2_walks)
+
+            newly_reached = get_reached_at(k, d2_rows) & ~reached
+            reached |= newly_reached
+
+            active_k_vals = k_vals[active]
+            active_k_vals[(active_k_vals == -1) & (reached == full_words).all(axis=3)] = k
+            k_vals[active] = active_k_vals
+
+            has_grown = newly_reached.reshape(len(active), -1).any(axis=1)
+
+            if not has_grown.all():
+                active, d2_adjacencies, d2_walks, reached = (active[has_grown], d2_adjacencies[has_grown],
+                                                             d2_walks[has_grown], reached[has_grown])
+
+        '''
+        the summaries are read off of k_vals for the whole block at once; np.nonzero() lists (b, u, v) in row-major order,
+        and the kings of the fixed factor are indexed in sorted order, so the kings of each product come out sorted
+        '''
+        is_king = k_vals != -1
+        king_counts = is_king.sum(axis=(1, 2))
+        min_k_vals = np.where(is_king, k_vals, max_distance + 1).min(axis=(1, 2))
+        max_k_vals = k_vals.max(axis=(1, 2))
+
+        d1_kings = self.D1.digraph_kings
+        extremal_kings = list()
+        for extremal_k_vals in (min_k_vals, max_k_vals):
+            batch_indices, u_positions, v_indices = np.nonzero(is_king & (k_vals == extremal_k_vals[:, np.newaxis, np.newaxis]))
+            kings = list(zip([d1_kings[u_position] for u_position in u_positions.tolist()],
+                             (v_indices + first_vertex).tolist()))
+            bounds = np.searchsorted(batch_indices, np.arange(batch_size + 1)).tolist()
+            extremal_kings.append([kings[bounds[index]:bounds[index + 1]] for index in range(batch_size)])
+
+        for index in np.flatnonzero(king_counts).tolist():
+            summaries[index] = {'min_k_val': int(min_k_vals[index]), 'max_k_val': int(max_k_vals[index]),
+                                'king_count': int(king_counts[index]), 'min_k_val_kings': extremal_kings[0][index],
+                                'max_k_val_kings': extremal_kings[1][index]}
+
+        return summaries
+
+
+class DKS_Block_Walks:
+    """
+    Walk matrices of every digraph of a block of (same order, at most 64) digraphs, as the packed rows
+    DKS_Batch_Product_Evaluator works on; each walk length is found the first time it's asked for, for the whole block,
+    and is then kept, so the evaluators of many first factors with the same block share them
+    """
+    def __init__(self, adjacencies: np.ndarray):
+        """
+        :param adjacencies: array of shape (batch, m, m) of adjacency matrices, as given by Util.tournament_batches()
+        """
+        batch_size, order, _ = adjacencies.shape
+
+        self.adjacencies: np.ndarray = adjacencies.astype(bool)
+        self._walks: np.ndarray = np.broadcast_to(np.identity(order, dtype=bool), (batch_size, order, order)).copy()
+        self._packed_rows: list = [_pack_walk_rows(self._walks)]  # packed rows of A^k, of every k found so far
+
+        '''
+        as in DKS_Walk_Engine, the walk matrices of every digraph become periodic, once run_to_period() has found where,
+        index[b], and period[b] are those of digraph b, and the packed rows of every walk length up to the end of the
+        first period of every digraph are held in a single array, of shape (batch, lengths, m, 1), from which the rows
+        of any longer walk length are read, nothing more is computed
+        '''
+        self.index: np.ndarray | None = None
+        self.period: np.ndarray | None = None
+        self._walk_rows: np.ndarray | None = None
+
+    @classmethod
+    def from_arrays(cls, adjacencies: np.ndarray, walk_rows: np.ndarray, index: np.ndarray,
+                    period: np.ndarray) -> 'DKS_Block_Walks':
+        """
+        :param adjacencies: array of shape (batch, m, m) of adjacency matrices
+        :param walk_rows: the packed rows of the block, as given by get_walk_rows(), already found (e.g. by another
+        process), they aren't copied
+        :param index: walk length from which the walk matrices of every digraph repeat, as in self.index
+        :param period: period the walk matrices of every digraph repeat with, as in self.period
+        :returns: the walk matrices of the block, already run to period
+        """
+        block_walks = cls(adjacencies[:0])
+        block_walks.adjacencies = adjacencies.astype(bool, copy=False)
+        block_walks.index, block_walks.period, block_walks._walk_rows = index, period, walk_rows
+        block_walks._walks, block_walks._packed_rows = None, None
+
+        return block_walks
+
+    def select(self, indices) -> 'DKS_Block_Walks':
+        """
+        :param indices: indices (or a slice, or boolean mask) of digraphs of the block
+        :returns: the walk matrices of those digraphs alone, those already found for this block aren't found again
+        """
+        if self.period is not None:
+            return DKS_Block_Walks.from_arrays(self.adjacencies[indices], self._walk_rows[indices], self.index[indices],
+                                               self.period[indices])
+
+        selection = DKS_Block_Walks(self.adjacencies[indices])
+        selection._walks = self._walks[indices]
+        selection._packed_rows = [packed_rows[indices] for packed_rows in self._packed_rows]
+
+        return selection
+
+    def run_to_period(self):
+        """
+        finds walk matrices until those of every digraph of the block have become periodic (same as
+        DKS_Walk_Engine.run_to_period(), for every digraph at once), from then on the rows of every walk length are at
+        hand, so the block can be shared (e.g. with other processes, see get_walk_rows()) without any more being found
+        """
+        if self.period is not None:
+            return
+
+        batch_size = len(self.adjacencies)
+        index = np.zeros(batch_size, dtype=int)
+        period = np.zeros(batch_size, dtype=int)  # 0 until the period of the digraph is found
+        walk_length = 0
+
+        while (period == 0).any():
+            walk_length += 1
+            packed_rows = self.get_packed_rows(walk_length)
+            pending = np.flatnonzero(period == 0)
+
+            # A^walk_length can only match a single earlier matrix, as the earlier matrices of a pending digraph differ
+            for seen_length in range(walk_length):
+                is_seen = (packed_rows[pending] == self._packed_rows[seen_length][pending]).all(axis=(1, 2))
+                index[pending[is_seen]] = seen_length
+                period[pending[is_seen]] = walk_length - seen_length
+
+        self.index, self.period = index, period
+        self._walk_rows = np.stack(self._packed_rows, axis=1)
+        self._walks, self._packed_rows = None, None  # no longer needed
+
+    def get_walk_rows(self) -> np.ndarray:
+        """
+        :returns: uint64 array of shape (batch, lengths, m, 1), the packed rows of A^k of every digraph, for every walk
+        length k up to the end of the first period of every digraph (see run_to_period()); with self.index, and
+        self.period, this is all of the walk matrices of the block
+        """
+        self.run_to_period()
+
+        return self._walk_rows
+
+    def get_packed_rows(self, walk_length: int) -> np.ndarray:
+        """
+        :param walk_length: length of the walks
+        :returns: uint64 array of shape (batch, m, 1), the rows of A^walk_length of every digraph as m-bit integers
+        """
+        if self.period is not None:
+            if walk_length < self._walk_rows.shape[1]:
+                return self._walk_rows[:, walk_length]
+
+            # A^L of each digraph repeats with its period after its index
+            positions = self.index + (walk_length - self.index) % self.period
+            return self._walk_rows[np.arange(len(positions)), positions]
+
+        while len(self._packed_rows) <= walk_length:
+            self._walks = _boolean_matrix_product(self._walks, self.adjacencies)
+            self._packed_rows.append(_pack_walk_rows(self._walks))
+
+        return self._packed_rows[walk_length]
+
+    def get_walk_engine(self, index: int) -> DKS_Walk_Engine:
+        """
+        :param index: index of a digraph of the block
+        :returns: the DKS_Walk_Engine of the digraph (vertex order as in its adjacency matrix), already run to period
+        from the walk matrices of the block
+        """
+        self.run_to_period()
+        order = self.adjacencies.shape[1]
+        length_count = int(self.index[index] + self.period[index])
+
+        walk_rows = np.ascontiguousarray(self._walk_rows[index, :length_count, :, 0])
+        walk_matrices = np.unpackbits(walk_rows.view(np.uint8).reshape(length_count, order, 8), axis=2, count=order,
+                                      bitorder='little').astype(bool)
+
+        return DKS_Walk_Engine.from_walk_matrices(self.adjacencies[index], list(walk_matrices), int(self.index[index]),
+                                                  int(self.period[index]))
+
+
+class DKS_Block_Invariants:
+    """
+    Cheap structural invariants of every digraph of a block of (same order) digraphs, given as an array of shape
+    (batch, m, m) of adjacency matrices; each invariant is only computed when first asked for, and is then kept
+    """
+    def __init__(self, adjacencies: np.ndarray):
+        """
+        :param adjacencies: array of shape (batch, m, m) of adjacency matrices, as given by Util.tournament_batches()
+        """
+        self.adjacencies: np.ndarray = adjacencies.astype(bool)
+        self._reachability = None
+        self._periods = None
+        self._k_vals = None
+
+    @classmethod
+    def from_arrays(cls, adjacencies: np.ndarray, reachability: np.ndarray, periods: np.ndarray,
+                    k_vals: np.ndarray) -> 'DKS_Block_Invariants':
+        """
+        :param adjacencies: array of shape (batch, m, m) of adjacency matrices
+        :param reachability: the reachability of the block, as given by get_reachability()
+        :param periods: the periods of the block, as given by get_periods()
+        :param k_vals: the k_vals of the block, as given by get_k_vals()
+        :returns: the invariants of the block, already found (e.g. by another process), they aren't copied
+        """
+        block = cls(adjacencies[:0])
+        block.adjacencies = adjacencies.astype(bool, copy=False)
+        block._reachability, block._periods, block._k_vals = reachability, periods, k_vals
+
+        return block
+
+    def compute(self):
+        """
+        finds every invariant now, rather than when first asked for, so the blocks selected from this one share them
+        """
+        self.get_reachability()
+        self.get_periods()
+        self.get_k_vals()
+
+    def select(self, indices) -> 'DKS_Block_Invariants':
+        """
+        :param indices: indices (or a slice, or boolean mask) of digraphs of the block
+        :returns: the invariants of those digraphs alone, those already found for this block aren't found again
+        """
+        selection = DKS_Block_Invariants(self.adjacencies[indices])
+        selection._reachability = self._reachability[indices] if self._reachability is not None else None
+        selection._periods = self._periods[indices] if self._periods is not None else None
+        selection._k_vals = self._k_vals[indices] if self._k_vals is not None else None
+
+        return selection
+
+    def get_in_degrees(self) -> np.ndarray:
+        """
+        :returns: integer array of shape (batch, m), the in-degree of every vertex of every digraph
+        """
+        return self.adjacencies.sum(axis=1)
+
+    def get_reachability(self) -> np.ndarray:
+        """
+        :returns: boolean array of shape (batch, m, m), entry [b, u, v] is True if there is a u->v path in digraph b
+        (every vertex reaches itself); found by repeated squaring of (I + A), so in log2(m) batched matrix products
+        """
+        if self._reachability is None:
+            batch_size, order, _ = self.adjacencies.shape
+            reachability = self.adjacencies | np.identity(order, dtype=bool)
+
+            for _ in range(max(order - 1, 1).bit_length()):
+                reachability = _boolean_matrix_product(reachability, reachability)
+
+            self._reachability = reachability
+
+        return self._reachability
+
+    def get_has_king(self) -> np.ndarray:
+        """
+        :returns: boolean array of shape (batch,), True for the digraphs that have a king (a vertex that reaches all)
+        """
+        return self.get_reachability().all(axis=2).any(axis=1)
+
+    def get_is_strong(self) -> np.ndarray:
+        """
+        :returns: boolean array of shape (batch,), True for the strongly connected digraphs
+        """
+        return self.get_reachability().all(axis=(1, 2))
+
+    def get_periods(self) -> np.ndarray:
+        """
+        same as DKS_Digraph.get_period(), for every digraph of the block at once, with BFS levels taken from vertex 0
+        :returns: integer array of shape (batch,), the period of every strong digraph (0 if it has no cycles), and 0
+        for the others
+        """
+        if self._periods is None:
+            batch_size, order, _ = self.adjacencies.shape
+            levels = np.full((batch_size, order), -1)
+            frontier = np.zeros((batch_size, order), dtype=bool)
+            frontier[:, 0] = True
+            reached = frontier.copy()
+            levels[:, 0] = 0
+
+            for level in range(1, order):
+                frontier = _boolean_matrix_product(frontier[:, np.newaxis, :], self.adjacencies)[:, 0, :] & ~reached
+                reached |= frontier
+                levels[frontier] = level
+
+            # level(u) + 1 - level(v) over every arc (u, v), non-arcs are 0, which leave the gcd as it is
+            differences = np.where(self.adjacencies, levels[:, :, np.newaxis] + 1 - levels[:, np.newaxis, :], 0)
+            periods = np.gcd.reduce(differences.reshape(batch_size, -1), axis=1)
+
+            self._periods = np.where(self.get_is_strong(), periods, 0)
+
+        return self._periods
+
+    def get_k_vals(self) -> np.ndarray:
+        """
+        same k_vals as DKS_Digraph.set_k_vals() finds, for every digraph of the block at once, by BFS from every vertex
+        :returns: integer array of shape (batch, m), the k_val of every king of every digraph (its eccentricity), and -1
+        for the vertices that aren't kings
+        """
+        if self._k_vals is None:
+            batch_size, order, _ = self.adjacencies.shape
+            reached = np.broadcast_to(np.identity(order, dtype=bool), (batch_size, order, order)).copy()
+            k_vals = np.where(reached.all(axis=2), 0, -1)  # only happens in a digraph of order 1
+
+            for distance in range(1, order):
+                reached |= _boolean_matrix_product(reached, self.adjacencies)
+                k_vals[(k_vals == -1) & reached.all(axis=2)] = distance
+
+            self._k_vals = k_vals
+
+        return self._k_vals
+
+
+'''
+prefilters are cheap tests that rule out products of a fixed factor with a block of digraphs that can't have kings,
+before they're evaluated; each is a function of the fixed factor (a DKS_Digraph), and the invariants of the block (a 
+DKS_Block_Invariants), that gives the boolean array of the products it rules out (only products without kings); they're
+sound for the direct product, and only some of them for other types of product, see PREFILTER_PRODUCT_TYPES
+'''
+
+
+def prefilter_source(digraph: DKS_Digraph, block: DKS_Block_Invariants) -> np.ndarray:
+    """
+    DIRECT PRODUCT ONLY, a vertex x of a factor without in-arcs (in a tournament, an emperor: a vertex of score m - 1)
+    makes (x, y) of the product reachable from itself alone, so unless the other factor is a single vertex, the product
+    has no kings; in the other types of product, (x, y) can still be reached along the other factor
+    """
+    batch_size, order, _ = block.adjacencies.shape
+    d1_has_source = any(degree == 0 for _, degree in digraph.digraph.in_degree)
+    d2_has_source = (block.get_in_degrees() == 0).any(axis=1)
+
+    return (d1_has_source & (order > 1)) | (d2_has_source & (digraph.digraph.order() > 1))
+
+
+def prefilter_kingless(digraph: DKS_Digraph, block: DKS_Block_Invariants) -> np.ndarray:
+    """
+    DIRECT (CARTESIAN, OR STRONG) PRODUCT ONLY, a king (u, v) of a product projects onto kings u and v of the factors,
+    so a factor without kings rules out kings; not so in the lexicographic product D1[D2], where v needn't reach all of
+    D2 once u is on a closed walk of D1 (the distances within a copy of D2 are capped by that walk)
+    """
+    return ~block.get_has_king() | (len(digraph.digraph_kings) == 0)
+
+
+def prefilter_period(digraph: DKS_Digraph, block: DKS_Block_Invariants) -> np.ndarray:
+    """
+    DIRECT PRODUCT ONLY, the direct product of two strong digraphs of periods p1, and p2, is the disjoint union of
+    gcd(p1, p2) strong digraphs (with no arcs between them), so it has no kings when gcd(p1, p2) > 1; the other types of
+    product of strong digraphs are strong
+    """
+    d1_period = digraph.get_period()
+
+    if d1_period is None:
+        return np.zeros(len(block.adjacencies), dtype=bool)
+
+    return block.get_is_strong() & (np.gcd(block.get_periods(), d1_period) > 1)
+
+
+PREFILTERS = {"source": prefilter_source, "kingless": prefilter_kingless, "period": prefilter_period}
+DEFAULT_PREFILTERS = ("source", "kingless", "period")  # cheapest first
+PREFILTER_PRODUCT_TYPES = {"source": ("direct",), "kingless": ("direct", "cartesian", "strong"),
+                           "period": ("direct",)}  # types of product (see PRODUCT_TYPES) each prefilter is sound for
+
+
+class DKS_Prefilter_Pipeline:
+    """
+    Instantiated with a DKS_Digraph, runs a chain of prefilters (see PREFILTERS) on blocks of digraphs, before their
+    products with it are evaluated, and keeps count of the products each prefilter ruled out; the prefilters are sound
+    for direct products, only those listed for it in PREFILTER_PRODUCT_TYPES are run on other types of product
+    """
+    def __init__(self, digraph: DKS_Digraph, prefilters: tuple | None = None, product_type: str = "direct"):
+        """
+        :param digraph: DKS_Digraph, is the fixed first factor of every product
+        :param prefilters: prefilters run, in order, each either the name of one in PREFILTERS, or a function of the same
+        form (it is then known by its __name__, and is trusted to be sound for the type of product), default is those
+        of DEFAULT_PREFILTERS that are sound for the type of product
+        :param product_type: type of the products (one of PRODUCT_TYPES), a prefilter named here that isn't sound for it
+        (see PREFILTER_PRODUCT_TYPES) raises a ValueError, rather than ruling out products that have kings
+        """
+        if product_type not in PRODUCT_TYPES:
+            raise ValueError(f"DKS_Prefilter_Pipeline(): unknown product type '{product_type}', expected one of "
+                             f"{tuple(PRODUCT_TYPES)}.")
+
+        if prefilters is None:
+            prefilters = tuple(prefilter for prefilter in DEFAULT_PREFILTERS
+                               if product_type in PREFILTER_PRODUCT_TYPES[prefilter])
+
+        for prefilter in prefilters:
+            if isinstance(prefilter, str) and product_type not in PREFILTER_PRODUCT_TYPES[prefilter]:
+                raise ValueError(f"DKS_Prefilter_Pipeline(): prefilter '{prefilter}' isn't sound for the "
+                                 f"{product_type} product, only for {PREFILTER_PRODUCT_TYPES[prefilter]} products.")
+
+        self.D1: DKS_Digraph = digraph
+        self.product_type: str = product_type
+        self.prefilters: list = [(prefilter, PREFILTERS[prefilter]) if isinstance(prefilter, str) else
+                                 (prefilter.__name__, prefilter) for prefilter in prefilters]
+
+        self.candidate_count: int = 0  # number of products given to the pipeline
+        self.skip_counts: dict = {name: 0 for name, _ in self.prefilters}  # products ruled out by each prefilter
+
+    def apply(self, adjacencies: np.ndarray, block: DKS_Block_Invariants | None = None) -> np.ndarray:
+        """
+        :param adjacencies: array of shape (batch, m, m) of the adjacency matrices of the second factors
+        :param block: invariants of the second factors, if they're already found (e.g. shared by the pipelines of many
+        first factors), default is finding them here
+        :returns: integer array of the indices (in the block) of the products that no prefilter ruled out; a product is
+        counted against the first prefilter that ruled it out
+        """
+        if block is None:
+            block = DKS_Block_Invariants(adjacencies)
+
+        is_ruled_out = np.zeros(len(adjacencies), dtype=bool)
+
+        for name, prefilter in self.prefilters:
+            if is_ruled_out.all():
+                break
+
+            newly_ruled_out = prefilter(self.D1, block) & ~is_ruled_out
+            self.skip_counts[name] += int(newly_ruled_out.sum())
+            is_ruled_out |= newly_ruled_out
+
+        self.candidate_count += len(adjacencies)
+
+        return np.flatnonzero(~is_ruled_out)
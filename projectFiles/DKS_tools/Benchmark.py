@@ -0,0 +1,405 @@
+"""
+Benchmark suite for the DKS tools: times the parsers, the analysis of single digraphs, products, Dv/Cv, and the
+throughput of the experiment, offline, against small tournament (.txt), and digraph (.d6) fixtures that are generated on
+the spot; results are saved as JSON, so runs can be compared, and checked against a stored baseline.
+
+run with: python -m projectFiles.DKS_tools.Benchmark [--baseline FILE] [--tolerance 0.25] [--repeat 3]
+
+For a broad overview, please refer to 'projectFiles/DOCUMENTATION.md';
+for more detailed information, please read through docstrings, and comments below.
+"""
+
+# library imports
+import argparse
+import contextlib
+import io
+import json
+import math as m
+import os
+import platform
+import sys
+import tempfile
+import time
+import networkx as nx
+import numpy as np
+from projectFiles.DKS_tools import Analysis, Util, Experiment_Functions
+
+BENCHMARK_SEED = 2024  # seed of the fixtures, so every run times the same digraphs
+FIXTURE_TOURNAMENT_COUNT = 512  # tournaments in the fixture file of each order
+FIXTURE_D6_ORDERS = (4, 5, 6, 7, 8)  # orders of the digraphs in the .d6 fixture file
+FIXTURE_D6_COUNT = 256  # digraphs of each order in the .d6 fixture file
+EXPERIMENT_I_ORDER = 5  # order of the i tournament of the experiment benchmarks
+
+MIN_RUN_SECONDS = 0.05  # a run of a benchmark calls its function enough times to take at least this long
+
+DEFAULT_RESULTS_DIRECTORY = "benchmark results"
+DEFAULT_BASELINE_FILE = f"{DEFAULT_RESULTS_DIRECTORY}/baseline.json"
+DEFAULT_TOLERANCE = 0.25  # a benchmark regressed if it is this much slower (as a fraction) than in the baseline
+
+
+def write_tournament_fixture(filename: str | os.PathLike, order: int, count: int, rng: np.random.Generator):
+    """
+    writes random (labelled) tournaments to a file of type .txt, in the format of the McKay tournament files (see
+    Util.mckay_txt_parser())
+    :param filename: name of the file to write
+    :param order: order of the tournaments
+    :param count: number of tournaments (lines) to write
+    :param rng: random generator the tournaments are drawn from
+    """
+    bits = rng.integers(0, 2, size=(count, order * (order - 1) // 2))
+
+    with open(filename, 'w') as w_f:
+        for line_bits in bits:
+            w_f.write("".join(map(str, line_bits)) + "\n")
+
+
+def write_d6_fixture(filename: str | os.PathLike, orders: tuple, count: int, rng: np.random.Generator):
+    """
+    writes random digraphs to a file of type .d6 (see Util.mckay_d6_parser()), orders are written one after the other
+    :param filename: name of the file to write
+    :param orders: orders of the digraphs
+    :param count: number of digraphs (lines) of each order to write
+    :param rng: random generator the digraphs are drawn from
+    """
+    with open(filename, 'w') as w_f:
+        for n in orders:
+            for adjacency in rng.random(size=(count, n, n)) < 0.4:
+                np.fill_diagonal(adjacency, False)
+
+                # the adjacency matrix, row by row, padded to a multiple of 6 bits, each 6 bits a char (+63)
+                bits = np.concatenate((adjacency.ravel(), np.zeros(-(n * n) % 6, dtype=bool))).reshape(-1, 6)
+                chars = bits.astype(int) @ (1 << np.arange(5, -1, -1)) + 63
+
+                w_f.write("&" + chr(n + 63) + "".join(map(chr, chars)) + "\n")
+
+
+def make_fixtures(directory: str | os.PathLike, seed: int = BENCHMARK_SEED) -> dict:
+    """
+    generates the fixtures of the benchmarks in a directory, laid out the way the experiment expects its data
+    (tournaments of every order up to Experiment_Functions.MAX_TOURNAMENT_ORDER in digraph_datasets/t_files/)
+    :param directory: directory the fixtures are written in
+    :param seed: seed of the random generator the fixtures are drawn from
+    :returns: dict of the paths of the fixtures, 'tournaments' (dict of order -> .txt file), and 'd6'
+    """
+    rng = np.random.default_rng(seed)
+    t_directory = os.path.join(directory, "digraph_datasets", "t_files")
+    d_directory = os.path.join(directory, "digraph_datasets", "d_files")
+    os.makedirs(t_directory, exist_ok=True)
+    os.makedirs(d_directory, exist_ok=True)
+
+    fixtures = {'tournaments': dict(), 'd6': os.path.join(d_directory, "digraphs.d6")}
+
+    for order in range(3, Experiment_Functions.MAX_TOURNAMENT_ORDER + 1):
+        fixtures['tournaments'][order] = os.path.join(t_directory, f"tourn{order}.txt")
+        write_tournament_fixture(fixtures['tournaments'][order], order, FIXTURE_TOURNAMENT_COUNT, rng)
+
+    write_d6_fixture(fixtures['d6'], FIXTURE_D6_ORDERS, FIXTURE_D6_COUNT, rng)
+
+    return fixtures
+
+
+def time_benchmark(function, item_count: int, repeat: int) -> dict:
+    """
+    :param function: function (without arguments) that does the work being timed
+    :param item_count: number of items (lines, digraphs, products, ...) the function works through each time
+    :param repeat: number of runs, the fastest run is kept (the others are noise on top of it); a function that takes
+    less than MIN_RUN_SECONDS is called as many times as it takes to fill that in each run (as timeit does), so that
+    short benchmarks aren't lost in the noise of the timer
+    :returns: dict of the 'seconds' a call takes (in the fastest run), the 'items' of each call, and the
+    'items_per_second'
+    """
+    start_time = time.perf_counter()
+    function()  # the first call also warms up whatever the function reads (file caches, etc.)
+    call_count = max(1, m.ceil(MIN_RUN_SECONDS / max(time.perf_counter() - start_time, 1e-9)))
+
+    run_times = list()
+
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+
+        for _ in range(call_count):
+            function()
+
+        run_times.append((time.perf_counter() - start_time) / call_count)
+
+    seconds = min(run_times)
+
+    return {'seconds': seconds, 'items': item_count, 'items_per_second': item_count / seconds if seconds > 0 else None}
+
+
+def benchmark_parsers(fixtures: dict, repeat: int) -> dict:
+    """
+    times the line parsers, and the batch readers, of tournament (.txt), packed (.dkst), and digraph (.d6) files
+    :returns: dict of benchmark name -> timing (see time_benchmark())
+    """
+    results = dict()
+    txt_file = fixtures['tournaments'][8]
+    txt_count = Util.tournament_count(txt_file)
+    d6_count = FIXTURE_D6_COUNT * len(FIXTURE_D6_ORDERS)
+    packed_file = txt_file.replace(".txt", ".dkst")
+    Util.pack_mckay_txt(txt_file, packed_file)
+
+    results['parsers.mckay_txt_parser'] = time_benchmark(
+        lambda: [Util.mckay_txt_parser(txt_file, line) for line in range(1, txt_count + 1)], txt_count, repeat)
+    results['parsers.mckay_txt_batches'] = time_benchmark(
+        lambda: [batch for batch in Util.mckay_txt_batches(txt_file)], txt_count, repeat)
+    results['parsers.packed_batches'] = time_benchmark(
+        lambda: [batch for batch in Util.tournament_batches(packed_file)], txt_count, repeat)
+    results['parsers.mckay_d6_parser'] = time_benchmark(
+        lambda: [Util.mckay_d6_parser(fixtures['d6'], line) for line in range(1, d6_count + 1)], d6_count, repeat)
+    results['parsers.mckay_d6_batches'] = time_benchmark(
+        lambda: [batch for batch in Util.mckay_d6_batches(fixtures['d6'])], d6_count, repeat)
+
+    os.remove(packed_file)  # the experiment benchmarks read the .txt fixtures
+
+    return results
+
+
+def benchmark_analysis(fixtures: dict, repeat: int) -> dict:
+    """
+    times the king analysis (set_k_vals()) of single tournaments with each backend, lazy creation, and Dv/Cv (GCD(Dv)
+    alone, and with Dv enumerated)
+    :returns: dict of benchmark name -> timing (see time_benchmark())
+    """
+    results = dict()
+    tournaments = [Util.adjacency_to_digraph(adjacency) for batch in
+                   Util.tournament_batches(fixtures['tournaments'][8]) for adjacency in batch]
+    dv_cv_tournaments = [Util.adjacency_to_digraph(adjacency) for batch in
+                         Util.tournament_batches(fixtures['tournaments'][7]) for adjacency in batch]
+
+    for backend in Analysis.ANALYSIS_BACKENDS:
+        results[f'analysis.set_k_vals.{backend}'] = time_benchmark(
+            lambda: [Analysis.DKS_Digraph(digraph.copy(), "T", backend) for digraph in tournaments],
+            len(tournaments), repeat)
+
+    results['analysis.lazy_creation'] = time_benchmark(
+        lambda: [Analysis.DKS_Digraph(digraph, "T", lazy=True) for digraph in tournaments], len(tournaments), repeat)
+
+    def calc_dvs_cvs():
+        for digraph in dv_cv_tournaments:
+            Analysis.DKS_Digraph(digraph.copy(), "T").calc_dvs_cvs()
+
+    def calc_dvs_cvs_enumerated():
+        for digraph in dv_cv_tournaments:
+            Analysis.DKS_Digraph(digraph.copy(), "T").calc_dvs_cvs(enumerate_dv=True)
+
+    results['analysis.calc_dvs_cvs'] = time_benchmark(calc_dvs_cvs, len(dv_cv_tournaments), repeat)
+    results['analysis.calc_dvs_cvs.enumerate_dv'] = time_benchmark(calc_dvs_cvs_enumerated, len(dv_cv_tournaments),
+                                                                   repeat)
+
+    return results
+
+
+def benchmark_products(fixtures: dict, repeat: int) -> dict:
+    """
+    times the analysis of products of a fixed tournament with a file of tournaments: built by networkX, derived from
+    the factors (for every type of product), and evaluated a batch at once
+    :returns: dict of benchmark name -> timing (see time_benchmark())
+    """
+    results = dict()
+    i_adjacency = next(Util.tournament_batches(fixtures['tournaments'][EXPERIMENT_I_ORDER],
+                                               start=find_experiment_i_line(fixtures)))[0]
+    d1 = Analysis.DKS_Digraph(Util.adjacency_to_digraph(i_adjacency), "T")
+    adjacencies = np.concatenate(list(Util.tournament_batches(fixtures['tournaments'][6])))
+    factors = [Analysis.DKS_Digraph(Util.adjacency_to_digraph(adjacency), "T") for adjacency in adjacencies]
+
+    for product_type in Analysis.PRODUCT_TYPES:
+        results[f'products.built.{product_type}'] = time_benchmark(
+            lambda: [Analysis.DKS_Product_Digraph(d1, d2, product_type=product_type).king_count for d2 in factors],
+            len(factors), repeat)
+        results[f'products.from_factors.{product_type}'] = time_benchmark(
+            lambda: [Analysis.DKS_Product_Digraph(d1, d2, from_factors=True, product_type=product_type).king_count
+                     for d2 in factors], len(factors), repeat)
+
+    results['products.batch_evaluator'] = time_benchmark(
+        lambda: Analysis.DKS_Batch_Product_Evaluator(d1).evaluate(adjacencies), len(adjacencies), repeat)
+
+    return results
+
+
+def find_experiment_i_line(fixtures: dict) -> int:
+    """
+    :returns: the first line of the fixture of order EXPERIMENT_I_ORDER whose tournament the experiment accepts as its
+    i tournament (it has kings, but no emperor)
+    """
+    for line, adjacency in enumerate(np.concatenate(list(Util.tournament_batches(
+            fixtures['tournaments'][EXPERIMENT_I_ORDER]))), start=1):
+        tournament = Analysis.DKS_Digraph(Util.adjacency_to_digraph(adjacency), "T")
+
+        if len(tournament.digraph_kings) != 0 and not tournament.has_emperor:
+            return line
+
+    raise ValueError(f"find_experiment_i_line(): no fixture tournament of order {EXPERIMENT_I_ORDER} can be used as the "
+                     f"i tournament of the experiment.")
+
+
+def benchmark_experiment(fixtures: dict, directory: str | os.PathLike, repeat: int) -> dict:
+    """
+    times the throughput of the experiment, for each j order (the work of a worker, mmkvk_gen_result_part(), on every
+    tournament of the order), and for a whole run of min_max_k_val_kings_experiment() on the fixtures
+    :returns: dict of benchmark name -> timing (see time_benchmark())
+    """
+    results = dict()
+    i_line = find_experiment_i_line(fixtures)
+
+    # the experiment reads its tournaments from, and writes its results to, paths relative to the working directory
+    with contextlib.chdir(directory):
+        os.makedirs("experiment results", exist_ok=True)
+        i_tournament = Experiment_Functions.load_tournament(EXPERIMENT_I_ORDER, i_line)
+        i_tournament.get_walk_engine().run_to_period()
+
+        for spec_j_order in range(EXPERIMENT_I_ORDER, Experiment_Functions.MAX_TOURNAMENT_ORDER + 1):
+            results[f'experiment.j_order.{spec_j_order}'] = time_benchmark(
+                lambda: Experiment_Functions.mmkvk_gen_result_part(i_tournament, spec_j_order, 1,
+                                                                   FIXTURE_TOURNAMENT_COUNT + 1),
+                FIXTURE_TOURNAMENT_COUNT, repeat)
+
+        j_order_count = Experiment_Functions.MAX_TOURNAMENT_ORDER - EXPERIMENT_I_ORDER + 1
+
+        with contextlib.redirect_stdout(io.StringIO()):  # the experiment reports on its prefilters
+            results['experiment.full_run'] = time_benchmark(
+                lambda: Experiment_Functions.min_max_k_val_kings_experiment(EXPERIMENT_I_ORDER, i_line, worker_count=2,
+                                                                            chunk_size=32),
+                FIXTURE_TOURNAMENT_COUNT * j_order_count, repeat)
+
+    return results
+
+
+def run_benchmarks(output_file: str | os.PathLike | None = None, repeat: int = 3,
+                   fixture_directory: str | os.PathLike | None = None) -> dict:
+    """
+    runs every benchmark of the suite, with no analysis cache, or product store, in use (so nothing is looked up
+    rather than computed)
+    :param output_file: path of the JSON file the results are saved to, not saved if None
+    :param repeat: number of times each benchmark is run, the fastest run is kept
+    :param fixture_directory: directory the fixtures are generated in, a temporary directory (removed afterwards) if
+    None
+    :returns: dict of the 'metadata' of the run (versions, platform, time), and the 'benchmarks', a dict of benchmark
+    name -> timing (see time_benchmark())
+    """
+    results = {'metadata': {'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+                            'networkx': nx.__version__, 'numpy': np.__version__, 'platform': platform.platform(),
+                            'cpu_count': os.cpu_count(), 'repeat': repeat, 'seed': BENCHMARK_SEED},
+               'benchmarks': dict()}
+
+    default_cache = Analysis.get_default_cache()
+    default_product_store = Analysis.get_default_product_store()
+    Analysis.set_default_cache(None)
+    Analysis.set_default_product_store(None)
+
+    try:
+        with contextlib.ExitStack() as fixture_stack:
+            if fixture_directory is None:
+                fixture_directory = fixture_stack.enter_context(tempfile.TemporaryDirectory())
+
+            fixtures = make_fixtures(fixture_directory)
+
+            for benchmark_group in (benchmark_parsers, benchmark_analysis, benchmark_products):
+                results['benchmarks'].update(benchmark_group(fixtures, repeat))
+
+            results['benchmarks'].update(benchmark_experiment(fixtures, fixture_directory, repeat))
+    finally:
+        Analysis.set_default_cache(default_cache)
+        Analysis.set_default_product_store(default_product_store)
+
+    if output_file is not None:
+        save_results(results, output_file)
+
+    return results
+
+
+def save_results(results: dict, output_file: str | os.PathLike):
+    """
+    :param results: results of a run, as given by run_benchmarks()
+    :param output_file: path of the JSON file the results are saved to (its directory is made if needed)
+    """
+    if os.path.dirname(output_file) != "":
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    with open(output_file, 'w') as w_f:
+        json.dump(results, w_f, indent=2)
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[dict]:
+    """
+    :param results: results of a run, as given by run_benchmarks()
+    :param baseline: results of an earlier run, that the run is checked against
+    :param tolerance: fraction by which a benchmark may be slower than in the baseline, before it counts as a regression
+    :returns: list of the benchmarks (in both runs) that regressed, each a dict of its 'name', the 'baseline_seconds',
+    the 'seconds' of the run, and their 'ratio'
+    """
+    regressions = list()
+
+    for name, timing in results['benchmarks'].items():
+        baseline_timing = baseline['benchmarks'].get(name)
+
+        if baseline_timing is None or baseline_timing['seconds'] <= 0:
+            continue
+
+        ratio = timing['seconds'] / baseline_timing['seconds']
+
+        if ratio > 1 + tolerance:
+            regressions.append({'name': name, 'baseline_seconds': baseline_timing['seconds'],
+                                'seconds': timing['seconds'], 'ratio': ratio})
+
+    return regressions
+
+
+def print_results(results: dict, baseline: dict | None = None):
+    """
+    prints a table of the results of a run, along with the ratio of each time to its time in the baseline (if given)
+    """
+    for name, timing in results['benchmarks'].items():
+        baseline_timing = baseline['benchmarks'].get(name) if baseline is not None else None
+        ratio = f"x{timing['seconds'] / baseline_timing['seconds']:.2f}" if baseline_timing is not None else ""
+
+        print(f"{name:<40} {timing['seconds']:>10.4f} s {timing['items_per_second'] or 0:>12.1f} items/s  {ratio}")
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """
+    command line entry of the suite: runs it, saves the results, and checks them against the baseline; if there is no
+    baseline yet, the results are saved as the baseline
+    :returns: exit status, 1 if any benchmark regressed, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Benchmark suite of the DKS tools.")
+    parser.add_argument("--output", default=None, help="JSON file the results are saved to, default is "
+                                                       f"'{DEFAULT_RESULTS_DIRECTORY}/benchmark_<time>.json'")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_FILE, help="JSON file of the baseline results")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fraction by which a benchmark may be slower than the baseline")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each benchmark, the fastest is kept")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    arguments = parser.parse_args(arguments)
+
+    results = run_benchmarks(repeat=arguments.repeat)
+    output_file = arguments.output or f"{DEFAULT_RESULTS_DIRECTORY}/benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    save_results(results, output_file)
+
+    baseline = None
+    if os.path.exists(arguments.baseline) and not arguments.save_baseline:
+        with open(arguments.baseline, 'r') as r_f:
+            baseline = json.load(r_f)
+
+    print_results(results, baseline)
+    print(f"main(): results saved to '{output_file}'.")
+
+    if baseline is None:
+        save_results(results, arguments.baseline)
+        print(f"main(): results saved as the baseline, '{arguments.baseline}'.")
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, arguments.tolerance)
+
+    for regression in regressions:
+        print(f"main(): REGRESSION in {regression['name']}, {regression['seconds']:.4f} s against "
+              f"{regression['baseline_seconds']:.4f} s in the baseline (x{regression['ratio']:.2f}).")
+
+    if len(regressions) == 0:
+        print(f"main(): no benchmark is more than {arguments.tolerance:.0%} slower than the baseline.")
+
+    return 1 if len(regressions) != 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Caches for the results of the analysis of digraphs, so that the same digraph is never analyzed twice, be it within a run,
+or across runs; results are keyed by a fingerprint of the (labelled) digraph, so they only apply to the exact same
+vertices and arcs.
+
+For a broad overview, please refer to 'projectFiles/DOCUMENTATION.md';
+for more detailed information, please read through docstrings, and comments below.
+"""
+
+# library imports
+import networkx as nx
+import os                   # to notice when a cache has been carried into a new process
+import pickle               # records are stored on disk as pickled dicts
+import sqlite3              # on-disk tier of the cache
+import hashlib
+import time                 # for writing batches of records to disk at intervals
+from collections import OrderedDict
+
+
+def digraph_fingerprint(digraph: nx.DiGraph) -> str:
+    """
+    canonical fingerprint of the adjacency of a digraph: vertices and arcs are listed in sorted order, so the fingerprint
+    doesn't depend on the order networkx happens to hold them in
+    :param digraph: DiGraph object, from networkx.DiGraph
+    :returns: hex digest identifying the digraph
+    """
+    vertices = sorted(digraph.nodes, key=repr)  # sorting by repr works for any mix of vertex types
+    arcs = sorted(digraph.edges, key=repr)
+
+    return hashlib.sha256(repr((vertices, arcs)).encode()).hexdigest()
+
+
+class DKS_Analysis_Cache:
+    """
+    Two-tier cache of analysis records: a bounded in-memory LRU tier, in front of an (optional) on-disk sqlite tier;
+    a record is a dict holding whichever results of the analysis have been found so far (see DKS_Digraph)
+    """
+    table_name = "analysis"  # table of the sqlite file the records are kept in
+
+    def __init__(self, max_entries: int = 4096, db_path: str | os.PathLike | None = None, commit_interval: int = 256,
+                 commit_seconds: float = 5.0):
+        """
+        :param max_entries: max number of records held in memory, least recently used records are dropped first
+        :param db_path: path of the sqlite file of the on-disk tier, default is to keep records in memory only
+        :param commit_interval: max number of records whose new results are held back from the on-disk tier, they're
+        written together, in a single transaction (see flush()), so processes sharing the file don't queue on its write
+        lock for every record
+        :param commit_seconds: max number of seconds new results are held back from the on-disk tier (checked on put())
+        """
+        self.max_entries: int = max_entries
+        self.db_path = db_path
+        self.commit_interval: int = commit_interval
+        self.commit_seconds: float = commit_seconds
+        self._memory_tier: OrderedDict = OrderedDict()  # fingerprint -> record, most recently used last
+        self._pending: dict = dict()  # fingerprint -> results not yet written to the on-disk tier
+        self._last_flush_time: float = time.monotonic()
+
+        self._connection: sqlite3.Connection | None = None
+        self._connection_pid: int | None = None  # sqlite connections can't be shared with forked processes
+
+    def _get_connection(self) -> sqlite3.Connection | None:
+        """
+        :returns: connection to the on-disk tier (opened on first use, and again in every new process), None if there is
+        no on-disk tier
+        """
+        if self.db_path is None:
+            return None
+
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.db_path, timeout=60)
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table_name} "
+                                     f"(fingerprint TEXT PRIMARY KEY, record BLOB)")
+            self._connection.commit()
+            self._connection_pid = os.getpid()
+
+        return self._connection
+
+    def get(self, fingerprint: str) -> dict | None:
+        """
+        :param fingerprint: fingerprint of the digraph, as given by digraph_fingerprint()
+        :returns: the record of the digraph, or None if it isn't in either tier
+        """
+        record = self._memory_tier.get(fingerprint)
+
+        if record is not None:
+            self._memory_tier.move_to_end(fingerprint)
+            return record
+
+        connection = self._get_connection()
+
+        if connection is not None:
+            row = connection.execute(f"SELECT record FROM {self.table_name} WHERE fingerprint = ?",
+                                     (fingerprint,)).fetchone()
+
+            if row is not None:
+                record = pickle.loads(row[0])
+
+            # results not yet written to disk still belong to the record
+            if fingerprint in self._pending:
+                record = {**(record or {}), **self._pending[fingerprint]}
+
+            if record is not None:
+                self._remember(fingerprint, record)
+
+        return record
+
+    def put(self, fingerprint: str, results: dict):
+        """
+        adds results to the record of a digraph, results already in the record are kept unless given again
+        :param fingerprint: fingerprint of the digraph, as given by digraph_fingerprint()
+        :param results: dict of results to be added to the record
+        """
+        record = dict(self.get(fingerprint) or {})
+        record.update(results)
+        self._remember(fingerprint, record)
+
+        if self.db_path is None:
+            return
+
+        # only the new results are written, merged into the record on disk then, see flush()
+        self._pending.setdefault(fingerprint, dict()).update(results)
+
+        if (len(self._pending) >= self.commit_interval or
+                time.monotonic() - self._last_flush_time >= self.commit_seconds):
+            self.flush()
+
+    def flush(self):
+        """
+        writes the results held back by put() to the on-disk tier, in a single transaction; other processes may have
+        added results of their own to the same records meanwhile, so each record is read again, and the new results
+        merged into it, within the transaction, which holds the write lock of the file from the start (BEGIN IMMEDIATE),
+        so no other process can write between the read, and the write
+        """
+        self._last_flush_time = time.monotonic()
+        connection = self._get_connection()
+
+        if connection is None or len(self._pending) == 0:
+            return
+
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            for fingerprint, results in self._pending.items():
+                row = connection.execute(f"SELECT record FROM {self.table_name} WHERE fingerprint = ?",
+                                         (fingerprint,)).fetchone()
+                record = pickle.loads(row[0]) if row is not None else dict()
+                record.update(results)
+
+                connection.execute(f"INSERT OR REPLACE INTO {self.table_name} (fingerprint, record) VALUES (?, ?)",
+                                   (fingerprint, pickle.dumps(record)))
+
+                if fingerprint in self._memory_tier:
+                    self._memory_tier[fingerprint] = record  # with the results other processes added too
+
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+
+        self._pending = dict()
+
+    def _remember(self, fingerprint: str, record: dict):
+        """
+        places a record in the in-memory tier, dropping the least recently used record if the tier is full
+        """
+        self._memory_tier[fingerprint] = record
+        self._memory_tier.move_to_end(fingerprint)
+
+        while len(self._memory_tier) > self.max_entries:
+            self._memory_tier.popitem(last=False)
+
+    def close(self):
+        """
+        writes the results held back by put(), and closes the connection to the on-disk tier, if any (it's reopened if
+        the cache is used again)
+        """
+        self.flush()
+
+        if self._connection is not None and self._connection_pid == os.getpid():
+            self._connection.close()
+
+        self._connection = None
+
+    def __getstate__(self) -> dict:
+        # connections can't be pickled, a copy of the cache sent to another process opens its own
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_connection_pid'] = None
+        state['_pending'] = dict()  # written by this process, not by the copy
+        return state
+
+
+# products whose factors can't be swapped, D1[D2] and D2[D1] aren't isomorphic in general
+NON_COMMUTATIVE_PRODUCT_TYPES = ("lexicographic",)
+
+
+class DKS_Product_Store(DKS_Analysis_Cache):
+    """
+    Two-tier store of the king analysis of products, keyed by the type of product, and the unordered pair of factor
+    fingerprints; for the commutative products (direct, cartesian, strong), D1xD2 and D2xD1 are isomorphic through the
+    swap (u, v) -> (v, u), so a single record answers for both orders of the factors
+    """
+    table_name = "products"
+
+    @staticmethod
+    def get_pair_key(fingerprint1: str, fingerprint2: str, product_type: str = "direct") -> tuple[str, bool]:
+        """
+        :param fingerprint1: fingerprint of the first factor
+        :param fingerprint2: fingerprint of the second factor
+        :param product_type: type of the product (see Analysis.PRODUCT_TYPES), keys of direct products have no prefix,
+        so stores made before other types were supported still answer for them
+        :returns: tuple of the key of the pair, and whether the factors are in the opposite order to the one records of
+        the pair are kept in (records are kept with the smaller fingerprint first, unless the product isn't commutative,
+        in which case the pair is ordered, and never swapped)
+        """
+        is_swapped = fingerprint1 > fingerprint2 and product_type not in NON_COMMUTATIVE_PRODUCT_TYPES
+        pair_key = f"{fingerprint2}:{fingerprint1}" if is_swapped else f"{fingerprint1}:{fingerprint2}"
+
+        return (pair_key if product_type == "direct" else f"{product_type}:{pair_key}"), is_swapped
+
+    def get_product(self, fingerprint1: str, fingerprint2: str, product_type: str = "direct") -> dict | None:
+        """
+        :param fingerprint1: fingerprint of the first factor
+        :param fingerprint2: fingerprint of the second factor
+        :param product_type: type of the product (see Analysis.PRODUCT_TYPES)
+        :returns: summary of the product of the factors in the given order (see put_product()), or None if the pair
+        isn't in the store
+        """
+        pair_key, is_swapped = self.get_pair_key(fingerprint1, fingerprint2, product_type)
+        summary = self.get(pair_key)
+
+        return _swap_summary(summary) if summary is not None and is_swapped else summary
+
+    def put_product(self, fingerprint1: str, fingerprint2: str, summary: dict, product_type: str = "direct"):
+        """
+        :param fingerprint1: fingerprint of the first factor
+        :param fingerprint2: fingerprint of the second factor
+        :param summary: dict of 'min_k_val', 'max_k_val', 'king_count', 'min_k_val_kings', and 'max_k_val_kings' of the
+        product of the factors in the given order
+        :param product_type: type of the product (see Analysis.PRODUCT_TYPES)
+        """
+        pair_key, is_swapped = self.get_pair_key(fingerprint1, fingerprint2, product_type)
+        self.put(pair_key, _swap_summary(summary) if is_swapped else summary)
+
+
+def _swap_summary(summary: dict) -> dict:
+    """
+    remaps a product summary to the product with the factors the other way around, (u, v) -> (v, u)
+    """
+    swapped_summary = dict(summary)
+
+    for key in ('min_k_val_kings', 'max_k_val_kings'):
+        swapped_summary[key] = sorted((v, u) for u, v in summary[key])
+
+    return swapped_summary
@@ -2,151 +2,1596 @@
     file to house functions that run experiments, currently only has one experiment, but it's a pretty heavy one!
 """
 
-import os  # for file cleanup
-from multiprocessing import Process  # multiprocessing (needed for experiments running heavy workloads)
-from projectFiles.DKS_tools import Analysis, Util
+import os  # for file paths, core count, and syncing results to disk
+import sys
+import argparse  # for running (shards of) experiments from the command line
+import contextlib  # for closing the shared corpora of experiments
+import json  # for the result streams, and progress journals of experiments
+import hashlib  # for naming the results of experiments on a query
+import time  # for the timers, and progress reports of experiments
+import datetime
+import shutil
+import cProfile  # for the (optional) profiling of the workers of experiments
+import pstats
+import queue  # for polling the results of the workers of experiments
+import networkx as nx
+import numpy as np
+from multiprocessing import Pool, Queue  # multiprocessing (needed for experiments running heavy workloads)
+from multiprocessing import active_children  # for noticing workers of experiments that died
+from typing import TextIO
+from projectFiles.DKS_tools import Analysis, Util, Index
 
-file_line_count = [3, 5, 13, 57, 457, 6881, 191537, 9733057]  # TODO: move to external file for tidier look...
+
+def tournament_file(order: int) -> str:
+    """
+    :param order: order of the tournaments sought
+    :returns: path of the file of all tournaments of the given order, the packed .dkst file is preferred if it has been
+    made (see Util.pack_mckay_txt()), otherwise the McKay .txt file
+    """
+    packed_file = f"digraph_datasets/t_files/tourn{order}.dkst"
+
+    return packed_file if os.path.exists(packed_file) else f"digraph_datasets/t_files/tourn{order}.txt"
+
+
+def feature_index_file(order: int) -> str:
+    """
+    :param order: order of the tournaments sought
+    :returns: path of the feature index of all tournaments of the given order (see Index.build_feature_index())
+    """
+    return f"digraph_datasets/t_files/tourn{order}.dksi"
+
+
+_feature_indexes = dict()  # feature indexes opened by this process, by order, see mmkvk_feature_index()
+
+
+def load_tournament(order: int, line: int) -> Analysis.DKS_Digraph:
+    """
+    :param order: order of the tournament, (corresponds to a specific file in t_files)
+    :param line: the specific line of the tournament in its file, non-zero indexed
+    :returns: the tournament as a DKS_Digraph named 'T{order}_{line}', it has order zero if the line doesn't exist
+    """
+    batches = list(Util.tournament_batches(tournament_file(order), 1, line, line + 1))  # a single batch, if any
+    digraph = Util.adjacency_to_digraph(batches[0][0]) if len(batches) != 0 else nx.DiGraph()
+
+    return Analysis.DKS_Digraph(digraph, f"T{order}_{line}")
+
+
+MAX_TOURNAMENT_ORDER = 10  # highest order of tournament files in t_files, j orders run up to (and including) this one
+DEFAULT_CHUNK_SIZE = 512  # number of j tournaments in a chunk of work handed to a worker of the experiment
+DEFAULT_PAIR_BLOCK_SIZE = 64  # number of i tournaments in a chunk of work of the all-pairs experiment
+PAIR_ANALYSIS_BATCH_SIZE = 65536  # tournaments analysed at once before the all-pairs experiment starts
+RESULT_QUEUE_SIZE_PER_WORKER = 4  # max number of finished chunks per worker waiting on the writer of the experiment
+RESULT_POLL_INTERVAL = 5.0  # seconds the writer of the experiment waits on results before checking on the pool
+DEFAULT_PROGRESS_INTERVAL = 30.0  # seconds between the progress reports of the experiment
+PROFILE_REPORT_LINES = 25  # number of functions listed in the profiling report of the experiment
+
+
+class DKS_Experiment_Metrics:
+    """
+    Timers, and counters of the hot path of an experiment; phases are timed a whole batch of tournaments at a time
+    (never a single product), so keeping them costs next to nothing, and metrics of chunks are merged by adding them up
+    """
+    def __init__(self, metrics: dict | None = None):
+        """
+        :param metrics: metrics to start from, as given by to_dict(), default is none at all
+        """
+        self.seconds: dict = dict()  # phase -> seconds spent in it
+        self.counts: dict = dict()  # counter -> count
+
+        if metrics is not None:
+            self.merge(metrics)
+
+    @contextlib.contextmanager
+    def timer(self, phase: str):
+        """
+        context manager that adds the time spent inside of it to a phase
+        :param phase: name of the phase
+        """
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + time.perf_counter() - start_time
+
+    def count(self, counter: str, amount: int = 1):
+        """
+        :param counter: name of the counter
+        :param amount: amount added to the counter
+        """
+        self.counts[counter] = self.counts.get(counter, 0) + amount
+
+    def merge(self, metrics: dict):
+        """
+        adds metrics (e.g. those of a chunk) to these
+        :param metrics: metrics, as given by to_dict()
+        """
+        for phase, seconds in metrics['seconds'].items():
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+        for counter, count in metrics['counts'].items():
+            self.count(counter, count)
+
+    def to_dict(self) -> dict:
+        """
+        :returns: dict of the 'seconds' of each phase, and the 'counts' of each counter, that can be written as JSON
+        """
+        return {'seconds': dict(self.seconds), 'counts': dict(self.counts)}
+
+
+_worker_i_tournament = None  # the i tournament of the experiment, set once in each worker by mmkvk_init_worker()
+_worker_result_queue = None  # queue the workers hand the results of their chunks to the writer through
+_worker_j_corpora = None  # shared j tournament corpora of the experiment, by order, attached to once in each worker
+_worker_prefilters = Analysis.DEFAULT_PREFILTERS  # prefilters the products of the experiment are run through
+_worker_profile_directory = None  # directory the profile of each chunk is saved to, None when not profiling
+_worker_pair_factors = None  # (i block, its factors) last built by the worker, see mmkvk_pair_factors()
+_worker_pair_analyses = None  # shared analyses of the tournaments of the all-pairs experiment, by order
+_pair_blocks = dict()  # blocks read from the shared analyses by this process, see mmkvk_pair_blocks()
+_worker_query = None  # conditions on the feature index the tournaments of the experiment are selected by, if any
+
+
+def mmkvk_init_worker(i_tournament: Analysis.DKS_Digraph | None, result_queue: Queue,
+                      j_corpora: dict[int, Util.DKS_Shared_Tournaments] | None = None,
+                      prefilters: tuple = Analysis.DEFAULT_PREFILTERS, profile_directory: str | None = None,
+                      query: dict | None = None, pair_analyses: dict[int, Util.DKS_Shared_Arrays] | None = None):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        initializer of each worker of the pool, the i tournament, the queue of results, and the j corpora are handed to
+        every worker once, rather than with every chunk of work
+        :param i_tournament: the tournament that is crossed with all other j tournaments, None for the workers of the
+        all-pairs experiment, whose chunks are pairs of blocks (see mmkvk_pair_chunks())
+        :param result_queue: bounded queue the results of chunks are put on, for the writer of the experiment
+        :param j_corpora: dict of j order -> the shared corpus of the tournaments of that order (only the names of the
+        shared blocks are handed over, the worker attaches to them), if None, j tournaments are read from their files
+        :param prefilters: prefilters the products are run through before they're evaluated (see
+        Analysis.DKS_Prefilter_Pipeline)
+        :param profile_directory: directory the profile of each chunk is saved to, None to not profile the chunks
+        :param query: conditions on the feature index the j tournaments (and, in the all-pairs experiment, the i
+        tournaments) are selected by, None to select all of them
+        :param pair_analyses: dict of order -> the shared analysis of the tournaments of that order (see
+        mmkvk_pair_analysis()), for the workers of the all-pairs experiment, None for the others
+    """
+    global _worker_i_tournament, _worker_result_queue, _worker_j_corpora, _worker_prefilters, _worker_profile_directory
+    global _worker_query, _worker_pair_analyses
+    _worker_i_tournament = i_tournament
+    _worker_result_queue = result_queue
+    _worker_j_corpora = j_corpora if j_corpora is not None else dict()
+    _worker_prefilters = prefilters
+    _worker_profile_directory = profile_directory
+    _worker_query = query
+    _worker_pair_analyses = pair_analyses
+
+
+def mmkvk_line_counts(specified_order: int, max_order: int = MAX_TOURNAMENT_ORDER) -> dict[int, int]:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param specified_order: the order of the i tournament, i.e. the first j order
+        :param max_order: the last j order
+        :returns: dict of j order -> number of tournaments in its file, for every j order of the experiment
+    """
+    return {spec_j_order: Util.tournament_count(tournament_file(spec_j_order))
+            for spec_j_order in range(specified_order, max_order + 1)}
+
+
+def mmkvk_chunks(specified_order: int, chunk_size: int = DEFAULT_CHUNK_SIZE, line_counts: dict[int, int] | None = None):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        splits the lines of the files of every j order (from specified_order up to MAX_TOURNAMENT_ORDER) into chunks of
+        consecutive lines, in the order in which their results are written
+        :param specified_order: the order of the i tournament, i.e. the first j order
+        :param chunk_size: max number of lines in a chunk
+        :param line_counts: dict of j order -> number of tournaments in its file (see mmkvk_line_counts()), default is
+        counting them in the files; the chunks only depend on these counts, and the chunk size
+        :returns: generator of (j order, start line, stop line) tuples, lines are non-zero indexed, stop is exclusive
+    """
+    if line_counts is None:
+        line_counts = mmkvk_line_counts(specified_order)
+
+    for spec_j_order in range(specified_order, MAX_TOURNAMENT_ORDER + 1):
+        line_count = line_counts[spec_j_order]
+
+        # an order without any tournaments still gets an (empty) chunk, so that its section is written
+        for start_line in range(1, max(line_count, 1) + 1, chunk_size):
+            yield spec_j_order, start_line, min(start_line + chunk_size, line_count + 1)
+
+
+def mmkvk_pair_chunks(min_order: int, max_order: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      pair_block_size: int = DEFAULT_PAIR_BLOCK_SIZE, line_counts: dict[int, int] | None = None):
+    """
+        *** Specific to all_pairs_min_max_k_val_kings_experiment() function ***
+
+        splits the unordered pairs of tournaments of orders min_order to max_order into chunks, each a block of (at most
+        pair_block_size) i tournaments, and a block of (at most chunk_size) j tournaments, with the i tournament of every
+        pair coming first (in order, then line), so every unordered pair is in exactly one chunk, and each tournament is
+        paired with itself once; chunks of the same i block are consecutive, in the order their results are written
+        :param min_order: the lowest order of tournament
+        :param max_order: the highest order of tournament
+        :param chunk_size: max number of j tournaments in a chunk
+        :param pair_block_size: max number of i tournaments in a chunk
+        :param line_counts: dict of order -> number of tournaments in its file, default is counting them in the files
+        :returns: generator of (i order, i start line, i stop line, j order, j start line, j stop line) tuples, lines are
+        non-zero indexed, stops are exclusive
+    """
+    if line_counts is None:
+        line_counts = mmkvk_line_counts(min_order, max_order)
+
+    for i_order in range(min_order, max_order + 1):
+        for i_start in range(1, line_counts[i_order] + 1, pair_block_size):
+            i_stop = min(i_start + pair_block_size, line_counts[i_order] + 1)
+
+            for j_order in range(i_order, max_order + 1):
+                # within an order, the j tournaments of the block start from its first i tournament
+                for j_start in range(i_start if j_order == i_order else 1, line_counts[j_order] + 1, chunk_size):
+                    yield i_order, i_start, i_stop, j_order, j_start, min(j_start + chunk_size, line_counts[j_order] + 1)
+
+
+def mmkvk_chunk_product_count(chunk: tuple) -> int:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param chunk: chunk as given by mmkvk_chunks(), or mmkvk_pair_chunks()
+        :returns: number of products in the chunk
+    """
+    if len(chunk) == 3:
+        _, start_line, stop_line = chunk
+        return stop_line - start_line
+
+    i_order, i_start, i_stop, j_order, j_start, j_stop = chunk
+
+    if i_order != j_order:
+        return (i_stop - i_start) * (j_stop - j_start)
+
+    # within an order, an i tournament is only paired with the j tournaments from its own line on
+    return sum(max(j_stop - max(j_start, i_line), 0) for i_line in range(i_start, i_stop))
+
+
+def mmkvk_chunk_label(chunk: tuple) -> str:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param chunk: chunk as given by mmkvk_chunks(), or mmkvk_pair_chunks()
+        :returns: the orders of the chunk, as they're named in progress reports
+    """
+    return f"T{chunk[0]}" if len(chunk) == 3 else f"T{chunk[0]} x T{chunk[3]}"
+
+
+def mmkvk_shard_chunk_indices(chunk_count: int, shard: tuple[int, int]) -> list[int]:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        the chunks of shard k of N are every N-th chunk, starting from chunk k - 1, so every shard gets about as many
+        chunks of every j order as the others (products of higher orders take longer, so handing each shard a block of
+        consecutive chunks would leave the last shards with most of the work)
+        :param chunk_count: number of chunks of the whole experiment
+        :param shard: (k, N) tuple, shard k of N, shards are numbered from 1
+        :returns: indices of the chunks of the shard, in the list of chunks of the whole experiment (see mmkvk_chunks())
+    """
+    shard_index, shard_count = shard
+
+    return list(range(shard_index - 1, chunk_count, shard_count))
+
+
+def mmkvk_write_file(specified_order: int, specified_line: int, j_query: dict | None = None) -> str:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param specified_order: the order of the i tournament
+        :param specified_line: the line of the i tournament in its file
+        :param j_query: conditions on the feature index the j tournaments are selected by, if any
+        :returns: path of the results of the experiment, without an extension
+    """
+    write_file = f"experiment results/experiment_results_[T{specified_order}_{specified_line}]]"
+
+    return write_file if j_query is None else mmkvk_query_file(write_file, j_query)
+
+
+def mmkvk_query_file(write_file: str, query: dict) -> str:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param write_file: path of the results of the experiment on every tournament, without an extension
+        :param query: conditions on the feature index the tournaments are selected by
+        :returns: path of the results of the experiment on the tournaments the query selects, without an extension, it's
+        named after a digest of the conditions, so the results of different queries are kept apart
+    """
+    query_digest = hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()[:12]
+
+    return f"{write_file}.query_{query_digest}"
+
+
+def mmkvk_shard_file(write_file: str, shard: tuple[int, int]) -> str:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param write_file: path of the results of the whole experiment, without an extension
+        :param shard: (k, N) tuple, shard k of N
+        :returns: path of the results of the shard, without an extension
+    """
+    return f"{write_file}.shard_{shard[0]}_of_{shard[1]}"
 
 
-def mmkvk_gen_result_part(i_tournament: Analysis.DKS_Digraph, spec_j_order, start_line, file_to_write_to):
+def mmkvk_run_chunk(chunk_index: int, chunk: tuple[int, int, int]):
     """
         *** Specific to min_max_k_val_kings_experiment() function ***
 
-        generates a part of the total resulting experiment file for a given order of a j tournament, is run on
-        multiple threads concurrently, less efficient on lower j orders, but on higher orders, it cuts processing time
-        down by 1/2... if you have a beefier computer, you may be able to bump the core count up!
+        runs mmkvk_gen_result_part() (or mmkvk_gen_pair_result_part(), in the all-pairs experiment) on a chunk of work
+        in a worker of the pool, and puts its results (along with its metrics) on the queue of results (blocking while
+        the queue is full), an error is put on the queue in place of the results, so the writer doesn't wait on them
+        forever; when profiling, the chunk is run under cProfile, and its profile saved to the profile directory
+        :param chunk_index: index of the chunk, in the order the chunks are written in
+        :param chunk: (j order, start line, stop line) tuple, as given by mmkvk_chunks(), or a chunk of pairs, as given
+        by mmkvk_pair_chunks()
+    """
+    profiler = cProfile.Profile() if _worker_profile_directory is not None else None
+
+    try:
+        if profiler is not None:
+            profiler.enable()
+
+        if _worker_i_tournament is not None:
+            results = mmkvk_gen_result_part(_worker_i_tournament, *chunk, j_corpus=_worker_j_corpora.get(chunk[0]),
+                                            prefilters=_worker_prefilters, j_query=_worker_query)
+        else:
+            results = mmkvk_gen_pair_result_part(*chunk, analyses=_worker_pair_analyses, prefilters=_worker_prefilters,
+                                                 query=_worker_query)
+    except Exception as error:
+        results = error
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(_worker_profile_directory, f"chunk_{chunk_index}.prof"))
+
+    _worker_result_queue.put((chunk_index, results))
+
+
+def mmkvk_feature_index(order: int) -> Index.DKS_Feature_Index:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param order: order of the tournaments of the index
+        :returns: the feature index of the tournaments of the order, opened once in each process, and kept open (it's
+        memory-mapped, so this costs next to nothing)
+    """
+    if order not in _feature_indexes:
+        _feature_indexes[order] = Index.DKS_Feature_Index(feature_index_file(order))
+
+    return _feature_indexes[order]
+
+
+def mmkvk_query_selection(order: int, start_line: int, line_count: int, query: dict,
+                          metrics: DKS_Experiment_Metrics) -> np.ndarray:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        selects the tournaments of a range of lines that meet the conditions of a query, from the feature index of their
+        order, the others are counted as tournaments skipped by the 'query' (as though it were a prefilter)
+        :param order: order of the tournaments
+        :param start_line: the first line of the range
+        :param line_count: number of lines in the range
+        :param query: conditions on the feature index (see Index.DKS_Feature_Index.select())
+        :param metrics: metrics of the chunk, the tournaments that aren't selected are added to its 'tournaments', and
+        'skipped.query' counters
+        :returns: indices (from 0, within the range) of the selected tournaments
+    """
+    selected = np.flatnonzero(mmkvk_feature_index(order).select(start_line, start_line + line_count, **query))
+
+    metrics.count('tournaments', line_count - len(selected))
+    metrics.count('skipped.query', line_count - len(selected))
+
+    return selected
+
+
+def mmkvk_check_query(query: dict, orders: list[int]):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        checks the query of an experiment against the feature index of every order it's run on (before any work is
+        handed out), and prints the number of tournaments it selects from each
+        :param query: conditions on the feature index (see Index.DKS_Feature_Index.select())
+        :param orders: orders of the tournaments the query selects from
+    """
+    for order in orders:
+        if not os.path.exists(feature_index_file(order)):
+            raise FileNotFoundError(f"mmkvk_check_query(): there is no feature index of the tournaments of order "
+                                    f"{order}, '{feature_index_file(order)}', build it with "
+                                    f"Index.build_feature_index().")
+
+        with Index.DKS_Feature_Index(feature_index_file(order)) as feature_index:
+            selected_count = len(feature_index.query(**query))  # raises ValueError for an unknown column
+
+        print(f"min_max_k_val_kings_experiment(): the query selects {selected_count} of {len(feature_index)} "
+              f"tournaments of order {order}")
+
+
+def mmkvk_gen_result_part(i_tournament: Analysis.DKS_Digraph, spec_j_order: int, start_line: int, stop_line: int,
+                          j_corpus: Util.DKS_Packed_Tournaments | None = None,
+                          prefilters: tuple = Analysis.DEFAULT_PREFILTERS,
+                          j_query: dict | None = None) -> tuple[list[dict], dict]:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        generates a part of the results of the experiment, for a range of lines of the file of a given order of j
+        tournament; many of these are run concurrently by the workers of the experiment, one per chunk of work
         :param i_tournament: the tournament that is crossed with all other j tournaments
         :param spec_j_order: the order of the tournaments that i_tournament is crossed with
         :param start_line: the starting line in the file of the order of j
-        :param file_to_write_to: the name of the file that is to be written to for this quarter
-        :returns: nothing, but will write a part of the results to the experiments results directory
+        :param stop_line: the line in the file of the order of j to stop at (exclusive)
+        :param j_corpus: the (packed, or shared) corpus of the tournaments of the order of j, read in place of their file
+        :param prefilters: prefilters the products are run through before they're evaluated (see
+        Analysis.DKS_Prefilter_Pipeline)
+        :param j_query: conditions on the feature index of the order of j, only the j tournaments that meet them are
+        crossed with the i_tournament (see mmkvk_query_selection()), None to cross all of them
+        :returns: tuple of the list of result records (see mmkvk_result_record()), one per j tournament whose product
+        with the i_tournament has kings, in the order of the lines, and the metrics of the chunk (see
+        DKS_Experiment_Metrics.to_dict()); the phases timed are 'parse' (decoding the j tournaments), 'prefilter' (the
+        invariants of the j tournaments, and the prefilters), 'evaluate' (the king analysis of the products), and
+        'record' (making the result records), and the counters are 'tournaments', 'skipped.<prefilter>', 'kingless'
+        (products that were evaluated, and have no kings), and 'results'
     """
-    with open(file_to_write_to, "w") as w_f:
-        formatted_output = ""
+    results = list()
+    metrics = DKS_Experiment_Metrics()
 
-        for j in range(start_line, file_line_count[spec_j_order - 3], 4):  # TODO: last value is '<LINE_JUMP>'
-            j_tournament_name = f"T{spec_j_order}_{j}"
-            j_tournament = Analysis.DKS_Digraph(Util.mckay_txt_parser(f"digraph_datasets/t_files/tourn{spec_j_order}.txt", j),
-                                  j_tournament_name)
+    # j tournaments are streamed from the corpus (or file) in decoded batches, rather than parsed one line at a time
+    if j_corpus is not None:
+        j_lines = range(start_line, min(stop_line, len(j_corpus) + 1))
+        j_batches = j_corpus.batches(start=j_lines.start, stop=j_lines.stop)
+    else:
+        j_file = tournament_file(spec_j_order)
+        j_lines = range(start_line, min(stop_line, Util.tournament_count(j_file) + 1))
+        j_batches = Util.tournament_batches(j_file, start=j_lines.start, stop=j_lines.stop)
 
-            if len(j_tournament.digraph_kings) == 0 or j_tournament.has_emperor:
-                continue
+    '''
+    the products of the i tournament with a whole batch of j tournaments are evaluated at once, from the adjacency 
+    matrices of the batch (see Analysis.DKS_Batch_Product_Evaluator), no DKS_Digraph is built for any j tournament;
+    each batch is first run through the prefilters, which rule out products that can't have kings from cheap 
+    invariants of the factors (a j tournament with an emperor has a vertex nothing beats, so its products are ruled 
+    out by the 'source' prefilter, as before), only the products that are left are evaluated
+    '''
+    evaluator = Analysis.DKS_Batch_Product_Evaluator(i_tournament)
+    pipeline = Analysis.DKS_Prefilter_Pipeline(i_tournament, prefilters)
+    batch_start = j_lines.start
+
+    j_batches = iter(j_batches)
+
+    while True:
+        with metrics.timer('parse'):
+            j_batch = next(j_batches, None)
+
+        if j_batch is None:
+            break
+
+        with metrics.timer('prefilter'):
+            if j_query is None:
+                j_candidates = pipeline.apply(j_batch)
+            else:
+                j_selected = mmkvk_query_selection(spec_j_order, batch_start, len(j_batch), j_query, metrics)
+                j_candidates = j_selected[pipeline.apply(j_batch[j_selected])]
+
+        with metrics.timer('evaluate'):
+            summaries = evaluator.evaluate(j_batch[j_candidates])
+
+        with metrics.timer('record'):
+            for j_index, summary in zip(j_candidates.tolist(), summaries):
+                if summary is None:  # the product has no kings
+                    metrics.count('kingless')
+                    continue
+
+                results.append(mmkvk_result_record(i_tournament.name, spec_j_order, batch_start + j_index, summary))
+
+        batch_start += len(j_batch)
+
+    metrics.count('tournaments', pipeline.candidate_count)
+    metrics.count('results', len(results))
+
+    for name, count in pipeline.skip_counts.items():
+        metrics.count(f'skipped.{name}', count)
+
+    return results, metrics.to_dict()
+
+
+def mmkvk_pair_analysis(order: int) -> Util.DKS_Shared_Arrays:
+    """
+        *** Specific to all_pairs_min_max_k_val_kings_experiment() function ***
+
+        analyses every tournament of an order once, before any work is handed out, into a shared memory block that the
+        workers attach to: the invariants the prefilters work on, the kings, and k_vals the i factors are built from,
+        and the walk matrices of every walk length (see Analysis.DKS_Block_Walks.run_to_period()) both the evaluators of
+        the i factors, and the j blocks they're crossed with, work on; a tournament takes part in the chunks of many
+        blocks, as an i, and as a j tournament, none of which analyse it again
+        :param order: the order of the tournaments
+        :returns: a shared block of the arrays 'adjacencies', 'reachability', 'periods', 'k_vals', 'walk_rows',
+        'walk_index', and 'walk_period', of every tournament of the order (in the order of the lines), as the arrays of
+        Analysis.DKS_Block_Invariants, and Analysis.DKS_Block_Walks
+    """
+    block_analyses = list()
+
+    for adjacencies in Util.tournament_batches(tournament_file(order), PAIR_ANALYSIS_BATCH_SIZE):
+        block_invariants = Analysis.DKS_Block_Invariants(adjacencies)
+        block_invariants.compute()
+
+        block_walks = Analysis.DKS_Block_Walks(adjacencies)
+        block_walks.run_to_period()
+
+        block_analyses.append((block_invariants, block_walks))
+
+    tournament_count = sum(len(block_invariants.adjacencies) for block_invariants, _ in block_analyses)
+    length_count = max((block_walks.get_walk_rows().shape[1] for _, block_walks in block_analyses), default=1)
+
+    pair_analysis = Util.DKS_Shared_Arrays({
+        'adjacencies': ((tournament_count, order, order), 'bool'),
+        'reachability': ((tournament_count, order, order), 'bool'),
+        'periods': ((tournament_count,), 'int64'),
+        'k_vals': ((tournament_count, order), 'int64'),
+        'walk_rows': ((tournament_count, length_count, order, 1), 'uint64'),
+        'walk_index': ((tournament_count,), 'int64'),
+        'walk_period': ((tournament_count,), 'int64')})
+
+    first_index = 0
+
+    for block_invariants, block_walks in block_analyses:
+        stop_index = first_index + len(block_invariants.adjacencies)
+
+        pair_analysis['adjacencies'][first_index:stop_index] = block_invariants.adjacencies
+        pair_analysis['reachability'][first_index:stop_index] = block_invariants.get_reachability()
+        pair_analysis['periods'][first_index:stop_index] = block_invariants.get_periods()
+        pair_analysis['k_vals'][first_index:stop_index] = block_invariants.get_k_vals()
+        pair_analysis['walk_index'][first_index:stop_index] = block_walks.index
+        pair_analysis['walk_period'][first_index:stop_index] = block_walks.period
+
+        # each batch only holds the walk lengths up to its own longest period, the rest are read off of the periods
+        for walk_length in range(length_count):
+            pair_analysis['walk_rows'][first_index:stop_index, walk_length] = block_walks.get_packed_rows(walk_length)
+
+        first_index = stop_index
+
+    return pair_analysis
+
+
+def mmkvk_pair_blocks(order: int, analyses: dict[int, Util.DKS_Shared_Arrays]) -> tuple:
+    """
+        *** Specific to all_pairs_min_max_k_val_kings_experiment() function ***
+
+        :param order: the order of the tournaments
+        :param analyses: dict of order -> the shared analysis of the tournaments of that order (see
+        mmkvk_pair_analysis())
+        :returns: tuple of the Analysis.DKS_Block_Invariants, and Analysis.DKS_Block_Walks of every tournament of the
+        order, read from its shared analysis once in each process, without copying (or computing) anything; the blocks
+        of the chunks are selected from these
+    """
+    pair_analysis = analyses[order]
+
+    if pair_analysis.name not in _pair_blocks:
+        _pair_blocks[pair_analysis.name] = (
+            Analysis.DKS_Block_Invariants.from_arrays(pair_analysis['adjacencies'], pair_analysis['reachability'],
+                                                      pair_analysis['periods'], pair_analysis['k_vals']),
+            Analysis.DKS_Block_Walks.from_arrays(pair_analysis['adjacencies'], pair_analysis['walk_rows'],
+                                                 pair_analysis['walk_index'], pair_analysis['walk_period']))
+
+    return _pair_blocks[pair_analysis.name]
+
+
+def mmkvk_pair_factors(i_order: int, i_start: int, i_stop: int, analyses: dict[int, Util.DKS_Shared_Arrays],
+                       metrics: DKS_Experiment_Metrics, query: dict | None = None) -> list[tuple]:
+    """
+        *** Specific to all_pairs_min_max_k_val_kings_experiment() function ***
+
+        gives the factor data of every i tournament of a block: its DKS_Digraph (kings, and k_vals), and its batch
+        evaluator (which holds all of its walk matrices), both built from the shared analysis of the tournaments (see
+        Analysis.DKS_Digraph.from_block()), so nothing is found again; the factors of the last block are kept by the
+        worker, and the chunks of a block are handed out one after the other, so a worker mostly builds the factors of
+        a block once, rather than once for every chunk of j tournaments it is paired with
+        :param i_order: the order of the i tournaments
+        :param i_start: the line of the first i tournament of the block
+        :param i_stop: the line after the last i tournament of the block
+        :param analyses: dict of order -> the shared analysis of the tournaments of that order (see
+        mmkvk_pair_analysis())
+        :param metrics: metrics of the chunk, the time spent building the factors is added to its 'factors' phase, and
+        the number of factors built to its 'factors' counter
+        :param query: conditions on the feature index, no factors are built for the i tournaments that don't meet them
+        :returns: list of (i line, DKS_Digraph, DKS_Batch_Product_Evaluator) tuples, in the order of the lines, the
+        DKS_Digraph, and evaluator, are None for i tournaments the query doesn't select
+    """
+    global _worker_pair_factors
+    i_block = (i_order, i_start, i_stop)
+
+    if _worker_pair_factors is None or _worker_pair_factors[0] != i_block:
+        with metrics.timer('factors'):
+            i_factors = list()
+            i_selected = mmkvk_feature_index(i_order).select(i_start, i_stop, **query) if query is not None else None
+            i_block_invariants, i_block_walks = mmkvk_pair_blocks(i_order, analyses)
+
+            for i_line in range(i_start, i_stop):
+                if i_selected is not None and not i_selected[i_line - i_start]:
+                    i_factors.append((i_line, None, None))
+                    continue
+
+                i_tournament = Analysis.DKS_Digraph.from_block(i_block_invariants, i_line - 1, f"T{i_order}_{i_line}",
+                                                               i_block_walks)
+                i_factors.append((i_line, i_tournament, Analysis.DKS_Batch_Product_Evaluator(i_tournament)))
+
+        metrics.count('factors', sum(i_tournament is not None for _, i_tournament, _ in i_factors))
+        _worker_pair_factors = (i_block, i_factors)
+
+    return _worker_pair_factors[1]
+
+
+def mmkvk_gen_pair_result_part(i_order: int, i_start: int, i_stop: int, j_order: int, j_start: int, j_stop: int,
+                               analyses: dict[int, Util.DKS_Shared_Arrays],
+                               prefilters: tuple = Analysis.DEFAULT_PREFILTERS,
+                               query: dict | None = None) -> tuple[list[dict], dict]:
+    """
+        *** Specific to all_pairs_min_max_k_val_kings_experiment() function ***
+
+        generates the results of a chunk of pairs of the all-pairs experiment, every i tournament of a block crossed
+        with every j tournament of another block (within an order, only with those from its own line on); many of these
+        are run concurrently by the workers of the experiment, one per chunk
+        :param i_order: the order of the i tournaments
+        :param i_start: the line of the first i tournament of the block
+        :param i_stop: the line after the last i tournament of the block
+        :param j_order: the order of the j tournaments
+        :param j_start: the line of the first j tournament of the block
+        :param j_stop: the line after the last j tournament of the block
+        :param analyses: dict of order -> the shared analysis of the tournaments of that order (see
+        mmkvk_pair_analysis())
+        :param prefilters: prefilters the products are run through before they're evaluated
+        :param query: conditions on the feature index, only pairs of tournaments that both meet them are crossed, None
+        to cross every pair
+        :returns: tuple of the list of result records (see mmkvk_pair_record()), one per pair whose product has kings, in
+        the order of the i tournaments, then the j tournaments, and the metrics of the chunk (the same as those of
+        mmkvk_gen_result_part(), along with the 'factors' phase, and counter, see mmkvk_pair_factors())
+    """
+    results = list()
+    metrics = DKS_Experiment_Metrics()
+
+    i_factors = mmkvk_pair_factors(i_order, i_start, i_stop, analyses, metrics, query)
+
+    '''
+    whatever is known of the j tournaments alone was found once, before the experiment started (see
+    mmkvk_pair_analysis()), the block only selects it, and shares it with every i tournament it's crossed with: the 
+    invariants the prefilters work on, and the walk matrices the batch evaluators work on
+    '''
+    j_order_invariants, j_order_walks = mmkvk_pair_blocks(j_order, analyses)
+    j_block_invariants = j_order_invariants.select(slice(j_start - 1, j_stop - 1))
+    j_block_walks = j_order_walks.select(slice(j_start - 1, j_stop - 1))
+    j_block = j_block_invariants.adjacencies
+
+    if len(j_block) == 0:
+        return results, metrics.to_dict()
+
+    j_selected = None
+
+    if query is not None:
+        with metrics.timer('prefilter'):
+            j_selected = np.flatnonzero(mmkvk_feature_index(j_order).select(j_start, j_start + len(j_block), **query))
+
+    for i_line, i_tournament, evaluator in i_factors:
+        # UNORDERED PAIRS ONLY, within an order, an i tournament is crossed with the j tournaments from its own line on
+        first_j_index = max(i_line - j_start, 0) if j_order == i_order else 0
+
+        if first_j_index >= len(j_block):
+            continue
+
+        # the pairs of an i tournament the query doesn't select are counted as skipped by the query, as are those of j
+        # tournaments it doesn't select
+        if i_tournament is None:
+            metrics.count('tournaments', len(j_block) - first_j_index)
+            metrics.count('skipped.query', len(j_block) - first_j_index)
+            continue
+
+        pipeline = Analysis.DKS_Prefilter_Pipeline(i_tournament, prefilters)
+
+        with metrics.timer('prefilter'):
+            if j_selected is not None:
+                j_indices = j_selected[j_selected >= first_j_index]
+                metrics.count('tournaments', len(j_block) - first_j_index - len(j_indices))
+                metrics.count('skipped.query', len(j_block) - first_j_index - len(j_indices))
+
+                j_candidates = j_indices[pipeline.apply(j_block[j_indices], j_block_invariants.select(j_indices))]
+            elif first_j_index == 0:
+                j_candidates = pipeline.apply(j_block, j_block_invariants)
+            else:
+                j_candidates = pipeline.apply(j_block[first_j_index:],
+                                              j_block_invariants.select(slice(first_j_index, None))) + first_j_index
+
+        with metrics.timer('evaluate'):
+            summaries = evaluator.evaluate(j_block[j_candidates], block_walks=j_block_walks, block_indices=j_candidates)
+
+        with metrics.timer('record'):
+            for j_index, summary in zip(j_candidates.tolist(), summaries):
+                if summary is None:  # the product has no kings
+                    metrics.count('kingless')
+                    continue
+
+                results.append(mmkvk_pair_record(i_order, i_line, j_order, j_start + j_index, summary))
+
+        metrics.count('tournaments', pipeline.candidate_count)
+
+        for name, count in pipeline.skip_counts.items():
+            metrics.count(f'skipped.{name}', count)
+
+    metrics.count('results', len(results))
 
-            i_x_j = Analysis.DKS_Product_Digraph(i_tournament, j_tournament)
+    return results, metrics.to_dict()
 
-            if len(i_x_j.D1xD2.digraph_kings) == 0:
+
+def mmkvk_result_record(i_tournament_name: str, spec_j_order: int, j: int, summary: dict) -> dict:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param i_tournament_name: name of the i tournament
+        :param spec_j_order: the order of the j tournament
+        :param j: the line of the j tournament in its file
+        :param summary: summary of the product of the i tournament, and the j tournament, as given by
+        DKS_Product_Digraph.get_summary(), or Analysis.DKS_Batch_Product_Evaluator
+        :returns: the result record of the product, as written to the result stream of the experiment (a line of JSON);
+        the 'STRONG' kings are those with the min k_val, the 'WEAK' kings those with the max k_val
+    """
+    return {'i': i_tournament_name, 'j': f"T{spec_j_order}_{j}", 'j_order': spec_j_order, 'j_line': j,
+            'min_k_val': summary['min_k_val'], 'max_k_val': summary['max_k_val'],
+            'min_k_val_kings': summary['min_k_val_kings'], 'max_k_val_kings': summary['max_k_val_kings']}
+
+
+def mmkvk_pair_record(i_order: int, i_line: int, j_order: int, j_line: int, summary: dict) -> dict:
+    """
+        *** Specific to all_pairs_min_max_k_val_kings_experiment() function ***
+
+        :param i_order: the order of the i tournament
+        :param i_line: the line of the i tournament in its file
+        :param j_order: the order of the j tournament
+        :param j_line: the line of the j tournament in its file
+        :param summary: summary of the product of the i tournament, and the j tournament
+        :returns: the result record of the product, the same as mmkvk_result_record() gives, with the order, and line, of
+        the i tournament as well
+    """
+    record = mmkvk_result_record(f"T{i_order}_{i_line}", j_order, j_line, summary)
+
+    return {'i': record['i'], 'j': record['j'], 'i_order': i_order, 'i_line': i_line, **record}
+
+
+def mmkvk_format_result(result: dict) -> str:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param result: a result record, as given by mmkvk_result_record() (or read back from the result stream)
+        :returns: the result, formatted as it is in the text report of the experiment
+    """
+    # kings read back from the result stream are lists rather than tuples, they're written as tuples either way
+    low_k_val_kings = ", ".join(str(tuple(king)) for king in result['min_k_val_kings'])
+    high_k_val_kings = ", ".join(str(tuple(king)) for king in result['max_k_val_kings'])
+
+    return (f"\t\t{result['j']}:\n"
+            f"\t\t\tmin_k_val: {result['min_k_val']}, [{low_k_val_kings}]\n"
+            f"\t\t\tmax_k_val: {result['max_k_val']}, [{high_k_val_kings}]\n\n")
+
+
+def mmkvk_render_report(stream_file: str, report_file: str, specified_order: int, specified_line: int,
+                        j_query: dict | None = None):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        writes the text report of the experiment from its result stream, one section per j order (from specified_order
+        up to MAX_TOURNAMENT_ORDER), each followed by a divider
+        :param stream_file: path of the result stream (JSONL) of the experiment
+        :param report_file: path of the text report to write
+        :param specified_order: the order of the i tournament
+        :param specified_line: the line of the i tournament in its file
+        :param j_query: conditions on the feature index the j tournaments were selected by, if any, they're given on the
+        first line of the report
+    """
+    with open(stream_file, 'r') as r_f, open(report_file, 'w') as w_f:
+        if j_query is None:
+            w_f.write(f"T{specified_order}_{specified_line} x\n")
+        else:
+            w_f.write(f"T{specified_order}_{specified_line} x (j tournaments where {json.dumps(j_query)})\n")
+
+        spec_j_order = specified_order  # order of the section being written
+
+        for line in r_f:
+            result = json.loads(line)
+
+            # DIVIDE EACH J TOURNAMENT SECTION, results are in the order of the j orders
+            while spec_j_order < result['j_order']:
+                w_f.write(f"\t--------------------------------------\n")
+                spec_j_order += 1
+
+            w_f.write(mmkvk_format_result(result))
+
+        while spec_j_order <= MAX_TOURNAMENT_ORDER:
+            w_f.write(f"\t--------------------------------------\n")
+            spec_j_order += 1
+
+
+def mmkvk_journal_append(journal: TextIO, entry: dict):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        appends an entry to the progress journal of an experiment, and makes sure it is on disk before returning
+        :param journal: the journal file, opened for appending
+        :param entry: the entry to append, a dict that can be written as JSON
+    """
+    journal.write(json.dumps(entry) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def mmkvk_read_journal(journal_file: str) -> list[dict]:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param journal_file: path of the progress journal of an experiment
+        :returns: list of the entries of the journal, an empty list if there's no journal; an entry that was only partly
+        written (the run was killed while writing it) ends the list
+    """
+    entries = list()
+
+    if not os.path.exists(journal_file):
+        return entries
+
+    with open(journal_file, 'r') as j_f:
+        for line in j_f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+
+    return entries
+
+
+def mmkvk_open_results(stream_file: str, journal_file: str, resume: bool, header: dict) -> tuple[TextIO, TextIO, int, dict]:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        opens the result stream, and the progress journal, of an experiment, either anew, or, when resuming, where an
+        interrupted run left them
+        :param stream_file: path of the result stream
+        :param journal_file: path of the progress journal
+        :param resume: if set to True, and there is a journal of an interrupted run, the run is picked up where it left
+        :param header: header entry of the journal, the settings the chunks of the experiment depend on (e.g. the chunk
+        size), a new journal starts with it
+        :returns: tuple of the result stream, and the journal (both opened for appending), the number of chunks finished
+        in the interrupted run (0 if there is none), and the header in effect (that of the interrupted run, if any)
+    """
+    '''
+    the journal holds a header entry (e.g. the chunk size), then one entry per chunk whose results are in the result 
+    stream, along with the offset in the result stream after them; as results are written in the order of the chunks, 
+    the finished chunks are always the first ones, and anything in the result stream past the offset of the last entry 
+    is from a chunk that wasn't finished, and is cut off
+    '''
+    journal_entries = mmkvk_read_journal(journal_file) if resume else list()
+
+    if len(journal_entries) != 0 and os.path.exists(stream_file) and \
+            os.path.getsize(stream_file) >= journal_entries[-1]['offset']:
+        os.truncate(stream_file, journal_entries[-1]['offset'])
+        s_f = open(stream_file, 'a')
+        j_f = open(journal_file, 'w')
+
+        # the journal is rewritten, in case it ended on a partly written entry
+        for entry in journal_entries:
+            j_f.write(json.dumps(entry) + "\n")
+        j_f.flush()
+        os.fsync(j_f.fileno())
+
+        return s_f, j_f, len(journal_entries) - 1, journal_entries[0]
+
+    s_f = open(stream_file, 'w')
+    j_f = open(journal_file, 'w')
+
+    mmkvk_journal_append(j_f, {**header, 'offset': 0})
+
+    return s_f, j_f, 0, header
+
+
+def mmkvk_report_metrics(metrics: DKS_Experiment_Metrics):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        prints the time spent in each phase of the experiment (summed over the workers), and the number of j tournaments
+        skipped by each prefilter, over the whole experiment
+        :param metrics: metrics of the whole experiment, summed over the chunk entries of its journal (so the chunks of
+        an interrupted run are counted as well)
+    """
+    total_seconds = sum(metrics.seconds.values())
+    tournament_count = metrics.counts.get('tournaments', 0)
+
+    for phase, seconds in metrics.seconds.items():
+        print(f"min_max_k_val_kings_experiment(): {phase} took {seconds:.2f} s "
+              f"({seconds / total_seconds if total_seconds > 0 else 0:.1%})")
+
+    for counter, count in metrics.counts.items():
+        if counter.startswith('skipped.'):
+            print(f"min_max_k_val_kings_experiment(): prefilter '{counter.removeprefix('skipped.')}' skipped {count} of "
+                  f"{tournament_count} products")
+
+    skipped_count = sum(count for counter, count in metrics.counts.items() if counter.startswith('skipped.'))
+    print(f"min_max_k_val_kings_experiment(): {tournament_count - skipped_count} of {tournament_count} products "
+          f"evaluated, {metrics.counts.get('kingless', 0)} of them without kings, {metrics.counts.get('results', 0)} "
+          f"results")
+
+
+def mmkvk_journal_metrics(journal_entries: list[dict]) -> DKS_Experiment_Metrics:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param journal_entries: the entries of the journal of an experiment, as given by mmkvk_read_journal()
+        :returns: the metrics of every chunk recorded in the journal, added up
+    """
+    metrics = DKS_Experiment_Metrics()
+
+    for entry in journal_entries[1:]:
+        metrics.merge(entry['metrics'])
+
+    return metrics
+
+
+def mmkvk_report_progress(chunks: list, chunk_index: int, finished_chunk_count: int, start_time: float,
+                          metrics_file: TextIO | None = None, metrics: DKS_Experiment_Metrics | None = None):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        prints a progress line of the experiment: the products done (out of all of them), the throughput of this run,
+        and the estimated time left; the same, along with the metrics so far, is appended to the metrics file (if any)
+        as a line of JSON
+        :param chunks: list of all chunks of the experiment, as given by mmkvk_chunks() (or mmkvk_pair_chunks())
+        :param chunk_index: index of the last chunk written
+        :param finished_chunk_count: number of chunks written in an earlier run (not counted in the throughput)
+        :param start_time: time.perf_counter() at the start of this run
+        :param metrics_file: file the progress is appended to, opened for appending, None for no file
+        :param metrics: metrics of the experiment so far, written to the metrics file
+    """
+    def product_count(chunk_range: slice) -> int:
+        return sum(mmkvk_chunk_product_count(chunk) for chunk in chunks[chunk_range])
+
+    done_count = product_count(slice(0, chunk_index + 1))
+    total_count = product_count(slice(0, len(chunks)))
+    elapsed_seconds = time.perf_counter() - start_time
+    throughput = product_count(slice(finished_chunk_count, chunk_index + 1)) / max(elapsed_seconds, 1e-9)
+    eta_seconds = (total_count - done_count) / throughput if throughput > 0 else None
+
+    print(f"min_max_k_val_kings_experiment(): {mmkvk_chunk_label(chunks[chunk_index])}, {done_count} of {total_count} "
+          f"products ({done_count / max(total_count, 1):.1%}), {throughput:.0f} products/s, ETA "
+          f"{datetime.timedelta(seconds=round(eta_seconds)) if eta_seconds is not None else 'unknown'}", flush=True)
+
+    if metrics_file is not None:
+        metrics_file.write(json.dumps({'time': time.time(), 'elapsed_seconds': elapsed_seconds,
+                                       'chunk': list(chunks[chunk_index]), 'done': done_count, 'total': total_count,
+                                       'throughput': throughput, 'eta_seconds': eta_seconds,
+                                       'metrics': metrics.to_dict() if metrics is not None else None}) + "\n")
+        metrics_file.flush()
+
+
+def mmkvk_report_profile(profile_directory: str, profile_file: str):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        merges the profiles of the chunks of the experiment into a single profile file (which can be read with pstats,
+        or e.g. snakeviz), prints the functions that took the most time, and removes the profiles of the chunks
+        :param profile_directory: directory the profiles of the chunks were saved to
+        :param profile_file: path of the merged profile
+    """
+    chunk_profiles = [os.path.join(profile_directory, name) for name in sorted(os.listdir(profile_directory))]
+
+    if len(chunk_profiles) != 0:
+        pstats.Stats(*chunk_profiles).dump_stats(profile_file)
+        pstats.Stats(profile_file).strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_LINES)
+        print(f"min_max_k_val_kings_experiment(): profile of the workers saved to '{profile_file}'")
+
+    shutil.rmtree(profile_directory)
+
+
+def mmkvk_write_shard_manifest(manifest_file: str, stream_file: str, journal_entries: list[dict],
+                               chunk_indices: list[int], specified_order: int, specified_line: int,
+                               shard: tuple[int, int], line_counts: dict[int, int]):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        writes the manifest of a finished shard, which describes the shard well enough for it to be merged with the
+        others without the tournament files: the experiment, and how it was split (the chunk size, and the number of
+        tournaments of every j order, which the chunks only depend on), and, for every chunk of the shard, its index in
+        the chunks of the whole experiment, and the range of bytes its results take up in the result stream of the
+        shard (along with its metrics). The manifest is only put in place once it's complete, so a shard with a
+        manifest is a finished shard
+        :param manifest_file: path of the manifest
+        :param stream_file: path of the result stream of the shard
+        :param journal_entries: the entries of the journal of the shard, as given by mmkvk_read_journal()
+        :param chunk_indices: index of each chunk of the shard in the chunks of the whole experiment
+        :param specified_order: the order of the i tournament
+        :param specified_line: the line of the i tournament in its file
+        :param shard: (k, N) tuple, shard k of N
+        :param line_counts: dict of j order -> number of tournaments in its file, as given by mmkvk_line_counts()
+    """
+    manifest_chunks = list()
+
+    # the chunk entries of the journal are in the order of the chunks of the shard, each starts where the last one ended
+    for chunk_index, entry, last_entry in zip(chunk_indices, journal_entries[1:], journal_entries):
+        manifest_chunks.append({'index': chunk_index, 'chunk': entry['chunk'], 'start': last_entry['offset'],
+                                'stop': entry['offset'], 'metrics': entry['metrics']})
+
+    manifest = {'i': f"T{specified_order}_{specified_line}", 'specified_order': specified_order,
+                'specified_line': specified_line, 'shard_index': shard[0], 'shard_count': shard[1],
+                'chunk_size': journal_entries[0]['chunk_size'], 'j_query': journal_entries[0].get('j_query'),
+                'max_tournament_order': MAX_TOURNAMENT_ORDER,
+                'line_counts': {str(spec_j_order): count for spec_j_order, count in line_counts.items()},
+                'stream': os.path.basename(stream_file), 'chunks': manifest_chunks}
+
+    with open(f"{manifest_file}.tmp", 'w') as m_f:
+        json.dump(manifest, m_f)
+        m_f.flush()
+        os.fsync(m_f.fileno())
+
+    os.replace(f"{manifest_file}.tmp", manifest_file)
+
+
+def mmkvk_read_shard_manifests(write_file: str) -> list[tuple[str, dict]]:
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        :param write_file: path of the results of the whole experiment, without an extension
+        :returns: list of (path, manifest) tuples, for every shard manifest of the experiment (of any number of shards)
+        found next to its results, in the order of their paths
+    """
+    results_directory, prefix = os.path.split(write_file)
+    manifests = list()
+
+    for name in sorted(os.listdir(results_directory or ".")):
+        if name.startswith(f"{prefix}.shard_") and name.endswith(".manifest.json"):
+            manifest_file = os.path.join(results_directory, name)
+
+            with open(manifest_file, 'r') as m_f:
+                manifests.append((manifest_file, json.load(m_f)))
+
+    return manifests
+
+
+def mmkvk_write_results(s_f: TextIO, j_f: TextIO, chunks: list, finished_chunk_count: int, worker_count: int,
+                        i_tournament: Analysis.DKS_Digraph | None,
+                        j_corpora: dict[int, Util.DKS_Shared_Tournaments] | None,
+                        prefilters: tuple = Analysis.DEFAULT_PREFILTERS,
+                        progress_interval: float | None = DEFAULT_PROGRESS_INTERVAL, metrics_file: TextIO | None = None,
+                        profile_directory: str | None = None, query: dict | None = None,
+                        pair_analyses: dict[int, Util.DKS_Shared_Arrays] | None = None):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        hands the chunks still to be worked through out to a pool of workers, and writes their results to the result
+        stream as they come in, in the order of the chunks (this process is the single writer of the results)
+        :param s_f: the result stream, opened for appending
+        :param j_f: the progress journal, opened for appending
+        :param chunks: list of all chunks of the experiment, as given by mmkvk_chunks() (or mmkvk_pair_chunks())
+        :param finished_chunk_count: number of chunks (from the first one) already written in an earlier run
+        :param worker_count: number of worker processes
+        :param i_tournament: the tournament that is crossed with all other j tournaments, None for the all-pairs
+        experiment
+        :param j_corpora: dict of j order -> the shared corpus of the tournaments of that order, None for the all-pairs
+        experiment
+        :param prefilters: prefilters the products are run through before they're evaluated
+        :param progress_interval: seconds between progress reports (see mmkvk_report_progress()), None for no reports
+        :param metrics_file: file the progress reports are appended to, opened for appending, None for no file
+        :param profile_directory: directory the workers save the profile of each chunk to, None to not profile
+        :param query: conditions on the feature index the tournaments of the experiment are selected by, if any
+        :param pair_analyses: dict of order -> the shared analysis of the tournaments of that order (see
+        mmkvk_pair_analysis()), for the all-pairs experiment, None for the others
+    """
+    result_queue = Queue(worker_count * RESULT_QUEUE_SIZE_PER_WORKER)
+
+    start_time = time.perf_counter()
+    last_report_time = start_time
+    metrics = DKS_Experiment_Metrics()  # metrics of the chunks written in this run
+
+    with Pool(worker_count, initializer=mmkvk_init_worker,
+              initargs=(i_tournament, result_queue, j_corpora, prefilters, profile_directory, query,
+                        pair_analyses)) as pool:
+        async_result = pool.starmap_async(mmkvk_run_chunk, list(enumerate(chunks))[finished_chunk_count:], chunksize=1)
+        worker_pids = {process.pid for process in active_children()}  # the workers of the pool, started with it
+        exited_pids = set()  # workers found to have exited, see mmkvk_check_pool()
+
+        held_results = dict()  # results of chunks that are done, waiting on the chunks ahead of them
+        next_chunk_index = finished_chunk_count
+
+        while next_chunk_index < len(chunks):
+            try:
+                chunk_index, results = result_queue.get(timeout=RESULT_POLL_INTERVAL)
+            except queue.Empty:
+                mmkvk_check_pool(async_result, worker_pids, exited_pids, next_chunk_index, held_results)
                 continue
 
-            formatted_output += f"\t\t{j_tournament_name}:\n"
-            formatted_output += f"\t\t\tmin_k_val: {i_x_j.D1xD2.min_k_val}, ["
+            held_results[chunk_index] = results
+
+            while next_chunk_index in held_results:
+                results = held_results.pop(next_chunk_index)
 
-            # GATHER ALL 'STRONG' KINGS, and place in formatted output
-            low_k_val_kings = list()
+                # a chunk that failed stops the experiment once every chunk before it is written, so it can resume
+                if isinstance(results, Exception):
+                    raise results
 
-            for king in i_x_j.D1xD2.digraph_kings:
-                if i_x_j.D1xD2.digraph.nodes[king]['k_val'] == i_x_j.D1xD2.min_k_val:
-                    low_k_val_kings.append(king)
+                results, chunk_metrics = results
+                chunk_metrics = DKS_Experiment_Metrics(chunk_metrics)
 
-            for king in low_k_val_kings:
-                formatted_output += str(king)
+                with chunk_metrics.timer('write'):
+                    for result in results:
+                        s_f.write(json.dumps(result) + "\n")
 
-                if king == low_k_val_kings[-1]:
-                    formatted_output += "]\n"
-                else:
-                    formatted_output += ", "
+                    # RECORD THE CHUNK AS FINISHED, only once its results are on disk
+                    s_f.flush()
+                    os.fsync(s_f.fileno())
 
-            formatted_output += f"\t\t\tmax_k_val: {i_x_j.D1xD2.max_k_val}, ["
+                mmkvk_journal_append(j_f, {'chunk': chunks[next_chunk_index], 'offset': s_f.tell(),
+                                           'metrics': chunk_metrics.to_dict()})
+                metrics.merge(chunk_metrics.to_dict())
 
-            # GATHER ALL 'WEAK' KINGS, and place in formatted output
+                # REPORT PROGRESS, every progress_interval seconds, and once the last chunk is written
+                if progress_interval is not None and (next_chunk_index == len(chunks) - 1 or
+                                                      time.perf_counter() - last_report_time >= progress_interval):
+                    mmkvk_report_progress(chunks, next_chunk_index, finished_chunk_count, start_time, metrics_file,
+                                          metrics)
+                    last_report_time = time.perf_counter()
 
-            high_k_val_kings = list()
+                next_chunk_index += 1
 
-            for king in i_x_j.D1xD2.digraph_kings:
-                if i_x_j.D1xD2.digraph.nodes[king]['k_val'] == i_x_j.D1xD2.max_k_val:
-                    high_k_val_kings.append(king)
 
-            for king in high_k_val_kings:
-                formatted_output += str(king)
+def mmkvk_check_pool(async_result, worker_pids: set[int], exited_pids: set[int], next_chunk_index: int,
+                     held_results: dict):
+    """
+        *** Specific to min_max_k_val_kings_experiment() function ***
+
+        checks on the pool of workers while the writer waits on results; mmkvk_run_chunk() only hands over the errors
+        it catches itself, so a worker that dies outright (e.g. killed for running out of memory), or results that
+        can't be put on the queue, would otherwise leave the writer waiting forever, rather than stopping the
+        experiment with every finished chunk written, so it can resume
+        :param async_result: the multiprocessing.pool.AsyncResult of the chunks handed to the pool
+        :param worker_pids: process ids of the workers the pool started with, those found to have exited are moved to
+        exited_pids
+        :param exited_pids: process ids of the workers found to have exited by an earlier check
+        :param next_chunk_index: index of the next chunk to be written
+        :param held_results: dict of chunk index -> results of the chunks that are done, but not yet written
+    """
+    '''
+    workers never exit while the pool is open, one that did took the chunk it was working on with it; the experiment is
+    only stopped at the next check, once the results the other workers finished in the meantime have been written
+    '''
+    if len(exited_pids) != 0:
+        raise RuntimeError(f"mmkvk_check_pool(): worker process(es) {sorted(exited_pids)} exited while the experiment "
+                           f"was running, the chunks from {next_chunk_index} on weren't all written, resume the "
+                           f"experiment to finish them.")
 
-                if king == high_k_val_kings[-1]:
-                    formatted_output += "]\n\n"
-                else:
-                    formatted_output += ", "
+    exited_pids.update(worker_pids - {process.pid for process in active_children()})
+    worker_pids.difference_update(exited_pids)
 
-            # WRITE RESULTS, and clear output
+    if async_result.ready():
+        async_result.get()  # raises the error of the pool itself, if there was one
 
-            w_f.write(str(formatted_output))  # write i_x_j results to the quarter-file
-            formatted_output = ""  # clear formatted output
+        # every chunk was handed over, yet some never arrived, e.g. results that couldn't be pickled
+        raise RuntimeError(f"mmkvk_check_pool(): every chunk is done, but the results of chunk {next_chunk_index} "
+                           f"never arrived ({len(held_results)} later chunks are held back), resume the experiment "
+                           f"to run it again.")
 
 
-def min_max_k_val_kings_experiment(specified_order: int, specified_line: int):
+def min_max_k_val_kings_experiment(specified_order: int, specified_line: int, worker_count: int | None = None,
+                                   chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = False,
+                                   prefilters: tuple = Analysis.DEFAULT_PREFILTERS,
+                                   progress_interval: float | None = DEFAULT_PROGRESS_INTERVAL, metrics: bool = False,
+                                   profile: bool = False, shard: tuple[int, int] | None = None,
+                                   j_query: dict | None = None):
     """
         creates a results text file that lists all possible combinations of a specified tournament, with all others, up to
         order 10, and also gives the lowest, and highest k values of kings from the combinations of the tournaments (as well
-        as the kings involved with those k values)
+        as the kings involved with those k values); the same results are also kept as a stream of JSON lines, one line
+        per combination, that the text file is made from
 
         this is done through parallel processing, as the amount of computation lends itself to such a method
         :param specified_order:  the order of the tournament (corresponds to a specific file in t_files)
         :param specified_line: the specific line from the text file pointed to by specified_order
-        :returns: None, but a text file will be created in the experiments results directory
+        :param worker_count: number of worker processes, default is one per core (os.cpu_count())
+        :param chunk_size: number of j tournaments in each chunk of work handed to a worker
+        :param resume: if set to True, and a previous run of the same experiment was interrupted, the chunks it finished
+        (as recorded in its journal) are skipped, and the results of the others are appended to its result stream; the
+        chunk size of the interrupted run is used
+        :param prefilters: prefilters the products are run through before they're evaluated, by name (see
+        Analysis.PREFILTERS), or module level functions of the same form; the number of products each one ruled out is
+        printed once the experiment is complete
+        :param progress_interval: seconds between the progress lines printed while the experiment runs (j tournaments
+        done, throughput, and ETA), None to print none
+        :param metrics: if set to True, every progress report (along with the timers, and counters of the experiment so
+        far) is also appended to a metrics file, as a line of JSON
+        :param profile: if set to True, every chunk is run under cProfile in its worker, and the merged profile is saved
+        (and its top functions printed) once the experiment is complete; off by default, as it slows the workers down
+        :param shard: (k, N) tuple, if given, only shard k of N of the experiment is run (shards are numbered from 1,
+        see mmkvk_shard_chunk_indices()), and its results are written to a shard result stream, and manifest, in place
+        of the text report; once all N shards are done, merge_min_max_k_val_kings_shards() puts them together
+        :param j_query: conditions on the feature index of the tournaments (see Index.DKS_Feature_Index.select(), e.g.
+        {'king_count': 3, 'max_k_val': 3}), if given, the i tournament is only crossed with the j tournaments that meet
+        them, and the results are named after the query (see mmkvk_query_file()); the feature index of every j order
+        must have been built (see feature_index_file())
+        :returns: None, but a text file (and a JSONL file) will be created in the experiments results directory
     """
-    experiment_complete = False
-    write_file = f"experiment results/experiment_results_[T{specified_order}_{specified_line}]]"
+    if shard is not None and not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f"min_max_k_val_kings_experiment(): there is no shard {shard[0]} of {shard[1]}, shards are "
+                         f"numbered from 1 up to the number of shards.")
+
+    write_file = mmkvk_write_file(specified_order, specified_line, j_query)
 
     # check if i_tournament will even result in anything before starting--
-    i_tournament = Analysis.DKS_Digraph(
-        Util.mckay_txt_parser(f"digraph_datasets/t_files/tourn{specified_order}.txt", specified_line),
-        f"T{specified_order}_{specified_line}")
+    i_tournament = load_tournament(specified_order, specified_line)
 
     if len(i_tournament.digraph_kings) == 0 or i_tournament.has_emperor or specified_order < 3:
-        experiment_complete = True
+        # the same text report is written by every shard, there is nothing to merge
+        with open(f"{write_file}.txt", 'w') as w_f:
+            w_f.write(f"Tournament either has no kings, an emperor, or order less than 3, no output--")
+        return
 
-    with open(f"{write_file}.txt", 'w') as w_f:
+    if shard is not None:
+        write_file = mmkvk_shard_file(write_file, shard)
 
-        if experiment_complete:  # if the experiment is complete at this point, it means the i_tournament is invalid
-            w_f.write(f"Tournament either has no kings, an emperor, or order less than 3, no output--")
-            return
-        else:  # otherwise we'll write the header line before the experiment starts
-            w_f.write(f"T{specified_order}_{specified_line} x\n")
+    stream_file = f"{write_file}.jsonl"
+    journal_file = f"{write_file}.journal"
+    metrics_file = f"{write_file}.metrics.jsonl"
+    profile_directory = f"{write_file}.profiles"
+    manifest_file = f"{write_file}.manifest.json"
 
-        spec_j_tournament = specified_order  # baseline start for j order
+    # the manifest of an earlier run of the shard no longer describes its result stream, it's written again at the end
+    if shard is not None and os.path.exists(manifest_file):
+        os.remove(manifest_file)
 
-        while not experiment_complete:  # loop until experiment is complete
-            # PARALLELIZE COMPUTATIONS PERFORMED
+    if j_query is not None:
+        mmkvk_check_query(j_query, list(range(specified_order, MAX_TOURNAMENT_ORDER + 1)))
 
-            p_array = list()  # init list to place working processes
-            thread_count = 4  # TODO: CAN BE ALTERED, be sure to change '<LINE_JUMP>' (ctrl+f to find) to match value
+    s_f, j_f, finished_chunk_count, journal_header = mmkvk_open_results(stream_file, journal_file, resume,
+                                                                        {'chunk_size': chunk_size, 'j_query': j_query})
+    chunk_size = journal_header['chunk_size']
 
-            for p_cnt in range(0, thread_count):
-                start_line = p_cnt + 1
-                p_work = Process(target=mmkvk_gen_result_part, args=(i_tournament, spec_j_tournament, start_line, f"{write_file}.part{p_cnt}"))
-                p_array.append(p_work)  # add to collection of processes to perform work
+    with s_f, j_f:
+        # PARALLELIZE COMPUTATIONS PERFORMED
+        '''
+        every j order is split into chunks of lines, and the chunks of all orders are handed out to the pool one at a time,
+        so a worker that is done takes on the next chunk (from the same order, or the next one) rather than waiting on the
+        others; workers put the results of their chunks on a bounded queue (a worker waits while it is full, so results
+        can't pile up in memory faster than they're written), and this process is the single writer of the results: 
+        chunks that are done before those ahead of them are held on to until they can be written in order, so the 
+        results come out the same whatever the number of workers
 
-            # START PROCESSES
-            for process in p_array:
-                process.start()
+        a shard only works through its own chunks (in the same order), as its own experiment, with its own journal
+        '''
+        line_counts = mmkvk_line_counts(specified_order)
+        chunks = list(mmkvk_chunks(specified_order, chunk_size, line_counts))
+        chunk_indices = list(range(len(chunks)))  # index of each chunk in the chunks of the whole experiment
 
-            # WAIT FOR PROCESSES TO BE COMPLETED
-            for process in p_array:
-                process.join()
+        if shard is not None:
+            chunk_indices = mmkvk_shard_chunk_indices(len(chunks), shard)
+            chunks = [chunks[chunk_index] for chunk_index in chunk_indices]
 
-            # STITCH TOGETHER PARTS OF RESULT INTO MAIN RESULTS FILE
-            for p_cnt in range(0, thread_count):
-                # stitch write_file together... (order doesn't matter)
-                with open(f"{write_file}.part{p_cnt}", 'r') as r_f:
-                    for line in r_f.readlines():
-                        w_f.write(line)
+        '''
+        each j corpus still to be worked through is decoded once, here, into a shared memory block that the workers 
+        attach to, rather than every worker parsing the files itself; the analysis of the i tournament (its kings, and
+        all of its walk matrices) is done once here as well, so workers are handed a finished i tournament
+        '''
+        i_tournament.get_walk_engine().run_to_period()
+        j_corpora = dict()
 
-            # DIVIDE EACH J TOURNAMENT SECTION
-            w_f.write(f"\t--------------------------------------\n")
-            spec_j_tournament += 1
+        with contextlib.ExitStack() as corpora_stack:
+            for spec_j_order in sorted({chunk[0] for chunk in chunks[finished_chunk_count:]}):
+                j_corpora[spec_j_order] = corpora_stack.enter_context(
+                    Util.DKS_Shared_Tournaments.from_file(tournament_file(spec_j_order)))
+
+            if profile:
+                os.makedirs(profile_directory, exist_ok=True)
+
+            with open(metrics_file, 'a') if metrics else contextlib.nullcontext() as m_f:
+                mmkvk_write_results(s_f, j_f, chunks, finished_chunk_count, worker_count or os.cpu_count(),
+                                    i_tournament, j_corpora, prefilters, progress_interval, m_f,
+                                    profile_directory if profile else None, j_query)
+
+    # WRITE THE TEXT REPORT, from the finished result stream (or the manifest of the shard, for the merge)
+    if shard is None:
+        mmkvk_render_report(stream_file, f"{write_file}.txt", specified_order, specified_line, j_query)
+    else:
+        mmkvk_write_shard_manifest(manifest_file, stream_file, mmkvk_read_journal(journal_file),
+                                   chunk_indices, specified_order, specified_line, shard, line_counts)
+
+    # REPORT THE METRICS (and profile), then clean up the journal, the experiment is complete
+    mmkvk_report_metrics(mmkvk_journal_metrics(mmkvk_read_journal(journal_file)))
+
+    if profile:
+        mmkvk_report_profile(profile_directory, f"{write_file}.prof")
+    os.remove(journal_file)
+
+
+def all_pairs_min_max_k_val_kings_experiment(min_order: int, max_order: int, worker_count: int | None = None,
+                                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                             pair_block_size: int = DEFAULT_PAIR_BLOCK_SIZE, resume: bool = False,
+                                             prefilters: tuple = Analysis.DEFAULT_PREFILTERS,
+                                             progress_interval: float | None = DEFAULT_PROGRESS_INTERVAL,
+                                             metrics: bool = False, profile: bool = False, query: dict | None = None):
+    """
+        runs min_max_k_val_kings_experiment() for every tournament of orders min_order to max_order at once, crossed
+        with every tournament of those orders, as one experiment; a product and its reverse have the same kings, and
+        k values (up to the order of the factors), so only unordered pairs are crossed, each tournament with the ones
+        after it (in order, then line), and with itself
+
+        every pair whose product has kings is written to a stream of JSON lines, the same records as those of
+        min_max_k_val_kings_experiment() (see mmkvk_pair_record()), in the order of the chunks (see mmkvk_pair_chunks()),
+        so the same whatever the number of workers; no text report is written, as there is no single i tournament to
+        report on
+        :param min_order: the lowest order of tournament, at least 3
+        :param max_order: the highest order of tournament, at most MAX_TOURNAMENT_ORDER
+        :param worker_count: number of worker processes, default is one per core (os.cpu_count())
+        :param chunk_size: max number of j tournaments in each chunk of work handed to a worker
+        :param pair_block_size: max number of i tournaments in each chunk of work handed to a worker (every tournament
+        is analysed once, before the work is handed out, whatever the chunk, and block sizes)
+        :param resume: if set to True, and a previous run of the same experiment was interrupted, the chunks it finished
+        are skipped (see min_max_k_val_kings_experiment()), the chunk, and block sizes of the interrupted run are used
+        :param prefilters: prefilters the products are run through before they're evaluated
+        :param progress_interval: seconds between the progress lines printed while the experiment runs, None to print
+        none
+        :param metrics: if set to True, every progress report is also appended to a metrics file, as a line of JSON
+        :param profile: if set to True, every chunk is run under cProfile in its worker, and the merged profile is saved
+        :param query: conditions on the feature index of the tournaments (see Index.DKS_Feature_Index.select()), if
+        given, only pairs of tournaments that both meet them are crossed, and the results are named after the query (see
+        mmkvk_query_file()); the feature index of every order must have been built (see feature_index_file())
+        :returns: None, but a JSONL file will be created in the experiments results directory
+    """
+    if min_order < 3 or max_order > MAX_TOURNAMENT_ORDER or min_order > max_order:
+        raise ValueError(f"all_pairs_min_max_k_val_kings_experiment(): orders {min_order} to {max_order} are not a "
+                         f"range of orders from 3 up to {MAX_TOURNAMENT_ORDER}.")
+
+    write_file = f"experiment results/all_pairs_results_[T{min_order}-T{max_order}]"
+
+    if query is not None:
+        write_file = mmkvk_query_file(write_file, query)
+        mmkvk_check_query(query, list(range(min_order, max_order + 1)))
+
+    stream_file = f"{write_file}.jsonl"
+    journal_file = f"{write_file}.journal"
+    metrics_file = f"{write_file}.metrics.jsonl"
+    profile_directory = f"{write_file}.profiles"
+
+    s_f, j_f, finished_chunk_count, journal_header = mmkvk_open_results(
+        stream_file, journal_file, resume, {'chunk_size': chunk_size, 'pair_block_size': pair_block_size, 'query': query})
+    chunk_size, pair_block_size = journal_header['chunk_size'], journal_header['pair_block_size']
+
+    with s_f, j_f:
+        '''
+        the chunks are pairs of blocks, a block of i tournaments, and a block of j tournaments (see mmkvk_pair_chunks()),
+        every tournament is in the blocks of many chunks, so each is analysed once, here, before the workers start, into
+        a shared memory block of its order that the workers attach to (see mmkvk_pair_analysis()); the i factors, and
+        the j blocks, of every chunk are then only read from the shared analyses, whichever worker takes it on
+        '''
+        line_counts = mmkvk_line_counts(min_order, max_order)
+        chunks = list(mmkvk_pair_chunks(min_order, max_order, chunk_size, pair_block_size, line_counts))
+        pair_analyses = dict()
+
+        with contextlib.ExitStack() as analyses_stack:
+            for spec_order in sorted({chunk[0] for chunk in chunks[finished_chunk_count:]} |
+                                     {chunk[3] for chunk in chunks[finished_chunk_count:]}):
+                pair_analyses[spec_order] = analyses_stack.enter_context(mmkvk_pair_analysis(spec_order))
+
+            if profile:
+                os.makedirs(profile_directory, exist_ok=True)
+
+            with open(metrics_file, 'a') if metrics else contextlib.nullcontext() as m_f:
+                mmkvk_write_results(s_f, j_f, chunks, finished_chunk_count, worker_count or os.cpu_count(), None,
+                                    None, prefilters, progress_interval, m_f, profile_directory if profile else None,
+                                    query, pair_analyses)
+
+    # REPORT THE METRICS (and profile), then clean up the journal, the experiment is complete
+    mmkvk_report_metrics(mmkvk_journal_metrics(mmkvk_read_journal(journal_file)))
+
+    if profile:
+        mmkvk_report_profile(profile_directory, f"{write_file}.prof")
+    os.remove(journal_file)
+
+
+def merge_min_max_k_val_kings_shards(specified_order: int, specified_line: int, j_query: dict | None = None,
+                                     shard_count: int | None = None):
+    """
+        puts the shards of a min_max_k_val_kings_experiment() that was run in N shards (shard=(k, N), e.g. on N nodes)
+        together: checks that every shard of the N is there, that they all describe the same experiment, split the same
+        way, and that their chunks cover every chunk of the experiment exactly once, then writes the result stream, and
+        the text report, of the whole experiment, the same as those of a run on a single node (the metrics of all
+        shards are printed the same way too); the shard files are left in place
+
+        the results of the shards (their result streams, and manifests) are looked for in the experiments results
+        directory, they may be copied there from the nodes that ran them, the tournament files aren't needed
+        :param specified_order: the order of the i tournament
+        :param specified_line: the line of the i tournament in its file
+        :param j_query: the conditions the j tournaments of the shards were selected by, if any
+        :param shard_count: the N the experiment was run in shards of, only the manifests of N shards are merged (those
+        of other runs, split into another number of shards, are reported, and left out), default is the N of the
+        manifests found, provided they all have the same one
+        :returns: None, but a text file (and a JSONL file) will be created in the experiments results directory
+        :raises ShardMergeError: if there are no shards, a shard is missing, shards overlap, they don't agree, or
+        they're of runs of different numbers of shards, and shard_count isn't given
+    """
+    write_file = mmkvk_write_file(specified_order, specified_line, j_query)
+    manifests = mmkvk_read_shard_manifests(write_file)
+
+    if shard_count is None:
+        shard_counts = sorted({manifest.get('shard_count') for _, manifest in manifests}, key=repr)
+
+        if len(shard_counts) > 1:
+            raise ShardMergeError(f"the manifests are of runs of {shard_counts} shards, give the shard count of the "
+                                  f"run to merge, the others are likely left from earlier runs")
+    else:
+        # MANIFESTS OF RUNS OF OTHER NUMBERS OF SHARDS are left out, e.g. those left from an earlier run
+        foreign_manifests = [manifest_file for manifest_file, manifest in manifests
+                             if manifest.get('shard_count') != shard_count]
+        manifests = [(manifest_file, manifest) for manifest_file, manifest in manifests
+                     if manifest.get('shard_count') == shard_count]
+
+        for manifest_file in foreign_manifests:
+            print(f"merge_min_max_k_val_kings_shards(): left out '{manifest_file}', of a run of another number of "
+                  f"shards than {shard_count}")
+
+    if len(manifests) == 0:
+        raise ShardMergeError(f"no shard of the experiment on T{specified_order}_{specified_line} was found (or none "
+                              f"is finished), expected '{write_file}.shard_<k>_of_<N>.manifest.json'")
+
+    # EVERY SHARD MUST DESCRIBE THE SAME EXPERIMENT, split into the same chunks
+    first_file, first_manifest = manifests[0]
+
+    for manifest_file, manifest in manifests[1:]:
+        for key in ('i', 'shard_count', 'chunk_size', 'j_query', 'max_tournament_order', 'line_counts'):
+            if manifest.get(key) != first_manifest.get(key):
+                raise ShardMergeError(f"'{manifest_file}' doesn't agree with '{first_file}' on {key}, "
+                                      f"{manifest[key]} against {first_manifest[key]}")
+
+    shard_count = first_manifest['shard_count']
+    missing_shards = sorted(set(range(1, shard_count + 1)) - {manifest['shard_index'] for _, manifest in manifests})
+
+    if len(missing_shards) != 0:
+        raise ShardMergeError(f"shards {missing_shards} of {shard_count} are missing (or aren't finished)")
+
+    line_counts = {int(spec_j_order): count for spec_j_order, count in first_manifest['line_counts'].items()}
+    chunks = list(mmkvk_chunks(specified_order, first_manifest['chunk_size'], line_counts))
+
+    # EVERY CHUNK MUST BE IN EXACTLY ONE SHARD
+    chunk_owners = dict()  # chunk index -> (path of the result stream of its shard, its entry in the manifest)
+
+    for manifest_file, manifest in manifests:
+        stream_file = os.path.join(os.path.dirname(manifest_file), manifest['stream'])
+
+        for entry in manifest['chunks']:
+            if entry['index'] in chunk_owners:
+                raise ShardMergeError(f"chunk {entry['index']} {tuple(entry['chunk'])} is in more than one shard "
+                                      f"('{chunk_owners[entry['index']][0]}', and '{stream_file}')")
+
+            if not 0 <= entry['index'] < len(chunks) or tuple(entry['chunk']) != chunks[entry['index']]:
+                raise ShardMergeError(f"chunk {entry['index']} of '{manifest_file}' is {tuple(entry['chunk'])}, which "
+                                      f"isn't a chunk of the experiment")
+
+            chunk_owners[entry['index']] = (stream_file, entry)
+
+        if len(manifest['chunks']) != 0 and (not os.path.exists(stream_file) or
+                                             os.path.getsize(stream_file) < manifest['chunks'][-1]['stop']):
+            raise ShardMergeError(f"the result stream of '{manifest_file}' is missing, or shorter than its manifest")
+
+    missing_chunks = [chunk_index for chunk_index in range(len(chunks)) if chunk_index not in chunk_owners]
+
+    if len(missing_chunks) != 0:
+        raise ShardMergeError(f"chunk {missing_chunks[0]} {chunks[missing_chunks[0]]} of the experiment (and "
+                              f"{len(missing_chunks) - 1} more) isn't in any shard")
+
+    # WRITE THE RESULT STREAM, chunk by chunk, in the order of the chunks of the whole experiment
+    metrics = DKS_Experiment_Metrics()
+
+    with contextlib.ExitStack() as streams_stack, open(f"{write_file}.jsonl", 'wb') as s_f:
+        shard_streams = dict()  # path -> result stream of a shard, opened for reading
+
+        for chunk_index in range(len(chunks)):
+            stream_file, entry = chunk_owners[chunk_index]
+
+            if stream_file not in shard_streams:
+                shard_streams[stream_file] = streams_stack.enter_context(open(stream_file, 'rb'))
+
+            shard_streams[stream_file].seek(entry['start'])
+            s_f.write(shard_streams[stream_file].read(entry['stop'] - entry['start']))
+            metrics.merge(entry['metrics'])
+
+    # WRITE THE TEXT REPORT, from the merged result stream
+    mmkvk_render_report(f"{write_file}.jsonl", f"{write_file}.txt", specified_order, specified_line, j_query)
+    print(f"merge_min_max_k_val_kings_shards(): merged {shard_count} shards, {len(chunks)} chunks, into "
+          f"'{write_file}.txt'")
+
+    mmkvk_report_metrics(metrics)
+
+
+class ShardMergeError(Exception):
+    def __init__(self, problem):
+        self.problem = problem
+
+    def __str__(self):
+        return self.problem
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    :param shard: shard as given on the command line, 'k/N' for shard k of N
+    :returns: (k, N) tuple
+    """
+    try:
+        shard_index, shard_count = (int(number) for number in shard.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a shard as k/N (shard k of N), got '{shard}'")
+
+    return shard_index, shard_count
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """
+    command line entry of the experiment, so shards can be run on the nodes of a batch cluster (or as separate processes
+    standing in for them), and merged once they're done
+    :returns: exit status, 1 if the shards couldn't be merged, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Runs (shards of) min_max_k_val_kings_experiment(), and merges them, "
+                                                 "or runs all_pairs_min_max_k_val_kings_experiment().")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the experiment, or a shard of it")
+    run_parser.add_argument("order", type=int, help="order of the i tournament")
+    run_parser.add_argument("line", type=int, help="line of the i tournament in its file")
+    run_parser.add_argument("--shard", type=parse_shard, default=None, help="run shard k of N only, given as k/N")
+    run_parser.add_argument("--workers", type=int, default=None, help="number of worker processes, default is one "
+                                                                      "per core")
+    run_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="j tournaments per chunk, "
+                                                                                       "must be the same for all shards")
+    run_parser.add_argument("--resume", action="store_true", help="resume an interrupted run (of the same shard)")
+    run_parser.add_argument("--progress-interval", type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                            help="seconds between progress lines")
+    run_parser.add_argument("--metrics", action="store_true", help="append the progress, and metrics to a JSONL file")
+    run_parser.add_argument("--profile", action="store_true", help="profile the workers")
+    run_parser.add_argument("--query", type=json.loads, default=None, help="only cross the j tournaments the feature "
+                                                                            "index selects, as a JSON object of "
+                                                                            "conditions, e.g. '{\"king_count\": 3}'")
+
+    merge_parser = subparsers.add_parser("merge", help="merge the shards of the experiment")
+    merge_parser.add_argument("order", type=int, help="order of the i tournament")
+    merge_parser.add_argument("line", type=int, help="line of the i tournament in its file")
+    merge_parser.add_argument("--query", type=json.loads, default=None, help="the query the shards were run with")
+    merge_parser.add_argument("--shard-count", type=int, default=None,
+                              help="the number of shards the experiment was run in (manifests of others are left out)")
+
+    pairs_parser = subparsers.add_parser("all-pairs", help="cross every pair of tournaments of a range of orders")
+    pairs_parser.add_argument("min_order", type=int, help="lowest order of tournament")
+    pairs_parser.add_argument("max_order", type=int, help="highest order of tournament")
+    pairs_parser.add_argument("--workers", type=int, default=None, help="number of worker processes, default is one "
+                                                                        "per core")
+    pairs_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="j tournaments per chunk")
+    pairs_parser.add_argument("--block-size", type=int, default=DEFAULT_PAIR_BLOCK_SIZE, help="i tournaments per "
+                                                                                              "chunk")
+    pairs_parser.add_argument("--resume", action="store_true", help="resume an interrupted run")
+    pairs_parser.add_argument("--progress-interval", type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                              help="seconds between progress lines")
+    pairs_parser.add_argument("--metrics", action="store_true", help="append the progress, and metrics to a JSONL file")
+    pairs_parser.add_argument("--profile", action="store_true", help="profile the workers")
+    pairs_parser.add_argument("--query", type=json.loads, default=None, help="only cross pairs of tournaments the "
+                                                                              "feature index selects, as a JSON object "
+                                                                              "of conditions")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "all-pairs":
+        all_pairs_min_max_k_val_kings_experiment(arguments.min_order, arguments.max_order, arguments.workers,
+                                                 arguments.chunk_size, arguments.block_size, arguments.resume,
+                                                 progress_interval=arguments.progress_interval,
+                                                 metrics=arguments.metrics, profile=arguments.profile,
+                                                 query=arguments.query)
+        return 0
+
+    if arguments.command == "run":
+        min_max_k_val_kings_experiment(arguments.order, arguments.line, arguments.workers, arguments.chunk_size,
+                                       arguments.resume, progress_interval=arguments.progress_interval,
+                                       metrics=arguments.metrics, profile=arguments.profile, shard=arguments.shard,
+                                       j_query=arguments.query)
+        return 0
+
+    try:
+        merge_min_max_k_val_kings_shards(arguments.order, arguments.line, arguments.query, arguments.shard_count)
+    except ShardMergeError as SME:
+        print(f"main(): unable to merge the shards, {SME}.")
+        return 1
 
-            # TERMINATE EXPERIMENT IF AT ORDER '11' (doesn't exist)
-            if spec_j_tournament > 10:
+    return 0
 
-                # FILE PART CLEANUP
-                for p_cnt in range(0, thread_count):
-                    os.remove(f"{write_file}.part{p_cnt}")
 
-                experiment_complete = True  # flag experiment as completed
+if __name__ == '__main__':
+    sys.exit(main())
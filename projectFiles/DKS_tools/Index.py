@@ -0,0 +1,352 @@
+"""
+Feature index of tournament corpora: the analysis of every tournament of a corpus file (kings, k values, period, GCD(Dv),
+and GCD(Cv), etc.) is run once, and kept in a memory-mapped columnar table, so selections over the whole corpus (e.g.
+all tournaments of order 8 with exactly 3 kings, and max_k_val 3) are answered from the table in milliseconds, rather
+than by analysing every tournament again.
+
+run with: python -m projectFiles.DKS_tools.Index build FILE [--workers W]
+          python -m projectFiles.DKS_tools.Index query FILE [column=value ...]
+
+For a broad overview, please refer to 'projectFiles/DOCUMENTATION.md';
+for more detailed information, please read through docstrings, and comments below.
+"""
+
+# library imports
+import argparse
+import os
+import struct               # for the header of index files
+import sys
+import numpy as np
+from multiprocessing import Pool  # the analysis of a corpus is split over worker processes
+from projectFiles.DKS_tools import Analysis, Util
+
+
+INDEX_MAGIC = b'DKSI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sHHQ')
+INDEX_ALIGNMENT = 8  # every column of the table starts on a multiple of this many bytes
+DEFAULT_INDEX_BATCH_SIZE = 1024  # number of tournaments analysed in each chunk of work of the index builder
+
+'''
+the columns of the table, in the order they're laid out in the file, as (name, dtype, description); every column holds
+one value per tournament, except score_sequence, which holds one value per vertex; GCD(Dv), and GCD(Cv) are summarised
+by their lowest, and highest value over the kings of the tournament (so "GCD(Dv) = 1 at every king" is max_gcd_dv = 1)
+'''
+INDEX_COLUMNS = (("score_sequence", np.uint8, "out-degrees of the vertices, in non-decreasing order"),
+                 ("king_count", np.uint8, "number of kings"),
+                 ("has_emperor", np.uint8, "1 if the tournament has an emperor, otherwise 0"),
+                 ("min_k_val", np.uint8, "lowest k_val of a king, 0 if there is no king"),
+                 ("max_k_val", np.uint8, "highest k_val of a king, 0 if there is no king"),
+                 ("period", np.int8, "period of the tournament, -1 if it isn't strongly connected"),
+                 ("min_gcd_dv", np.uint8, "lowest GCD(Dv) of a king, 0 if there is no king"),
+                 ("max_gcd_dv", np.uint8, "highest GCD(Dv) of a king, 0 if there is no king"),
+                 ("min_gcd_cv", np.uint8, "lowest GCD(Cv) of a king, 0 if there is no king"),
+                 ("max_gcd_cv", np.uint8, "highest GCD(Cv) of a king, 0 if there is no king"))
+
+
+def _column_layout(order: int, count: int) -> list[tuple[str, np.dtype, tuple, int]]:
+    """
+    :param order: order of the tournaments of the table
+    :param count: number of tournaments of the table
+    :returns: list of (name, dtype, shape, offset in the file) tuples, one per column of the table
+    """
+    layout = list()
+    offset = INDEX_HEADER.size
+
+    for name, dtype, _ in INDEX_COLUMNS:
+        offset = -(-offset // INDEX_ALIGNMENT) * INDEX_ALIGNMENT
+        shape = (count, order) if name == "score_sequence" else (count,)
+
+        layout.append((name, np.dtype(dtype), shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+    return layout
+
+
+def _index_length(order: int, count: int) -> int:
+    """
+    :returns: size in bytes of the index file of count tournaments of the given order
+    """
+    name, dtype, shape, offset = _column_layout(order, count)[-1]
+
+    return offset + int(np.prod(shape)) * dtype.itemsize
+
+
+def tournament_features(adjacencies: np.ndarray, first_line: int = 1) -> dict[str, np.ndarray]:
+    """
+    runs the analysis of DKS_Digraph (kings, k values, period, Dv, and Cv) on every tournament of a batch
+    :param adjacencies: uint8 array of shape (batch, n, n), as yielded by Util.tournament_batches()
+    :param first_line: line of the first tournament of the batch in its file, the tournaments are named after their lines
+    :returns: dict of column name -> array of the values of the batch in that column (see INDEX_COLUMNS)
+    """
+    batch, order = adjacencies.shape[0], adjacencies.shape[1]
+    features = {name: np.zeros((batch, order) if name == "score_sequence" else batch, dtype=dtype)
+                for name, dtype, _ in INDEX_COLUMNS}
+
+    # the score sequences of the whole batch are found at once, from the row sums of the adjacency matrices
+    features["score_sequence"][:] = np.sort(adjacencies.sum(axis=2), axis=1)
+
+    for index, adjacency in enumerate(adjacencies):
+        tournament = Analysis.DKS_Digraph(Util.adjacency_to_digraph(adjacency), f"T{order}_{first_line + index}")
+        tournament.calc_dvs_cvs()
+
+        kings = tournament.digraph_kings
+        period = tournament.get_period()
+
+        features["king_count"][index] = len(kings)
+        features["has_emperor"][index] = tournament.has_emperor
+        features["min_k_val"][index] = tournament.min_k_val
+        features["max_k_val"][index] = tournament.max_k_val
+        features["period"][index] = -1 if period is None else period
+
+        if len(kings) != 0:
+            gcd_dvs = [tournament.digraph.nodes[king]['GCD(Dv)'] for king in kings]
+            gcd_cvs = [tournament.digraph.nodes[king]['GCD(Cv)'] for king in kings]
+
+            features["min_gcd_dv"][index], features["max_gcd_dv"][index] = min(gcd_dvs), max(gcd_dvs)
+            features["min_gcd_cv"][index], features["max_gcd_cv"][index] = min(gcd_cvs), max(gcd_cvs)
+
+    return features
+
+
+def _index_features_part(filename: str | os.PathLike, start: int, stop: int) -> tuple[int, dict[str, np.ndarray]]:
+    """
+    runs tournament_features() on a range of lines of a corpus file, in a worker of the index builder
+    :returns: tuple of the first line of the range, and the features of its tournaments
+    """
+    batches = list(Util.tournament_batches(filename, max(stop - start, 1), start, stop))  # a single batch
+
+    return start, tournament_features(batches[0], start)
+
+
+def build_feature_index(filename: str | os.PathLike, index_filename: str | os.PathLike | None = None,
+                        worker_count: int | None = None, batch_size: int = DEFAULT_INDEX_BATCH_SIZE) -> int:
+    """
+    builds the feature index of a corpus of tournaments, the analysis of its tournaments is spread over a pool of worker
+    processes, a range of lines at a time, and written into the table as the ranges are done
+    :param filename: name of either a McKay .txt file, or a packed .dkst file, of tournaments of a single order
+    :param index_filename: name of the index file to be written, required to be .dksi format, default is the name of the
+    corpus file, with its extension replaced by .dksi
+    :param worker_count: number of worker processes, default is one per core (os.cpu_count())
+    :param batch_size: number of tournaments in each range of lines handed to a worker
+    :returns: the number of tournaments indexed
+    """
+    if index_filename is None:
+        index_filename = f"{os.path.splitext(filename)[0]}.dksi"
+
+    if not str(index_filename).endswith('.dksi'):
+        raise Util.FileTypeError(index_filename)
+
+    count = Util.tournament_count(filename)
+    first_batch = next(Util.tournament_batches(filename, 1), None)
+    order = 0 if first_batch is None else first_batch.shape[1]
+
+    '''
+    the table is written into a partial file, mapped into memory, and only moved into place once every range is in it,
+    so an index file that exists is always complete
+    '''
+    partial_filename = f"{index_filename}.partial"
+
+    with open(partial_filename, 'wb') as w_f:
+        w_f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, order, count))
+        w_f.truncate(_index_length(order, count))
+
+    columns = {name: np.memmap(partial_filename, dtype=dtype, mode='r+', offset=offset, shape=shape)
+               for name, dtype, shape, offset in _column_layout(order, count) if shape[0] != 0}
+
+    if count != 0:
+        ranges = [(filename, start, min(start + batch_size, count + 1)) for start in range(1, count + 1, batch_size)]
+
+        with Pool(worker_count or os.cpu_count()) as pool:
+            for start, features in pool.starmap(_index_features_part, ranges, chunksize=1):
+                for name, values in features.items():
+                    columns[name][start - 1:start - 1 + len(values)] = values
+
+        for column in columns.values():
+            column.flush()
+
+    del columns  # release the mappings before the file is moved
+    os.replace(partial_filename, index_filename)
+
+    return count
+
+
+class DKS_Feature_Index:
+    """
+    Memory-mapped reader of a feature index file (see build_feature_index()), every column of the table is a read-only
+    numpy.memmap of its part of the file, so a query only reads the columns it's on, and answers for the whole corpus
+    at once; each column holds its own mapping, so arrays handed out stay valid after the index is closed
+    """
+    def __init__(self, filename: str | os.PathLike):
+        """
+        :param filename: name of the file being read, required to be .dksi format
+        """
+        if not str(filename).endswith('.dksi'):
+            raise Util.FileTypeError(filename)
+
+        self.filename = filename
+        self._columns = None
+
+        with open(filename, 'rb') as file:
+            header = file.read(INDEX_HEADER.size)
+            file_length = os.fstat(file.fileno()).st_size
+
+        if len(header) != INDEX_HEADER.size:
+            raise Util.FileLengthError(file_length)
+
+        magic, version, self.order, self.count = INDEX_HEADER.unpack(header)
+
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise Util.FileContentError(magic)
+
+        if file_length != _index_length(self.order, self.count):
+            raise Util.FileLengthError(file_length)
+
+        # an empty column can't be mapped, nor does it need to be
+        self._columns = {name: np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape)
+                         if np.prod(shape) != 0 else np.empty(shape, dtype=dtype)
+                         for name, dtype, shape, offset in _column_layout(self.order, self.count)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        releases the columns of the index, each mapping is closed once no array handed out still uses it
+        """
+        self._columns = None
+
+    def get_column(self, name: str) -> np.ndarray:
+        """
+        :param name: name of the column (see INDEX_COLUMNS)
+        :returns: read-only array of the column, the value of the tournament of line j is at index j - 1
+        """
+        if name not in self._columns:
+            raise ValueError(f"DKS_Feature_Index.get_column(): unknown column '{name}', expected one of "
+                             f"{tuple(self._columns)}.")
+
+        return self._columns[name]
+
+    def get_features(self, fileline: int) -> dict:
+        """
+        :param fileline: number of the tournament in its file, numbered from 1 (i.e. same as the line of the .txt file)
+        :returns: dict of column name -> value, for the tournament
+        """
+        if not 1 <= fileline <= self.count:
+            raise Util.SpecLineError(fileline)
+
+        return {name: column[fileline - 1].tolist() for name, column in self._columns.items()}
+
+    def select(self, start: int = 1, stop: int | None = None, **conditions) -> np.ndarray:
+        """
+        finds the tournaments of a range of lines that meet every one of the conditions, each condition is given as
+        column=value (see INDEX_COLUMNS), where the value is either:
+            - a single value, that the column must equal
+            - a (low, high) pair, that the column must lie between (inclusive), either may be None for no bound
+            - for score_sequence, the whole sequence (in non-decreasing order)
+        :param start: first line of the range
+        :param stop: line to stop at (exclusive), default is the end of the file
+        :returns: boolean array, with one entry per line of the range, True for the tournaments that meet the conditions
+        """
+        lines = range(start, self.count + 1 if stop is None else min(stop, self.count + 1))
+        selected = np.ones(len(lines), dtype=bool)
+
+        for name, value in conditions.items():
+            column = self.get_column(name)[lines.start - 1:lines.stop - 1]
+
+            if name == "score_sequence":
+                selected &= (column == np.asarray(value, dtype=column.dtype)).all(axis=1)
+            elif isinstance(value, (tuple, list)):
+                low, high = value
+
+                if low is not None:
+                    selected &= column >= low
+                if high is not None:
+                    selected &= column <= high
+            else:
+                selected &= column == value
+
+        return selected
+
+    def query(self, start: int = 1, stop: int | None = None, **conditions) -> np.ndarray:
+        """
+        same conditions as select(), e.g. query(king_count=3, max_k_val=3), or query(max_gcd_dv=1)
+        :returns: array of the lines of the tournaments that meet the conditions, in increasing order, as used to name
+        the tournaments in experiments (T{order}_{line}), and by Util.DKS_Packed_Tournaments.get_adjacency()
+        """
+        return np.flatnonzero(self.select(start, stop, **conditions)) + start
+
+
+def parse_condition(condition: str) -> tuple[str, int | tuple | list]:
+    """
+    parses a condition of a query given on the command line, as column=value, column=low:high (either may be left
+    out), or score_sequence=s1,s2,...
+    :returns: tuple of the column name, and the value of the condition, as taken by DKS_Feature_Index.select()
+    :raises argparse.ArgumentTypeError: for an unknown column, or a malformed value, so the command line reports it as
+    a usage error
+    """
+    name, _, value = condition.partition("=")
+    column_names = tuple(column_name for column_name, _, _ in INDEX_COLUMNS)
+
+    if name not in column_names:
+        raise argparse.ArgumentTypeError(f"unknown column '{name}' in condition '{condition}', expected one of "
+                                         f"{column_names}")
+
+    try:
+        if name == "score_sequence":
+            return name, [int(score) for score in value.split(",")]
+
+        if ":" in value:
+            low, high = value.split(":")
+            return name, (int(low) if low else None, int(high) if high else None)
+
+        return name, int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"malformed value '{value}' in condition '{condition}', expected column=value, "
+                                         f"column=low:high, or score_sequence=s1,s2,...")
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """
+    command line entry of the index: builds the index of a corpus file, or queries an index file
+    :returns: exit status, always 0
+    """
+    parser = argparse.ArgumentParser(description="Builds, and queries, feature indexes of tournament corpora.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="build the feature index of a corpus file")
+    build_parser.add_argument("file", help="McKay .txt, or packed .dkst file of tournaments")
+    build_parser.add_argument("--output", default=None, help="index file to write, default is the corpus file, as .dksi")
+    build_parser.add_argument("--workers", type=int, default=None, help="number of worker processes, default is one "
+                                                                        "per core")
+    build_parser.add_argument("--batch-size", type=int, default=DEFAULT_INDEX_BATCH_SIZE,
+                              help="tournaments per chunk of work")
+
+    query_parser = subparsers.add_parser("query", help="list the tournaments of an index that meet conditions")
+    query_parser.add_argument("file", help=".dksi index file")
+    query_parser.add_argument("conditions", nargs="*", type=parse_condition,
+                              help="conditions, as column=value, column=low:high, or score_sequence=s1,s2,...")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "build":
+        count = build_feature_index(arguments.file, arguments.output, arguments.workers, arguments.batch_size)
+        print(f"main(): indexed {count} tournaments of '{arguments.file}'.")
+        return 0
+
+    with DKS_Feature_Index(arguments.file) as feature_index:
+        lines = feature_index.query(**dict(arguments.conditions))
+
+    print(f"main(): {len(lines)} of {len(feature_index)} tournaments meet the conditions.")
+    print(" ".join(str(line) for line in lines.tolist()))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
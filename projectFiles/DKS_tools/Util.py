@@ -8,8 +8,15 @@ for more detailed information, please read through docstrings, and comments belo
 # library imports
 import networkx as nx
 import math as m
+import numpy as np
 import os                   # for file path identification
 import linecache            # for loading ranges of lines into memory cache (optimization)
+import mmap                 # for streaming large files without reading them into memory
+import struct               # for the header of packed tournament files
+from multiprocessing import shared_memory  # for corpora shared between the processes of experiments
+from collections.abc import Iterator
+from projectFiles.DKS_tools import Analysis
+from projectFiles.DKS_tools.Analysis import adjacency_to_digraph  # re-exported, Analysis needs it too
 
 
 def mckay_txt_parser(filename: str | os.PathLike, fileline: int) -> nx.DiGraph:
@@ -124,7 +131,7 @@ def mckay_d6_parser(filename: str | os.PathLike, fileline: int) -> nx.DiGraph:
                 raise StartCharError(spec_line[0])
 
             for char in spec_line[1:]:  # all chars in a .d6 file should be printable ASCII chars in a specific range
-                if not (63 <= ord(char) <= 125):
+                if not (63 <= ord(char) <= 126):
                     raise FileContentError(char)
 
             # calculate the order of the digraph (e.g. if '@': ord('@') = 64; 64 - 63 = 1, order of digraph would be 1)
@@ -208,6 +215,532 @@ def mckay_d6_parser(filename: str | os.PathLike, fileline: int) -> nx.DiGraph:
     return digraph_result
 
 
+def mckay_txt_batches(filename: str | os.PathLike, batch_size: int = 4096, start: int = 1, stop: int | None = None,
+                      stride: int = 1) -> Iterator[np.ndarray]:
+    """
+    streams tournaments from a given file of type .txt, decoding a whole batch of lines at once; the file is memory-mapped
+    rather than read, and every line of a McKay tournament file has the same width, so line j is found by offset
+    arithmetic alone
+    :param filename: name of the file being passed in, required to be .txt format
+    :param batch_size: max number of tournaments decoded, and yielded, at once
+    :param start: first line to decode; please use non-zero indexed value (i.e. first line is line 1)
+    :param stop: line to stop before (as in range()), default is to carry on to the end of the file
+    :param stride: step between decoded lines (as in range())
+    :return: iterator over uint8 arrays of shape (batch, n, n), where entry [b, u, v] is 1 if u is adjacent to v in the
+    b-th tournament of the batch (vertex u of the array is vertex u + 1 of mckay_txt_parser()); the b-th tournament of
+    the i-th batch is on line start + (i * batch_size + b) * stride
+    """
+    for n, bits in _mckay_txt_bit_batches(filename, batch_size, start, stop, stride):
+        yield _bits_to_adjacency(bits, n)
+
+
+def mckay_txt_count(filename: str | os.PathLike) -> int:
+    """
+    :param filename: name of the file being passed in, required to be .txt format
+    :return: number of tournaments (lines) in the file, found from its size alone
+    """
+    if not str(filename).endswith('.txt'):
+        raise FileTypeError(filename)
+
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return 0
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            return _fixed_width_layout(mapped_file)[2]
+
+
+def _mckay_txt_bit_batches(filename: str | os.PathLike, batch_size: int, start: int, stop: int | None,
+                           stride: int) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    does the reading for mckay_txt_batches(), see there for the parameters
+    :return: iterator over tuples of the order of the tournaments, and a uint8 array of shape (batch, n choose 2) that
+    holds the bit string of each line as 0's and 1's
+    """
+    if not str(filename).endswith('.txt'):
+        raise FileTypeError(filename)
+
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            line_width, record_width, line_count = _fixed_width_layout(mapped_file)
+
+            k = line_width                                  # number of chars in line, should be equal to (n choose 2)
+            n = ((1 + m.sqrt((1 + 8 * k))) / 2)             # solve for order of digraph
+
+            if float(int(n)) != n:
+                raise FileLengthError(k)
+
+            n = int(n)
+            file_bytes = np.frombuffer(mapped_file, dtype=np.uint8)
+
+            try:
+                char_offsets = np.arange(line_width)
+                lines = range(start, line_count + 1 if stop is None else min(stop, line_count + 1), stride)
+
+                for batch_start in range(0, len(lines), batch_size):
+                    batch_lines = np.array(lines[batch_start:batch_start + batch_size])
+                    chars = file_bytes[((batch_lines - 1) * record_width)[:, np.newaxis] + char_offsets]
+
+                    bad_chars = (chars != ord('0')) & (chars != ord('1'))
+                    if bad_chars.any():  # checks for unexpected data in line content (we only want 1's and 0's)
+                        raise FileContentError(chr(chars[bad_chars][0]))
+
+                    yield n, chars - ord('0')
+            finally:
+                del file_bytes  # release the buffer before the mapping is closed (even if the caller stops early)
+
+
+def _bits_to_adjacency(bits: np.ndarray, n: int) -> np.ndarray:
+    """
+    turns a batch of tournament bit strings (the top-right triangle of the adjacency matrix, see mckay_txt_parser())
+    into full adjacency matrices
+    :param bits: uint8 array of shape (batch, n choose 2) of 0's and 1's
+    :param n: order of the tournaments
+    :return: uint8 array of shape (batch, n, n)
+    """
+    upper_rows, upper_cols = np.triu_indices(n, 1)  # same (u, v) order as the bit string, see mckay_txt_parser()
+
+    adjacency = np.zeros((len(bits), n, n), dtype=np.uint8)
+    adjacency[:, upper_rows, upper_cols] = bits      # '1' implies that u is adjacent to v
+    adjacency[:, upper_cols, upper_rows] = 1 - bits  # '0' implies that u is adjacent from v
+
+    return adjacency
+
+
+def _fixed_width_layout(mapped_file: mmap.mmap) -> tuple[int, int, int]:
+    """
+    finds the layout of a file whose lines all have the same width (trailing newline of the last line optional)
+    :param mapped_file: memory-mapped file
+    :return: tuple of the number of content chars per line, the number of bytes per line (newline included), and the
+    number of lines in the file
+    """
+    newline_position = mapped_file.find(b'\n')
+
+    if newline_position == -1:  # single line without a trailing newline
+        return len(mapped_file), len(mapped_file) + 1, 1
+
+    record_width = newline_position + 1
+    line_width = newline_position - 1 if mapped_file[newline_position - 1:newline_position] == b'\r' else newline_position
+    file_size = len(mapped_file)
+
+    if file_size % record_width == 0:
+        line_count = file_size // record_width
+    elif file_size % record_width == line_width:  # last line has no trailing newline
+        line_count = file_size // record_width + 1
+    else:
+        raise FileLengthError(file_size % record_width)  # lines aren't all of the same width
+
+    return line_width, record_width, line_count
+
+
+D6_BLOCK_BYTES = 1 << 24  # bytes of a .d6 file scanned for line breaks at once by mckay_d6_batches()
+
+
+def mckay_d6_batches(filename: str | os.PathLike, batch_size: int = 4096, start: int = 1, stop: int | None = None,
+                     stride: int = 1, as_digraphs: bool = False) -> Iterator[np.ndarray | list]:
+    """
+    streams digraphs from a given file of type .d6, decoding a whole batch of lines at once with byte arithmetic, and
+    bit unpacking on whole buffers; the file is memory-mapped, and scanned for line breaks a block at a time
+    :param filename: name of the file being passed in, required to be .d6 format
+    :param batch_size: max number of digraphs decoded, and yielded, at once
+    :param start: first line to decode; please use non-zero indexed value (i.e. first line is line 1)
+    :param stop: line to stop before (as in range()), default is to carry on to the end of the file
+    :param stride: step between decoded lines (as in range())
+    :param as_digraphs: if set to True, batches are yielded as lists of Analysis.DKS_Digraph objects named 'D{n}_{line}',
+    rather than as arrays
+    :return: iterator over uint8 arrays of shape (batch, n, n), where entry [b, u, v] is 1 if u is adjacent to v in the
+    b-th digraph of the batch (same vertices as mckay_d6_parser()); a batch only ever holds digraphs of one order, so
+    a file that mixes orders may yield batches smaller than batch_size
+    """
+    # side-note: if you're interested in the details of how .d6 files are encoded, and their formal definition,
+    # please refer to the following: https://users.cecs.anu.edu.au/~bdm/data/formats.txt
+
+    if not str(filename).endswith('.d6'):
+        raise FileTypeError(filename)
+
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            file_bytes = np.frombuffer(mapped_file, dtype=np.uint8)
+
+            try:
+                lines = range(start, stop if stop is not None else len(file_bytes) + 2, stride)
+                position = 0                # byte at which the next unscanned line starts
+                lines_scanned = 0           # number of lines before that byte
+                block_bytes = D6_BLOCK_BYTES
+
+                while position < len(file_bytes) and lines_scanned + 1 < lines.stop:
+                    block_end = min(position + block_bytes, len(file_bytes))
+                    line_ends = np.flatnonzero(file_bytes[position:block_end] == ord('\n')) + position
+
+                    if block_end == len(file_bytes) and (len(line_ends) == 0 or line_ends[-1] != block_end - 1):
+                        line_ends = np.append(line_ends, block_end)  # last line has no trailing newline
+                    elif len(line_ends) == 0:  # line is longer than the block, scan a bigger block
+                        block_bytes *= 2
+                        continue
+
+                    line_starts = np.concatenate(([position], line_ends[:-1] + 1))
+                    line_numbers = np.arange(lines_scanned + 1, lines_scanned + 1 + len(line_ends))
+
+                    # keep only the lines in the sought range
+                    sought = ((line_numbers >= lines.start) & (line_numbers < lines.stop)
+                              & ((line_numbers - lines.start) % lines.step == 0))
+                    sought_starts, sought_ends, sought_numbers = line_starts[sought], line_ends[sought], line_numbers[sought]
+
+                    for batch_start in range(0, len(sought_numbers), batch_size):
+                        batch = slice(batch_start, batch_start + batch_size)
+
+                        for n, adjacency, batch_lines in _decode_d6_lines(file_bytes, sought_starts[batch],
+                                                                          sought_ends[batch], sought_numbers[batch]):
+                            if as_digraphs:
+                                yield [Analysis.DKS_Digraph(adjacency_to_digraph(matrix, first_vertex=0), f"D{n}_{line}")
+                                       for matrix, line in zip(adjacency, batch_lines)]
+                            else:
+                                yield adjacency
+
+                    lines_scanned += len(line_ends)
+                    position = line_ends[-1] + 1
+            finally:
+                del file_bytes  # release the buffer before the mapping is closed (even if the caller stops early)
+
+
+def _decode_d6_lines(file_bytes: np.ndarray, line_starts: np.ndarray, line_ends: np.ndarray,
+                     line_numbers: np.ndarray) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """
+    decodes a batch of .d6 lines at once, lines are grouped into runs of consecutive lines that share their order, and
+    width, so that each run is decoded as a single 2-d array of chars
+    :param file_bytes: bytes of the whole file
+    :param line_starts: position of the first char ('&') of every line
+    :param line_ends: position just past the last char of every line (i.e. of its newline)
+    :param line_numbers: line number of every line, non-zero indexed
+    :return: iterator over tuples of the order of a run, its uint8 adjacency array of shape (run, n, n), and the line
+    numbers of the run
+    """
+    if len(line_starts) == 0:
+        return
+
+    line_ends = line_ends - (file_bytes[np.maximum(line_ends - 1, 0)] == ord('\r'))  # clean up input
+    line_widths = line_ends - line_starts
+
+    if (line_widths < 2).any():
+        raise SpecLineError(int(line_numbers[line_widths < 2][0]))
+
+    start_chars = file_bytes[line_starts]
+    if (start_chars != ord('&')).any():  # .d6 file lines start with '&' as a delimiting char
+        raise StartCharError(chr(start_chars[start_chars != ord('&')][0]))
+
+    '''
+    the order is given by N(n): a single char (n + 63) for n <= 62, or '~' followed by three chars holding n as 18 bits
+    for larger n, lines too short to hold the long form are given a dummy value to be caught below
+    '''
+    orders = file_bytes[line_starts + 1].astype(np.int64) - 63
+    long_form = (orders == 63) & (line_widths >= 5)
+    header_widths = np.where(long_form, 5, 2)  # '&' plus N(n)
+
+    if long_form.any():
+        long_chars = file_bytes[line_starts[long_form][:, np.newaxis] + np.arange(2, 5)].astype(np.int64) - 63
+        orders[long_form] = (long_chars[:, 0] << 12) | (long_chars[:, 1] << 6) | long_chars[:, 2]
+
+    # runs of consecutive lines with the same width, and order
+    run_breaks = np.flatnonzero((np.diff(line_widths) != 0) | (np.diff(orders) != 0)) + 1
+
+    for run in np.split(np.arange(len(line_starts)), run_breaks):
+        n = int(orders[run[0]])
+        header_width = int(header_widths[run[0]])
+        data_width = int(line_widths[run[0]]) - header_width
+
+        if n < 0 or data_width * 6 < n * n:  # not enough chars to hold an n^2 adjacency matrix
+            raise FileLengthError(int(line_widths[run[0]]))
+
+        chars = file_bytes[(line_starts[run] + header_width)[:, np.newaxis] + np.arange(data_width)]
+
+        bad_chars = (chars < 63) | (chars > 126)
+        if bad_chars.any():  # all chars in a .d6 file should be printable ASCII chars in a specific range
+            raise FileContentError(chr(chars[bad_chars][0]))
+
+        '''
+        each char less 63 is six bits of the adjacency matrix, big-endian: shifting it two bits to the left fills a
+        byte whose first six bits are those bits, so unpacking every byte and dropping the last two bits of each gives
+        the concatenated bit array, of which the first n^2 bits are the matrix (see mckay_d6_parser())
+        '''
+        bits = np.unpackbits(((chars - 63) << 2)[:, :, np.newaxis], axis=2)[:, :, :6].reshape(len(run), -1)
+
+        yield n, bits[:, :n * n].reshape(len(run), n, n), line_numbers[run]
+
+
+'''
+packed tournament files ('.dkst') hold the same tournaments as a McKay .txt file, in binary: a fixed-size header, then one
+fixed-width record per tournament, which is the bit string of its line (n choose 2 bits) packed 8 bits to a byte, and
+padded with zeroes to a whole number of bytes; tournament j then starts at byte HEADER_SIZE + (j - 1) * record_bytes
+
+header layout (little-endian): magic b'DKST', format version (uint16), order n (uint16), tournament count (uint64),
+record_bytes (uint32), and 4 bytes of padding
+'''
+PACKED_MAGIC = b'DKST'
+PACKED_VERSION = 1
+PACKED_HEADER = struct.Struct('<4sHHQI4x')
+
+
+def pack_mckay_txt(txt_filename: str | os.PathLike, packed_filename: str | os.PathLike, batch_size: int = 65536) -> int:
+    """
+    converts a McKay tournament file of type .txt into a packed tournament file of type .dkst, streaming it in batches
+    :param txt_filename: name of the file being converted, required to be .txt format
+    :param packed_filename: name of the file to be written, required to be .dkst format
+    :param batch_size: number of lines converted at once
+    :return: the number of tournaments written
+    """
+    if not str(packed_filename).endswith('.dkst'):
+        raise FileTypeError(packed_filename)
+
+    count = 0
+    n = 0
+
+    with open(packed_filename, 'wb') as w_f:
+        w_f.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, 0, 0, 0))  # rewritten once the count is known
+
+        for n, bits in _mckay_txt_bit_batches(txt_filename, batch_size, 1, None, 1):
+            w_f.write(np.packbits(bits, axis=1).tobytes())
+            count += len(bits)
+
+        w_f.seek(0)
+        w_f.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, n, count, _packed_record_bytes(n)))
+
+    return count
+
+
+def _packed_record_bytes(n: int) -> int:
+    """
+    :return: number of bytes in the record of a tournament of order n, in a packed tournament file
+    """
+    return (n * (n - 1) // 2 + 7) // 8
+
+
+class DKS_Packed_Tournaments:
+    """
+    Memory-mapped reader of a packed tournament file (see pack_mckay_txt()), tournaments are fetched by offset arithmetic
+    alone, so any tournament, or any slice of tournaments, of the file can be read without touching the rest
+    """
+    def __init__(self, filename: str | os.PathLike):
+        """
+        :param filename: name of the file being read, required to be .dkst format
+        """
+        if not str(filename).endswith('.dkst'):
+            raise FileTypeError(filename)
+
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._mapped_file = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.order, self.count, self.record_bytes = PACKED_HEADER.unpack_from(self._mapped_file)
+
+        if magic != PACKED_MAGIC or version != PACKED_VERSION:
+            self.close()
+            raise FileContentError(magic)
+
+        if len(self._mapped_file) != PACKED_HEADER.size + self.count * self.record_bytes:
+            self.close()
+            raise FileLengthError(len(self._mapped_file))
+
+        # records viewed as a (count, record_bytes) array, straight out of the mapping
+        self._records = np.frombuffer(self._mapped_file, dtype=np.uint8, offset=PACKED_HEADER.size,
+                                      count=self.count * self.record_bytes).reshape(self.count, self.record_bytes)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        releases the mapping, and the file
+        """
+        self._records = None  # release the buffer before the mapping is closed
+        self._mapped_file.close()
+        self._file.close()
+
+    def get_adjacency(self, fileline: int) -> np.ndarray:
+        """
+        :param fileline: number of the tournament in the file, numbered from 1 (i.e. same as the line of the .txt file)
+        :return: uint8 array of shape (n, n), as in mckay_txt_batches()
+        """
+        if not 1 <= fileline <= self.count:
+            raise SpecLineError(fileline)
+
+        bits = np.unpackbits(self._records[fileline - 1], count=self.order * (self.order - 1) // 2)
+
+        return _bits_to_adjacency(bits[np.newaxis], self.order)[0]
+
+    def batches(self, batch_size: int = 4096, start: int = 1, stop: int | None = None,
+                stride: int = 1) -> Iterator[np.ndarray]:
+        """
+        streams tournaments in decoded batches, same parameters (and line numbering) as mckay_txt_batches()
+        :return: iterator over uint8 arrays of shape (batch, n, n)
+        """
+        lines = range(start, self.count + 1 if stop is None else min(stop, self.count + 1), stride)
+
+        for batch_start in range(0, len(lines), batch_size):
+            batch_lines = lines[batch_start:batch_start + batch_size]
+            records = self._records[batch_lines.start - 1:batch_lines.stop - 1:batch_lines.step]
+            bits = np.unpackbits(records, axis=1, count=self.order * (self.order - 1) // 2)
+
+            yield _bits_to_adjacency(bits, self.order)
+
+
+class DKS_Shared_Tournaments(DKS_Packed_Tournaments):
+    """
+    Packed tournaments (same records as a packed tournament file) held in a multiprocessing.shared_memory block rather
+    than in a file; the corpus is decoded once by the process that creates the block, and every other process attaches
+    to it by name, reading the same memory without copying, or parsing, anything. Pickling an object (e.g. handing it to
+    a worker process) only pickles the name of its block. Has the same reading methods as DKS_Packed_Tournaments
+    """
+    def __init__(self, order: int, count: int, name: str | None = None):
+        """
+        :param order: order of the tournaments in the block
+        :param count: number of tournaments in the block
+        :param name: name of the shared memory block to attach to, if None, a new (zeroed) block is created, which is
+        removed from the system once the object that created it is closed
+        """
+        self.filename = None
+        self.order = order
+        self.count = count
+        self.record_bytes = _packed_record_bytes(order)
+
+        # only the process that created the block removes it, a forked child inherits the object, but not the block
+        self._owner_pid = os.getpid() if name is None else None
+        self._shared_memory = shared_memory.SharedMemory(name=name, create=name is None,
+                                                         size=max(count * self.record_bytes, 1))  # can't be empty
+        self.name = self._shared_memory.name
+
+        self._records = np.ndarray((count, self.record_bytes), dtype=np.uint8, buffer=self._shared_memory.buf)
+
+    @classmethod
+    def from_file(cls, filename: str | os.PathLike, batch_size: int = 65536):
+        """
+        :param filename: name of either a McKay .txt file, or a packed .dkst file
+        :param batch_size: number of lines of a .txt file decoded at once
+        :returns: a new shared block holding every tournament of the file
+        """
+        if str(filename).endswith('.dkst'):
+            with DKS_Packed_Tournaments(filename) as packed_tournaments:
+                shared_tournaments = cls(packed_tournaments.order, packed_tournaments.count)
+                shared_tournaments._records[:] = packed_tournaments._records
+
+            return shared_tournaments
+
+        shared_tournaments = None
+        first_index = 0
+
+        for n, bits in _mckay_txt_bit_batches(filename, batch_size, 1, None, 1):
+            if shared_tournaments is None:
+                shared_tournaments = cls(n, mckay_txt_count(filename))
+
+            shared_tournaments._records[first_index:first_index + len(bits)] = np.packbits(bits, axis=1)
+            first_index += len(bits)
+
+        return shared_tournaments if shared_tournaments is not None else cls(0, 0)
+
+    def __reduce__(self):
+        return DKS_Shared_Tournaments, (self.order, self.count, self.name)  # attach to the same block when unpickled
+
+    def close(self):
+        """
+        releases the block, and removes it from the system if this object created it
+        """
+        self._records = None  # release the buffer before the block is closed
+        self._shared_memory.close()
+
+        if self._owner_pid == os.getpid():
+            self._shared_memory.unlink()
+
+
+class DKS_Shared_Arrays:
+    """
+    Named numpy arrays held together in a multiprocessing.shared_memory block, for data found once by one process, and
+    read by many others without copying it (e.g. the analysis of every tournament of a corpus); as with
+    DKS_Shared_Tournaments, pickling an object only pickles the name of its block, and the layout of its arrays
+    """
+    def __init__(self, layout: dict[str, tuple[tuple, str]], name: str | None = None):
+        """
+        :param layout: dict of array name -> (shape, dtype) of the array
+        :param name: name of the shared memory block to attach to, if None, a new (zeroed) block is created, which is
+        removed from the system once the object that created it is closed
+        """
+        self.layout = layout
+
+        offsets = dict()
+        block_size = 0
+
+        for array_name, (shape, dtype) in layout.items():
+            offsets[array_name] = block_size
+            block_size += -(-m.prod(shape) * np.dtype(dtype).itemsize // 8) * 8  # every array is 8-byte aligned
+
+        # only the process that created the block removes it, a forked child inherits the object, but not the block
+        self._owner_pid = os.getpid() if name is None else None
+        self._shared_memory = shared_memory.SharedMemory(name=name, create=name is None, size=max(block_size, 1))
+        self.name = self._shared_memory.name
+
+        self.arrays: dict = {array_name: np.ndarray(shape, dtype=dtype, buffer=self._shared_memory.buf,
+                                                    offset=offsets[array_name])
+                             for array_name, (shape, dtype) in layout.items()}
+
+    def __getitem__(self, array_name: str) -> np.ndarray:
+        return self.arrays[array_name]
+
+    def __reduce__(self):
+        return DKS_Shared_Arrays, (self.layout, self.name)  # attach to the same block when unpickled
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        releases the block, and removes it from the system if this object created it
+        """
+        self.arrays = None  # release the buffers before the block is closed
+        self._shared_memory.close()
+
+        if self._owner_pid == os.getpid():
+            self._shared_memory.unlink()
+
+
+def tournament_batches(filename: str | os.PathLike, batch_size: int = 4096, start: int = 1, stop: int | None = None,
+                       stride: int = 1) -> Iterator[np.ndarray]:
+    """
+    streams tournaments in decoded batches from either a McKay .txt file, or a packed .dkst file, same parameters (and
+    line numbering) as mckay_txt_batches()
+    :return: iterator over uint8 arrays of shape (batch, n, n)
+    """
+    if str(filename).endswith('.dkst'):
+        with DKS_Packed_Tournaments(filename) as packed_tournaments:
+            yield from packed_tournaments.batches(batch_size, start, stop, stride)
+    else:
+        yield from mckay_txt_batches(filename, batch_size, start, stop, stride)
+
+
+def tournament_count(filename: str | os.PathLike) -> int:
+    """
+    :param filename: name of either a McKay .txt file, or a packed .dkst file
+    :return: number of tournaments in the file, without reading through it
+    """
+    if str(filename).endswith('.dkst'):
+        with DKS_Packed_Tournaments(filename) as packed_tournaments:
+            return len(packed_tournaments)
+
+    return mckay_txt_count(filename)
+
+
 class FileLengthError(Exception):
     def __init__(self, found_length):
         self.wrong_length = found_length